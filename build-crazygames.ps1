@@ -52,9 +52,27 @@ foreach ($file in $jsFiles) {
     Write-Host "  OK js\$file" -ForegroundColor Gray
 }
 
+# Tag performance beacons with the build commit (scripts/perf_collector.py)
+$commit = git rev-parse --short HEAD 2>$null
+if ($commit) {
+    $gameJs = "$buildFolder\js\game.js"
+    (Get-Content $gameJs -Raw -Encoding UTF8).Replace("const BUILD_COMMIT = 'dev';", "const BUILD_COMMIT = '$commit';") |
+        Set-Content $gameJs -NoNewline -Encoding UTF8
+    Write-Host "  OK build commit $commit" -ForegroundColor Gray
+}
+
 # Data
 Copy-Item "data\all_strokes.json" -Destination "$buildFolder\data\"
-Copy-Item "data\graphics.txt" -Destination "$buildFolder\data\"
+if (Test-Path "data\graphics.hza") {
+    # Block-compressed archive (scripts/graphics_archive.py), several times smaller
+    Copy-Item "data\graphics.hza" -Destination "$buildFolder\data\"
+} else {
+    Copy-Item "data\graphics.txt" -Destination "$buildFolder\data\"
+}
+if (Test-Path "data\versions") {
+    # Delta chain for returning players (scripts/dataset_versions.py)
+    Copy-Item "data\versions" -Destination "$buildFolder\data\" -Recurse
+}
 
 # Resources
 $resFiles = @(
@@ -3,6 +3,14 @@
 // ============================================
 console.log('✅ auth.js loaded');
 
+// Optional progress sync backend (scripts/progress_server.py), null = localStorage only
+const PROGRESS_SYNC_URL = null;
+const PROGRESS_SYNC_ID_KEY = 'progressSyncId';
+// Optional review scheduler (scripts/review_scheduler.py), null = no reviews
+const REVIEW_SCHEDULER_URL = null;
+// Optional leaderboard (scripts/leaderboard_server.py), null = no leaderboard
+const LEADERBOARD_URL = null;
+
 function showAuthModal() {
     const modal = document.getElementById('auth-modal');
     if (modal) {
@@ -43,6 +51,7 @@ function onUserLogin(user) {
     console.log('🔵 onUserLogin called with user:', user);
     currentUser = user;
     updateUserInfoDisplay(user);
+    pullRemoteProgress();
     
     // Auto-save if in level complete screen
     const levelCompleteOverlay = document.getElementById('level-complete-overlay');
@@ -133,6 +142,7 @@ function saveGameProgress() {
         
         // Also save to simple key for backward compatibility
         localStorage.setItem('gameProgress', JSON.stringify(progress));
+        pushProgressUpdate({ currentLevel: progress.currentLevel, hp: progress.hp, timestamp: progress.timestamp });
         
         // Verify save worked by reading back
         const verification = localStorage.getItem(userKey);
@@ -207,4 +217,178 @@ function saveCharacterIndex(index) {
     } catch (e) {
         // Silent fail
     }
+    pushProgressUpdate({ characterIndex: index, timestamp: Date.now() });
+}
+
+// ============================================
+// PROGRESS SYNC (optional)
+// ============================================
+
+// Opaque id for this player on the sync backends: 128 random bits kept in
+// localStorage (one per signed-in account, one for guests). Never the email, so
+// knowing a player's address does not give access to their progress. Another
+// device adopts the same id by redeeming a link code (see redeemProgressLinkCode).
+function progressSyncIdKey() {
+    return currentUser && !currentUser.isGuest && currentUser.email
+        ? `${PROGRESS_SYNC_ID_KEY}_${currentUser.email}`
+        : PROGRESS_SYNC_ID_KEY;
+}
+
+function getProgressSyncId() {
+    const key = progressSyncIdKey();
+    try {
+        let id = localStorage.getItem(key);
+        if (!id || !/^[0-9a-f]{32}$/.test(id)) {
+            const bytes = crypto.getRandomValues(new Uint8Array(16));
+            id = Array.from(bytes, b => b.toString(16).padStart(2, '0')).join('');
+            localStorage.setItem(key, id);
+        }
+        return id;
+    } catch (e) {
+        return null;
+    }
+}
+
+// Ask the sync server for a one-time code that lets another device continue this progress
+async function createProgressLinkCode() {
+    const syncId = PROGRESS_SYNC_URL && currentUser ? getProgressSyncId() : null;
+    if (!syncId) {
+        return;
+    }
+    try {
+        const response = await fetch(`${PROGRESS_SYNC_URL}/link/${encodeURIComponent(syncId)}`, { method: 'POST' });
+        if (!response.ok) {
+            throw new Error(`HTTP ${response.status}`);
+        }
+        const link = await response.json();
+        const minutes = Math.round(link.expiresIn / 60);
+        showToast('Link Code', `Enter ${link.code} on your other device within ${minutes} minutes.`, '🔗', 15000);
+    } catch (error) {
+        console.warn('Could not create link code:', error);
+        showToast('Link Failed', 'Could not reach the sync server.', '❌');
+    }
+}
+
+// Adopt the progress id behind a link code from another device, then load its progress
+async function redeemProgressLinkCode(code) {
+    if (!PROGRESS_SYNC_URL || !currentUser || !code) {
+        return;
+    }
+    try {
+        const response = await fetch(`${PROGRESS_SYNC_URL}/link/redeem`, {
+            method: 'POST',
+            headers: { 'Content-Type': 'application/json' },
+            body: JSON.stringify({ code: code })
+        });
+        const result = response.ok ? await response.json() : null;
+        if (!result || !/^[0-9a-f]{32}$/.test(result.playerId)) {
+            showToast('Link Failed', 'That code is unknown or has expired.', '⚠️');
+            return;
+        }
+        localStorage.setItem(progressSyncIdKey(), result.playerId);
+        await pullRemoteProgress();
+        showToast('Device Linked', 'Progress from your other device has been loaded.', '🔗');
+    } catch (error) {
+        console.warn('Could not redeem link code:', error);
+        showToast('Link Failed', 'Could not reach the sync server.', '❌');
+    }
+}
+
+function promptProgressLinkCode() {
+    const code = window.prompt('Enter the link code shown on your other device:');
+    if (code) {
+        redeemProgressLinkCode(code.trim());
+    }
+}
+
+// Fire-and-forget; the server coalesces bursts, so one request per save is fine
+function pushProgressUpdate(changes) {
+    if (!PROGRESS_SYNC_URL || !currentUser) {
+        return;
+    }
+    const syncId = getProgressSyncId();
+    if (!syncId) {
+        return;
+    }
+    fetch(`${PROGRESS_SYNC_URL}/progress/${encodeURIComponent(syncId)}`, {
+        method: 'POST',
+        headers: { 'Content-Type': 'application/json' },
+        body: JSON.stringify(changes),
+        keepalive: true
+    }).catch(error => console.warn('Progress sync failed:', error));
+}
+
+// Report one finished character's stroke outcomes so it can be scheduled for review
+function pushReviewResult(char, perfect, notGood) {
+    if (!REVIEW_SCHEDULER_URL || !currentUser || perfect + notGood === 0) {
+        return;
+    }
+    const syncId = getProgressSyncId();
+    if (!syncId) {
+        return;
+    }
+    fetch(`${REVIEW_SCHEDULER_URL}/reviews/${encodeURIComponent(syncId)}`, {
+        method: 'POST',
+        headers: { 'Content-Type': 'application/json' },
+        body: JSON.stringify({ character: char, perfect: perfect, notGood: notGood }),
+        keepalive: true
+    }).catch(error => console.warn('Review sync failed:', error));
+}
+
+// Submit a finished level; the server keeps each player's best result per level
+function pushLevelResult(levelId, result) {
+    if (!LEADERBOARD_URL || !currentUser) {
+        return;
+    }
+    const syncId = getProgressSyncId();
+    if (!syncId) {
+        return;
+    }
+    fetch(`${LEADERBOARD_URL}/leaderboard/${encodeURIComponent(levelId)}/${encodeURIComponent(syncId)}`, {
+        method: 'POST',
+        headers: { 'Content-Type': 'application/json' },
+        body: JSON.stringify(Object.assign({ name: currentUser.name }, result)),
+        keepalive: true
+    }).catch(error => console.warn('Leaderboard submit failed:', error));
+}
+
+// Copy newer progress from the backend into localStorage (e.g. from another device)
+async function pullRemoteProgress() {
+    if (!PROGRESS_SYNC_URL || !currentUser) {
+        return;
+    }
+    const syncId = getProgressSyncId();
+    if (!syncId) {
+        return;
+    }
+    try {
+        const response = await fetch(`${PROGRESS_SYNC_URL}/progress/${encodeURIComponent(syncId)}`);
+        if (!response.ok) {
+            return;
+        }
+        const remote = await response.json();
+        const local = loadGameProgress();
+        const localTime = local ? local.timestamp : 0;
+        // The server merges field by field; take each field that is newer than the local save
+        const fieldTime = field => (remote.fieldTimestamps && remote.fieldTimestamps[field]) || remote.timestamp || 0;
+        if (!remote.timestamp || localTime >= remote.timestamp) {
+            return;
+        }
+        if (remote.currentLevel !== undefined && fieldTime('currentLevel') > localTime) {
+            const progress = {
+                userName: currentUser.name,
+                currentLevel: remote.currentLevel,
+                hp: remote.hp,
+                timestamp: fieldTime('currentLevel')
+            };
+            localStorage.setItem(`gameProgress_${currentUser.name}`, JSON.stringify(progress));
+            localStorage.setItem('gameProgress', JSON.stringify(progress));
+        }
+        if (typeof remote.characterIndex === 'number' && fieldTime('characterIndex') > localTime) {
+            localStorage.setItem(STORAGE_KEY, remote.characterIndex.toString());
+        }
+        console.log('Loaded newer progress from sync server:', remote);
+    } catch (error) {
+        console.warn('Could not load remote progress:', error);
+    }
 }
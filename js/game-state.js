@@ -21,6 +21,9 @@ let isGamePaused = false;
 // Score tracking system
 let perfectStrokesCount = 0;
 let notGoodStrokesCount = 0;
+// Counters when the current character started (per-character outcomes for reviews)
+let characterStartPerfectCount = 0;
+let characterStartNotGoodCount = 0;
 
 // Level system
 let levelConfig = null;
@@ -33,6 +36,9 @@ let currentUser = null;
 // All characters stroke data loaded from all_strokes.json
 let allCharactersData = {};
 
+// schemaVersion of the loaded stroke data (null for files from older generators)
+let strokeDataSchemaVersion = null;
+
 // List to store first 5 characters in new structure
 let first5CharactersInNewStructure = [];
 
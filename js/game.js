@@ -20,12 +20,62 @@
             });
         }
 
+        // ============================================
+        // PERFORMANCE BEACONS (scripts/perf_collector.py)
+        // ============================================
+        // Set to e.g. 'http://localhost:8030' to report load timings
+        const PERF_BEACON_URL = null;
+        // Replaced with the git commit by build-crazygames.ps1
+        const BUILD_COMMIT = 'dev';
+        const PERF_BEACON_BATCH_SIZE = 20;
+        const PERF_BEACON_DELAY = 10000; // ms before a partial batch is sent
+        let perfTimings = [];
+        let perfBeaconTimer = null;
+
+        function getPerfDeviceClass() {
+            const mobile = /Mobi|Android|iPhone|iPad/i.test(navigator.userAgent);
+            const memory = navigator.deviceMemory;
+            const tier = memory === undefined ? '' : memory <= 2 ? '-low' : memory <= 4 ? '-mid' : '-high';
+            return (mobile ? 'mobile' : 'desktop') + tier;
+        }
+
+        function recordTiming(metric, startTime) {
+            if (!PERF_BEACON_URL) return;
+            perfTimings.push({ metric: metric, ms: Math.round((performance.now() - startTime) * 10) / 10 });
+            if (perfTimings.length >= PERF_BEACON_BATCH_SIZE) {
+                sendPerfBeacon();
+            } else if (!perfBeaconTimer) {
+                perfBeaconTimer = setTimeout(sendPerfBeacon, PERF_BEACON_DELAY);
+            }
+        }
+
+        function sendPerfBeacon() {
+            clearTimeout(perfBeaconTimer);
+            perfBeaconTimer = null;
+            if (!PERF_BEACON_URL || perfTimings.length === 0) return;
+            // text/plain body: sendBeacon cannot send a CORS preflight
+            const body = JSON.stringify({ build: BUILD_COMMIT, device: getPerfDeviceClass(), timings: perfTimings });
+            perfTimings = [];
+            try {
+                navigator.sendBeacon(`${PERF_BEACON_URL}/beacon`, body);
+            } catch (error) {
+                console.warn('Performance beacon failed:', error);
+            }
+        }
+
+        // Send whatever is queued when the page is hidden or closed
+        document.addEventListener('visibilitychange', () => {
+            if (document.visibilityState === 'hidden') sendPerfBeacon();
+        });
+
         // Level loading and selection functions
         async function loadLevelConfig() {
             try {
+                const startTime = performance.now();
                 // Add cache-busting parameter to force reload of latest data
                 const response = await fetch(`level_config.json?v=${Date.now()}`);
                 levelConfig = await response.json();
+                recordTiming('levelConfig', startTime);
                 console.log('Level config loaded:', levelConfig);
                 return levelConfig;
             } catch (error) {
@@ -383,6 +433,7 @@
         }
         
         async function startLevel(levelId) {
+            const startTime = performance.now();
             // Show loading screen
             const loadingScreen = document.getElementById('loading-screen');
             if (loadingScreen) {
@@ -515,6 +566,7 @@
             // Initialize the game with the characters from this level only
             // Pass true to skip loading ToWriteText.txt
             await initializeApp(true);
+            recordTiming('levelStart', startTime);
             
             // Hide loading screen after level is loaded
             if (loadingScreen) {
@@ -641,6 +693,15 @@
             
             // Calculate level score
             const scoreData = calculateLevelScore();
+            if (levelStartTime && scoreData.totalStrokes > 0) {
+                pushLevelResult(currentLevel.id, {
+                    score: Math.round(scoreData.score * 10) / 10,
+                    timeMs: Date.now() - levelStartTime,
+                    hp: hpLeft,
+                    perfect: scoreData.perfectStrokes,
+                    notGood: scoreData.notGoodStrokes
+                });
+            }
             
             // Update level complete overlay with current level info
             const overlay = document.getElementById('level-complete-overlay');
@@ -1414,9 +1475,9 @@
          *   character: string,           // The Chinese character
          *   unicode: number,             // Unicode code point
          *   unicodeHex: string,         // Unicode in hex format
-         *   timestamp: string,          // ISO 8601 timestamp
-         *   version: string,            // Data structure version
-         *   source: string,             // Data source
+         *   timestamp: string,          // ISO 8601 timestamp (legacy data only)
+         *   version: string,            // Data structure version (legacy data only)
+         *   source: string,             // Data source (legacy data only)
          *   totalStrokes: number,       // Total number of strokes
          *   strokes: StrokeData[],      // Array of processed stroke data
          *   rawCharData: object         // Original unprocessed data
@@ -1448,6 +1509,10 @@
         // List to store first 5 characters in new structure
         let charactersStrokeDataList = [];
         
+        // all_strokes.json entries at this schemaVersion are already in the structure above
+        // with every stroke processed (scripts/get_one_character_strokes.py SCHEMA_VERSION)
+        const STROKE_SCHEMA_VERSION = 2;
+        
         // newHanziWriter class is now defined in hanzi-writer.js
         // Create global instance (hanziWriter is declared in game-state.js)
         hanziWriter = new newHanziWriter();
@@ -1676,6 +1741,24 @@
                 charactersStrokeDataList = [];
             }
             
+            // Current generator output is used as-is: no per-character copies or reprocessing
+            if (strokeDataSchemaVersion === STROKE_SCHEMA_VERSION) {
+                const missing = [];
+                for (const char of charactersToLearn) {
+                    const charData = allCharactersData[char];
+                    if (charData) {
+                        charactersStrokeDataList.push(charData);
+                    } else {
+                        missing.push(char);
+                    }
+                }
+                if (missing.length > 0) {
+                    console.warn(`Characters not found in allCharactersData: ${missing.join('')}`);
+                }
+                console.log(`Loaded ${charactersStrokeDataList.length} characters into structure list (schema v${strokeDataSchemaVersion})`);
+                return;
+            }
+            
             // charactersToLearn is already populated from ToWriteText.txt in order
             console.log(`Loading ${charactersToLearn.length} characters into new structure (in order from ToWriteText.txt)...`);
             
@@ -2005,6 +2088,14 @@
                     continueGuestBtn.addEventListener('click', continueAsGuest);
                 }
 
+                // Device linking for the optional progress sync server
+                const progressLinkButtons = document.getElementById('progress-link-buttons');
+                if (progressLinkButtons && typeof PROGRESS_SYNC_URL !== 'undefined' && PROGRESS_SYNC_URL) {
+                    progressLinkButtons.style.display = '';
+                    document.getElementById('link-code-create-btn').addEventListener('click', createProgressLinkCode);
+                    document.getElementById('link-code-enter-btn').addEventListener('click', promptProgressLinkCode);
+                }
+
                 // Initialize logout button
                 const logoutBtn = document.getElementById('logout-btn');
                 if (logoutBtn) {
@@ -2190,30 +2281,192 @@
             }
         }
         
+        /**
+         * Expand one character of a deduplicated all_strokes.json (scripts/dedupe_strokes.py).
+         * strokeRefs holds [strokeTable id, dx, dy]; medians are bottom-left origin,
+         * processed stroke points are screen space (y flipped).
+         */
+        function expandDedupedCharacter(entry, strokeTable) {
+            if (!entry.strokeRefs) return entry;
+            
+            const translatePath = (path, dx, dy) => {
+                let isX = true;
+                return path.match(/[A-Za-z]|-?\d+(?:\.\d+)?/g).map(token => {
+                    if (/[A-Za-z]/.test(token)) {
+                        isX = true;
+                        return token;
+                    }
+                    const value = parseFloat(token) + (isX ? dx : dy);
+                    isX = !isX;
+                    return String(value);
+                }).join(' ');
+            };
+            
+            const outlines = [];
+            const medians = [];
+            const strokes = [];
+            entry.strokeRefs.forEach(([strokeId, dx, dy], i) => {
+                const shared = strokeTable[strokeId];
+                outlines.push(translatePath(shared.outline, dx, dy));
+                medians.push(shared.median.map(p => [p[0] + dx, p[1] + dy]));
+                strokes.push({
+                    index: i,
+                    ...shared.stroke,
+                    startPoint: { x: shared.stroke.startPoint.x + dx, y: shared.stroke.startPoint.y - dy },
+                    endPoint: { x: shared.stroke.endPoint.x + dx, y: shared.stroke.endPoint.y - dy }
+                });
+            });
+            
+            return {
+                character: entry.character,
+                unicode: entry.unicode,
+                unicodeHex: entry.unicodeHex,
+                totalStrokes: entry.totalStrokes,
+                strokes: strokes,
+                rawCharData: { character: entry.character, strokes: outlines, medians: medians }
+            };
+        }
+        
+        // Characters are expanded on first access, so only the ones a level uses are materialized
+        function createDedupedCharacterMap(loadedData) {
+            const characters = {};
+            for (const [char, entry] of Object.entries(loadedData.characters)) {
+                Object.defineProperty(characters, char, {
+                    enumerable: true,
+                    configurable: true,
+                    get() {
+                        const expanded = expandDedupedCharacter(entry, loadedData.strokeTable);
+                        Object.defineProperty(characters, char, { value: expanded, enumerable: true, writable: true });
+                        return expanded;
+                    }
+                });
+            }
+            console.log(`Deduplicated stroke data: ${loadedData.strokeTable.length} shared strokes`);
+            return characters;
+        }
+        
+        /**
+         * Load stroke data through the versioned delta chain (scripts/dataset_versions.py).
+         * A cached copy is patched with the deltas it is missing; when there is no cached
+         * copy or the chain is too long, the full file is downloaded once and cached.
+         * Returns null if versioning is unavailable, so the caller falls back to a plain fetch.
+         */
+        async function loadVersionedStrokesData() {
+            if (!('caches' in window)) return null;
+            
+            try {
+                const manifestResponse = await fetch(`data/versions/manifest.json?v=${Date.now()}`);
+                if (!manifestResponse.ok) return null;
+                const manifest = await manifestResponse.json();
+                
+                const cache = await caches.open('hanzi-stroke-data');
+                const cacheKey = 'data/all_strokes.json';
+                const cached = await cache.match(cacheKey);
+                let data = cached ? await cached.json() : null;
+                const cachedVersion = data ? data.datasetVersion : 0;
+                
+                const latestInfo = manifest.versions.find(v => v.version === manifest.latest);
+                if (data && cachedVersion === manifest.latest && data.schemaVersion === manifest.schemaVersion &&
+                        latestInfo && data.datasetHash === latestInfo.hash) {
+                    console.log(`Stroke data v${cachedVersion} loaded from cache`);
+                    return data;
+                }
+                
+                const chain = manifest.versions.filter(v => v.version > cachedVersion);
+                const chainSize = chain.reduce((sum, v) => sum + (v.deltaSize || 0), 0);
+                // A cache newer than latest (history reset) or without a known hash is never patched
+                const canPatch = data && cachedVersion > 0 && cachedVersion < manifest.latest &&
+                    latestInfo && data.datasetHash &&
+                    data.schemaVersion === manifest.schemaVersion &&
+                    chain.length > 0 && chain.length <= manifest.maxChain &&
+                    chain.every(v => v.delta) &&
+                    chainSize < manifest.fullSize;
+                
+                if (canPatch) {
+                    for (const version of chain) {
+                        const deltaResponse = await fetch(`data/versions/${version.delta}`);
+                        const delta = deltaResponse.ok ? await deltaResponse.json() : null;
+                        // Each delta must start exactly where the patched copy is
+                        if (!delta || delta.from !== data.datasetVersion || delta.to !== version.version ||
+                            delta.fromHash !== data.datasetHash || delta.toHash !== version.hash) {
+                            console.warn(`Stroke data delta ${version.delta} does not apply to v${data.datasetVersion}`);
+                            data = null;
+                            break;
+                        }
+                        Object.assign(data.characters, delta.added, delta.changed);
+                        delta.removed.forEach(char => delete data.characters[char]);
+                        data.datasetVersion = delta.to;
+                        data.datasetHash = delta.toHash;
+                    }
+                    if (data && (data.datasetVersion !== manifest.latest || data.datasetHash !== latestInfo.hash ||
+                            Object.keys(data.characters).length !== latestInfo.characters)) {
+                        console.warn('Patched stroke data does not match the latest version');
+                        data = null;
+                    }
+                    if (data) {
+                        console.log(`Stroke data patched v${cachedVersion} -> v${data.datasetVersion} (${(chainSize / 1024).toFixed(1)} KB)`);
+                    }
+                } else {
+                    data = null;
+                }
+                
+                if (!data) {
+                    const fullResponse = await fetch(`data/${manifest.fullFile}?v=${manifest.latest}`);
+                    if (!fullResponse.ok) return null;
+                    data = await fullResponse.json();
+                    data.datasetVersion = data.datasetVersion || manifest.latest;
+                    data.datasetHash = data.datasetHash || (latestInfo ? latestInfo.hash : null);
+                    console.log(`Stroke data v${data.datasetVersion} downloaded in full`);
+                }
+                
+                await cache.put(cacheKey, new Response(JSON.stringify(data), {
+                    headers: { 'Content-Type': 'application/json' }
+                }));
+                return data;
+            } catch (error) {
+                console.warn('Versioned stroke data unavailable, falling back to full download:', error);
+                return null;
+            }
+        }
+        
         async function loadStrokesDataFromFile() {
             // Load stroke data from all_strokes.json file
             try {
-                console.log('Fetching all_strokes.json...');
-                // Add cache-busting parameter to force reload of latest data
-                const response = await fetch(`data/all_strokes.json?v=${Date.now()}`);
-                console.log('Response status:', response.status, response.statusText);
-                
-                if (response.ok) {
-                    const loadedData = await response.json();
-                    console.log('Parsed JSON data. Keys:', Object.keys(loadedData));
-                    
-                    if (loadedData.characters && typeof loadedData.characters === 'object') {
-                        allCharactersData = loadedData.characters;
-                        const charCount = Object.keys(allCharactersData).length;
-                        console.log(`Successfully loaded ${charCount} characters from all_strokes.json`);
-                        console.log('First few characters:', Object.keys(allCharactersData).slice(0, 10));
-                        return true;
-                    } else {
-                        console.error('Invalid data format. Expected "characters" object.');
-                        console.error('Data structure:', Object.keys(loadedData));
+                const startTime = performance.now();
+                let loadedData = await loadVersionedStrokesData();
+                
+                if (!loadedData) {
+                    console.log('Fetching all_strokes.json...');
+                    // Add cache-busting parameter to force reload of latest data
+                    const response = await fetch(`data/all_strokes.json?v=${Date.now()}`);
+                    console.log('Response status:', response.status, response.statusText);
+                    if (!response.ok) {
+                        console.error(`HTTP error: ${response.status} ${response.statusText}`);
+                        return false;
                     }
+                    // Read and parse separately so download and parse time are reported apart
+                    const text = await response.text();
+                    recordTiming('strokesDownload', startTime);
+                    const parseStart = performance.now();
+                    loadedData = JSON.parse(text);
+                    recordTiming('strokesParse', parseStart);
+                }
+                
+                console.log('Parsed JSON data. Keys:', Object.keys(loadedData));
+
+                if (loadedData.characters && typeof loadedData.characters === 'object') {
+                    allCharactersData = loadedData.strokeTable
+                        ? createDedupedCharacterMap(loadedData)
+                        : loadedData.characters;
+                    strokeDataSchemaVersion = loadedData.schemaVersion || null;
+                    recordTiming('strokesLoad', startTime);
+                    const charCount = Object.keys(allCharactersData).length;
+                    console.log(`Successfully loaded ${charCount} characters from all_strokes.json`);
+                    console.log('First few characters:', Object.keys(allCharactersData).slice(0, 10));
+                    return true;
                 } else {
-                    console.error(`HTTP error: ${response.status} ${response.statusText}`);
+                    console.error('Invalid data format. Expected "characters" object.');
+                    console.error('Data structure:', Object.keys(loadedData));
                 }
                 return false;
             } catch (error) {
@@ -2236,6 +2489,8 @@
             currentCharacterIndex = charIndex;
             // Save current character index to localStorage
             saveCharacterIndex(charIndex);
+            characterStartPerfectCount = perfectStrokesCount;
+            characterStartNotGoodCount = notGoodStrokesCount;
             
             console.log(`Processing character ${charIndex + 1}/${charactersToLearn.length}: ${character}`);
             
@@ -2318,6 +2573,9 @@
             
             // Called when all strokes of current character are completed
             console.log(`Character ${character} completed! Moving to next character...`);
+            pushReviewResult(character,
+                perfectStrokesCount - characterStartPerfectCount,
+                notGoodStrokesCount - characterStartNotGoodCount);
             
             // Capture the completed character and add it to the top right corner
             if (hanziWriter.canvas && hanziWriter.ctx) {
@@ -2803,7 +3061,8 @@
             // Get stroke angle from stored stroke data
             if (hanziWriter.strokeData.initialized && hanziWriter.strokeData.strokes[strokeIndex]) {
                 const storedStroke = hanziWriter.strokeData.strokes[strokeIndex];
-                result.strokeAngle = storedStroke.angle;
+                // angle is left out of the game / minimal output profiles
+                result.strokeAngle = storedStroke.angle ?? (storedStroke.angleDegrees * Math.PI / 180);
                 console.log('Stroke angle from stored data:', storedStroke.angle);
                 console.log('Stroke angle (degrees):', storedStroke.angleDegrees);
             } else {
@@ -0,0 +1,192 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+Minimal asyncio HTTP/1.1 server shared by the local Python services
+(stroke_server.py, progress_server.py, ...). Stdlib only: keep-alive, request
+bodies via Content-Length, ETags with 304 replies, gzip, and CORS so the game
+page can call the services from another port.
+
+A handler takes a Request and returns (status, Response or None), either directly
+or as a coroutine.
+"""
+
+import asyncio
+import gzip
+import hashlib
+import inspect
+import json
+import urllib.parse
+
+GZIP_MIN_SIZE = 1024      # smaller bodies are sent uncompressed
+MAX_BODY_SIZE = 1024 * 1024
+
+STATUS_TEXT = {
+    200: 'OK',
+    204: 'No Content',
+    304: 'Not Modified',
+    400: 'Bad Request',
+    404: 'Not Found',
+    405: 'Method Not Allowed',
+    413: 'Payload Too Large',
+    500: 'Internal Server Error',
+}
+
+
+class Request:
+    """One parsed HTTP request"""
+
+    __slots__ = ('method', 'target', 'path', 'parts', 'query', 'headers', 'body')
+
+    def __init__(self, method, target, headers, body=b''):
+        self.method = method
+        self.target = target
+        parsed = urllib.parse.urlsplit(target)
+        self.path = urllib.parse.unquote(parsed.path)
+        self.parts = [p for p in self.path.split('/') if p]
+        self.query = urllib.parse.parse_qs(parsed.query)
+        self.headers = headers
+        self.body = body
+
+    def json(self):
+        """Decoded JSON body (raises ValueError on bad input)"""
+        return json.loads(self.body.decode('utf-8') or 'null')
+
+
+class Response:
+    """Encoded response body with its ETag and a lazily built gzip variant"""
+
+    __slots__ = ('body', 'etag', 'content_type', '_gzipped')
+
+    def __init__(self, body, content_type='application/json; charset=utf-8', etag=True):
+        self.body = body
+        self.etag = '"' + hashlib.sha1(body).hexdigest()[:20] + '"' if etag else None
+        self.content_type = content_type
+        self._gzipped = None
+
+    def gzipped(self):
+        if self._gzipped is None:
+            self._gzipped = gzip.compress(self.body, compresslevel=6)
+        return self._gzipped
+
+
+def json_response(value, etag=True):
+    return Response(json.dumps(value, ensure_ascii=False, separators=(',', ':')).encode('utf-8'),
+                    etag=etag)
+
+
+class BadRequest(Exception):
+    """Request that cannot be parsed; answered with status and the connection closed"""
+
+    def __init__(self, status, message):
+        super().__init__(message)
+        self.status = status
+
+
+async def _read_line(reader):
+    # readline() raises ValueError once a line outgrows the stream limit (64 KB)
+    try:
+        return await reader.readline()
+    except (ValueError, asyncio.LimitOverrunError):
+        raise BadRequest(400, 'line too long')
+
+
+async def _read_request(reader):
+    """(Request, keep_alive) or None when the connection is done, raises BadRequest"""
+    request_line = await _read_line(reader)
+    if not request_line:
+        return None
+    try:
+        method, target, version = request_line.decode('latin-1').split()
+    except ValueError:
+        raise BadRequest(400, 'malformed request line')
+
+    headers = {}
+    while True:
+        line = await _read_line(reader)
+        if line in (b'\r\n', b'\n', b''):
+            break
+        name, _, value = line.decode('latin-1').partition(':')
+        headers[name.strip().lower()] = value.strip()
+
+    try:
+        length = int(headers.get('content-length') or 0)
+    except ValueError:
+        raise BadRequest(400, 'invalid Content-Length')
+    if length < 0:
+        raise BadRequest(400, 'invalid Content-Length')
+    if length > MAX_BODY_SIZE:
+        raise BadRequest(413, 'body too large')
+    body = await reader.readexactly(length) if length else b''
+
+    keep_alive = headers.get('connection', '').lower() != 'close' and version == 'HTTP/1.1'
+    return Request(method, target, headers, body), keep_alive
+
+
+async def _write_response(writer, status, response, keep_alive, request=None):
+    out_headers = [('Connection', 'keep-alive' if keep_alive else 'close'),
+                   ('Access-Control-Allow-Origin', '*'),
+                   ('Access-Control-Allow-Methods', 'GET, POST, PUT, OPTIONS'),
+                   ('Access-Control-Allow-Headers', 'Content-Type')]
+    request_headers = request.headers if request else {}
+    body = b''
+    if response is not None:
+        if response.etag:
+            out_headers.append(('ETag', response.etag))
+        out_headers.append(('Content-Type', response.content_type))
+        out_headers.append(('Vary', 'Accept-Encoding'))
+        if status == 200 and response.etag and request_headers.get('if-none-match') == response.etag:
+            status = 304
+        elif 'gzip' in request_headers.get('accept-encoding', '') and len(response.body) >= GZIP_MIN_SIZE:
+            body = response.gzipped()
+            out_headers.append(('Content-Encoding', 'gzip'))
+        else:
+            body = response.body
+    out_headers.append(('Content-Length', str(len(body))))
+
+    head = f'HTTP/1.1 {status} {STATUS_TEXT.get(status, "")}\r\n'
+    head += ''.join(f'{name}: {value}\r\n' for name, value in out_headers) + '\r\n'
+    writer.write(head.encode('latin-1'))
+    if request is None or request.method != 'HEAD':
+        writer.write(body)
+    await writer.drain()
+
+
+async def handle_connection(handler, reader, writer):
+    """Serve requests (with keep-alive) on one connection"""
+    try:
+        while True:
+            try:
+                parsed = await _read_request(reader)
+            except BadRequest as e:
+                # The rest of the stream cannot be trusted, so answer and close
+                await _write_response(writer, e.status, json_response({'error': str(e)}, etag=False), False)
+                break
+            if parsed is None:
+                break
+            request, keep_alive = parsed
+
+            if request.method == 'OPTIONS':
+                status, response = 204, None
+            else:
+                try:
+                    result = handler(request)
+                    if inspect.isawaitable(result):
+                        result = await result
+                    status, response = result
+                except Exception as e:
+                    print(f"  [ERROR] {request.method} {request.target}: {e}")
+                    status, response = 500, None
+
+            await _write_response(writer, status, response, keep_alive, request)
+            if not keep_alive:
+                break
+    except (ConnectionResetError, BrokenPipeError, asyncio.IncompleteReadError):
+        pass
+    finally:
+        writer.close()
+
+
+async def start_server(handler, host, port):
+    """asyncio server dispatching every request to handler"""
+    return await asyncio.start_server(
+        lambda r, w: handle_connection(handler, r, w), host, port, backlog=4096)
@@ -0,0 +1,419 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+Memory-mapped character store for stroke data
+Converts all_strokes.json (or graphics.txt) into a single binary file that tools
+can open instantly and read one character at a time, without parsing the whole dataset
+
+File layout (little-endian):
+    header   : magic 'HZCS', version, source kind, record count, index offset
+    payloads : per character, four JSON sections back to back
+               (meta, processed strokes, outlines, medians)
+    index    : fixed-size entries sorted by codepoint
+
+Usage:
+    python character_store.py build [../data/all_strokes.json | ../data/graphics.txt | ../data/graphics.hza]
+    python character_store.py info [store_file]
+    python character_store.py show 中 [store_file]
+
+all_strokes.json builds go to data/all_strokes.store (level characters only);
+graphics.txt / .hza builds go to data/graphics.store (every character), which is
+what level_compiler.py needs.
+"""
+
+import json
+import mmap
+import os
+import struct
+import sys
+import io
+
+# Fix Windows console encoding
+if sys.stdout.encoding != 'utf-8':
+    try:
+        sys.stdout = io.TextIOWrapper(sys.stdout.buffer, encoding='utf-8', errors='replace')
+        sys.stderr = io.TextIOWrapper(sys.stderr.buffer, encoding='utf-8', errors='replace')
+    except:
+        pass
+
+DEFAULT_STORE_FILE = '../data/all_strokes.store'
+DEFAULT_GRAPHICS_STORE_FILE = '../data/graphics.store'
+
+STORE_MAGIC = b'HZCS'
+STORE_VERSION = 1
+
+# What a store was built from, kept in the header so readers can tell a store
+# holding all_strokes.json (the level characters) from one holding all of graphics.txt.
+# Stores written before this was recorded read as SOURCE_UNKNOWN.
+SOURCE_UNKNOWN = 0
+SOURCE_ALL_STROKES = 1
+SOURCE_GRAPHICS = 2
+SOURCE_NAMES = {SOURCE_UNKNOWN: 'unknown', SOURCE_ALL_STROKES: 'all_strokes.json', SOURCE_GRAPHICS: 'graphics.txt'}
+
+# magic, version, source kind, record count, index offset
+HEADER_FORMAT = '<4sHHIQ'
+HEADER_SIZE = struct.calcsize(HEADER_FORMAT)
+
+# codepoint, payload offset, meta/strokes/outlines/medians section lengths
+INDEX_FORMAT = '<IQIIII'
+INDEX_ENTRY_SIZE = struct.calcsize(INDEX_FORMAT)
+
+SECTION_META = 0
+SECTION_STROKES = 1
+SECTION_OUTLINES = 2
+SECTION_MEDIANS = 3
+
+
+def _encode(value):
+    """Compact JSON encoding used for every payload section"""
+    return json.dumps(value, ensure_ascii=False, separators=(',', ':')).encode('utf-8')
+
+
+class CharacterRecord:
+    """One character in the store; each section is decoded on first access"""
+
+    __slots__ = ('_store', 'codepoint', '_offset', '_lengths',
+                 '_meta', '_strokes', '_outlines', '_medians')
+
+    def __init__(self, store, codepoint, offset, lengths):
+        self._store = store
+        self.codepoint = codepoint
+        self._offset = offset
+        self._lengths = lengths
+        self._meta = None
+        self._strokes = None
+        self._outlines = None
+        self._medians = None
+
+    @property
+    def character(self):
+        return chr(self.codepoint)
+
+    def _section(self, section):
+        start = self._offset + sum(self._lengths[:section])
+        end = start + self._lengths[section]
+        return json.loads(self._store._buffer[start:end].decode('utf-8'))
+
+    @property
+    def meta(self):
+        """Scalar fields (unicode, totalStrokes, extra rawCharData keys)"""
+        if self._meta is None:
+            self._meta = self._section(SECTION_META)
+        return self._meta
+
+    @property
+    def total_strokes(self):
+        return self.meta.get('totalStrokes', 0)
+
+    @property
+    def strokes(self):
+        """Processed strokes (startPoint, endPoint, angle, ...)"""
+        if self._strokes is None:
+            self._strokes = self._section(SECTION_STROKES)
+        return self._strokes
+
+    @property
+    def outlines(self):
+        """SVG outline path per stroke (rawCharData.strokes)"""
+        if self._outlines is None:
+            self._outlines = self._section(SECTION_OUTLINES)
+        return self._outlines
+
+    @property
+    def medians(self):
+        """Median points per stroke (rawCharData.medians)"""
+        if self._medians is None:
+            self._medians = self._section(SECTION_MEDIANS)
+        return self._medians
+
+    def to_dict(self):
+        """Rebuild the all_strokes.json entry for this character"""
+        meta = dict(self.meta)
+        raw_extra = meta.pop('rawExtra', {})
+        raw_char_data = {'character': self.character}
+        raw_char_data.update(raw_extra)
+        raw_char_data['strokes'] = self.outlines
+        raw_char_data['medians'] = self.medians
+        return {
+            'character': self.character,
+            'unicode': self.codepoint,
+            'unicodeHex': f'U+{self.codepoint:04X}',
+            'totalStrokes': meta.get('totalStrokes', len(self.strokes)),
+            'strokes': self.strokes,
+            'rawCharData': raw_char_data
+        }
+
+    def __repr__(self):
+        return f'CharacterRecord({self.character!r}, U+{self.codepoint:04X})'
+
+
+class CharacterStore:
+    """Read-only, memory-mapped view over an all_strokes.store file"""
+
+    def __init__(self, filename=DEFAULT_STORE_FILE):
+        self.filename = filename
+        self._file = open(filename, 'rb')
+        self._buffer = mmap.mmap(self._file.fileno(), 0, access=mmap.ACCESS_READ)
+
+        magic, version, source, count, index_offset = struct.unpack_from(HEADER_FORMAT, self._buffer, 0)
+        if magic != STORE_MAGIC:
+            self.close()
+            raise ValueError(f"{filename} is not a character store file")
+        if version != STORE_VERSION:
+            self.close()
+            raise ValueError(f"{filename} has unsupported store version {version}")
+
+        self.source = source
+        self._count = count
+        self._index_offset = index_offset
+
+    def close(self):
+        if self._buffer is not None:
+            self._buffer.close()
+            self._buffer = None
+        if self._file is not None:
+            self._file.close()
+            self._file = None
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, exc_type, exc_value, traceback):
+        self.close()
+
+    def __len__(self):
+        return self._count
+
+    def _entry(self, position):
+        return struct.unpack_from(INDEX_FORMAT, self._buffer,
+                                  self._index_offset + position * INDEX_ENTRY_SIZE)
+
+    def _codepoint_at(self, position):
+        return struct.unpack_from('<I', self._buffer,
+                                  self._index_offset + position * INDEX_ENTRY_SIZE)[0]
+
+    def _bisect(self, codepoint):
+        """Position of the first index entry with codepoint >= the given one"""
+        lo, hi = 0, self._count
+        while lo < hi:
+            mid = (lo + hi) // 2
+            if self._codepoint_at(mid) < codepoint:
+                lo = mid + 1
+            else:
+                hi = mid
+        return lo
+
+    def _record_at(self, position):
+        codepoint, offset, *lengths = self._entry(position)
+        return CharacterRecord(self, codepoint, offset, tuple(lengths))
+
+    def get(self, character, default=None):
+        """Look up a character (or integer codepoint) without decoding anything"""
+        codepoint = character if isinstance(character, int) else ord(character)
+        position = self._bisect(codepoint)
+        if position < self._count and self._codepoint_at(position) == codepoint:
+            return self._record_at(position)
+        return default
+
+    def __getitem__(self, character):
+        record = self.get(character)
+        if record is None:
+            raise KeyError(character)
+        return record
+
+    def __contains__(self, character):
+        return self.get(character) is not None
+
+    def codepoints(self):
+        """All codepoints in the store, in ascending order"""
+        index = self._buffer[self._index_offset:self._index_offset + self._count * INDEX_ENTRY_SIZE]
+        return [entry[0] for entry in struct.iter_unpack(INDEX_FORMAT, index)]
+
+    def characters(self):
+        """Set of all characters in the store (reads the index only)"""
+        return {chr(cp) for cp in self.codepoints()}
+
+    def range(self, start, stop):
+        """Yield records with start <= codepoint < stop (characters or ints)"""
+        start = start if isinstance(start, int) else ord(start)
+        stop = stop if isinstance(stop, int) else ord(stop)
+        position = self._bisect(start)
+        while position < self._count:
+            record = self._record_at(position)
+            if record.codepoint >= stop:
+                break
+            yield record
+            position += 1
+
+    def __iter__(self):
+        for position in range(self._count):
+            yield self._record_at(position)
+
+
+def _record_sections(char_entry):
+    """Split an all_strokes.json character entry into the four payload sections"""
+    raw = char_entry.get('rawCharData') or {}
+    meta = {'totalStrokes': char_entry.get('totalStrokes', len(char_entry.get('strokes', [])))}
+    raw_extra = {k: v for k, v in raw.items() if k not in ('character', 'strokes', 'medians')}
+    if raw_extra:
+        meta['rawExtra'] = raw_extra
+    return (
+        _encode(meta),
+        _encode(char_entry.get('strokes', [])),
+        _encode(raw.get('strokes', [])),
+        _encode(raw.get('medians', []))
+    )
+
+
+def write_store(char_entries, output_file=DEFAULT_STORE_FILE, source=SOURCE_UNKNOWN):
+    """Write (character, all_strokes entry) pairs to a store file, returns record count"""
+    index = []
+    tmp_file = output_file + '.tmp'
+    with open(tmp_file, 'wb') as f:
+        f.write(b'\0' * HEADER_SIZE)
+        offset = HEADER_SIZE
+        for character, entry in char_entries:
+            if len(character) != 1:
+                continue
+            sections = _record_sections(entry)
+            index.append((ord(character), offset) + tuple(len(s) for s in sections))
+            for section in sections:
+                f.write(section)
+                offset += len(section)
+
+        index.sort()
+        for entry in index:
+            f.write(struct.pack(INDEX_FORMAT, *entry))
+
+        f.seek(0)
+        f.write(struct.pack(HEADER_FORMAT, STORE_MAGIC, STORE_VERSION, source, len(index), offset))
+
+    os.replace(tmp_file, output_file)
+    return len(index)
+
+
+def iter_all_strokes_json(filename='../data/all_strokes.json'):
+    """Yield (character, entry) pairs from an all_strokes.json file
+
+    A --dedupe file keeps shared strokes in strokeTable; entries are expanded back
+    to the full layout here, as dataset_versions.py does.
+    """
+    from dedupe_strokes import expand_character
+
+    with open(filename, 'r', encoding='utf-8') as f:
+        data = json.load(f)
+    stroke_table = data.get('strokeTable')
+    for character, entry in data.get('characters', {}).items():
+        yield character, expand_character(entry, stroke_table) if stroke_table else entry
+
+
+def iter_graphics_txt(filename='../data/graphics.txt'):
+    """Yield (character, entry) pairs from graphics.txt (or its archive), processing strokes on the way
+
+    Characters whose strokes cannot all be processed are left out, like the generators do.
+    """
+    from get_one_character_strokes import build_character_entry
+    from graphics_archive import iter_graphics_lines
+
+    for line in iter_graphics_lines(filename):
+        if not line.strip():
+            continue
+        try:
+            char_data = json.loads(line)
+        except json.JSONDecodeError:
+            continue
+        character = char_data.get('character')
+        if not character:
+            continue
+        try:
+            yield character, build_character_entry(character, char_data)
+        except ValueError:
+            continue
+
+
+def default_store_file(source_file):
+    """Store path for a source: graphics.txt / .hza and all_strokes.json never share a file"""
+    if source_file.endswith(('.txt', '.hza')):
+        return DEFAULT_GRAPHICS_STORE_FILE
+    return DEFAULT_STORE_FILE
+
+
+def build_store(source_file, output_file=None):
+    """Build a store from all_strokes.json or graphics.txt / .hza (chosen by extension)"""
+    output_file = output_file or default_store_file(source_file)
+    if source_file.endswith(('.txt', '.hza')):
+        return write_store(iter_graphics_txt(source_file), output_file, SOURCE_GRAPHICS)
+    return write_store(iter_all_strokes_json(source_file), output_file, SOURCE_ALL_STROKES)
+
+
+def store_source(store_file):
+    """Source kind recorded in a store file, None if it is missing or not a store"""
+    try:
+        with CharacterStore(store_file) as store:
+            return store.source
+    except (OSError, ValueError, struct.error):
+        return None
+
+
+def is_current_store(store_file=DEFAULT_STORE_FILE, all_strokes_file='../data/all_strokes.json'):
+    """True when store_file was built from all_strokes.json and is not older than it"""
+    if store_source(store_file) != SOURCE_ALL_STROKES:
+        return False
+    return os.path.getmtime(store_file) >= os.path.getmtime(all_strokes_file)
+
+
+def main():
+    """Main function"""
+    if len(sys.argv) < 2 or sys.argv[1] not in ('build', 'info', 'show'):
+        print("Usage: python character_store.py build [source_file]")
+        print("       python character_store.py info [store_file]")
+        print("       python character_store.py show <character> [store_file]")
+        return
+
+    command = sys.argv[1]
+
+    if command == 'build':
+        source_file = sys.argv[2] if len(sys.argv) > 2 else '../data/all_strokes.json'
+        if not os.path.exists(source_file):
+            print(f"Error: File '{source_file}' not found")
+            return
+        output_file = default_store_file(source_file)
+        print(f"Building character store from: {source_file}")
+        count = build_store(source_file, output_file)
+        print(f"  Records: {count}")
+        print(f"  Source size: {os.path.getsize(source_file) / (1024*1024):.2f} MB")
+        print(f"  Store size: {os.path.getsize(output_file) / (1024*1024):.2f} MB")
+        print(f"  Output file: {output_file}")
+        return
+
+    store_index = 2 if command == 'info' else 3
+    store_file = sys.argv[store_index] if len(sys.argv) > store_index else DEFAULT_STORE_FILE
+    if not os.path.exists(store_file):
+        print(f"Error: File '{store_file}' not found, run 'build' first")
+        return
+
+    with CharacterStore(store_file) as store:
+        if command == 'info':
+            codepoints = store.codepoints()
+            print(f"Store file: {store_file}")
+            print(f"  Source: {SOURCE_NAMES.get(store.source, 'unknown')}")
+            print(f"  Records: {len(store)}")
+            if codepoints:
+                print(f"  Codepoint range: U+{codepoints[0]:04X} - U+{codepoints[-1]:04X}")
+            return
+
+        if len(sys.argv) < 3:
+            print("Usage: python character_store.py show <character>")
+            return
+        record = store.get(sys.argv[2])
+        if record is None:
+            print(f"Character '{sys.argv[2]}' not found in store")
+            return
+        print(f"Character: {record.character} (U+{record.codepoint:04X})")
+        print(f"  Total strokes: {record.total_strokes}")
+        for stroke in record.strokes:
+            print(f"  [{stroke.get('index')}] {stroke.get('angleDegrees', 0):.1f} deg, length {stroke.get('length', 0):.1f}")
+
+
+if __name__ == "__main__":
+    main()
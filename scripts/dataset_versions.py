@@ -0,0 +1,201 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+Versioned stroke datasets with per-version delta patches
+Each time all_strokes.json changes (new makemeahanzi data, level_config.json edits),
+'publish' records a new dataset version and writes a delta against the previous one:
+characters added, removed or changed, detected by a hash of each record. The
+manifest lists the delta chain so returning players can patch their cached copy
+instead of downloading the full file (see loadVersionedStrokesData in js/game.js).
+
+Files (in ../data/versions/):
+    manifest.json                 latest version, full file size, delta chain
+    v<N>.records.json             record hash per character for version N
+    delta_v<N-1>_v<N>.json        patch from version N-1 to N
+
+Usage:
+    python dataset_versions.py publish [all_strokes_file]
+    python dataset_versions.py status
+"""
+
+import hashlib
+import json
+import os
+import sys
+import io
+from datetime import datetime
+
+from dedupe_strokes import expand
+
+# Fix Windows console encoding
+if sys.stdout.encoding != 'utf-8':
+    try:
+        sys.stdout = io.TextIOWrapper(sys.stdout.buffer, encoding='utf-8', errors='replace')
+        sys.stderr = io.TextIOWrapper(sys.stderr.buffer, encoding='utf-8', errors='replace')
+    except:
+        pass
+
+VERSIONS_DIR = '../data/versions'
+MANIFEST_FILE = 'manifest.json'
+
+# Clients holding an older version than this many deltas back download the full file
+DEFAULT_MAX_CHAIN = 10
+
+
+def record_hash(entry):
+    """Stable hash of one character record"""
+    encoded = json.dumps(entry, ensure_ascii=False, sort_keys=True, separators=(',', ':'))
+    return hashlib.sha1(encoded.encode('utf-8')).hexdigest()[:16]
+
+
+def dataset_hash(record_hashes):
+    """Hash of a whole dataset, independent of build timestamps and key order"""
+    digest = hashlib.sha1()
+    for char in sorted(record_hashes, key=ord):
+        digest.update(f'{ord(char):X}:{record_hashes[char]};'.encode('ascii'))
+    return digest.hexdigest()[:16]
+
+
+def compute_delta(old_hashes, characters):
+    """(added, changed, removed) between a previous version's hashes and new records"""
+    added = {}
+    changed = {}
+    for char, entry in characters.items():
+        if char not in old_hashes:
+            added[char] = entry
+        elif old_hashes[char] != record_hash(entry):
+            changed[char] = entry
+    removed = sorted((char for char in old_hashes if char not in characters), key=ord)
+    return added, changed, removed
+
+
+def load_manifest(versions_dir=VERSIONS_DIR):
+    path = os.path.join(versions_dir, MANIFEST_FILE)
+    if not os.path.exists(path):
+        return None
+    with open(path, 'r', encoding='utf-8') as f:
+        return json.load(f)
+
+
+def _write_json(path, data):
+    tmp_path = path + '.tmp'
+    with open(tmp_path, 'w', encoding='utf-8') as f:
+        json.dump(data, f, ensure_ascii=False, separators=(',', ':'))
+    os.replace(tmp_path, path)
+
+
+def publish(all_strokes_file='../data/all_strokes.json', versions_dir=VERSIONS_DIR,
+            max_chain=DEFAULT_MAX_CHAIN):
+    """Record the current dataset as a new version; returns the manifest"""
+    with open(all_strokes_file, 'r', encoding='utf-8') as f:
+        data = json.load(f)
+
+    # Deltas always carry plain records, even if the full file is deduplicated
+    characters = expand(data)['characters'] if 'strokeTable' in data else data.get('characters', {})
+    hashes = {char: record_hash(entry) for char, entry in characters.items()}
+    new_hash = dataset_hash(hashes)
+
+    os.makedirs(versions_dir, exist_ok=True)
+    manifest = load_manifest(versions_dir) or {'latest': 0, 'versions': []}
+    manifest['maxChain'] = max_chain
+    # Cached copies with another structure are downloaded again instead of patched
+    manifest['schemaVersion'] = data.get('schemaVersion')
+
+    if manifest['versions'] and manifest['versions'][-1]['hash'] == new_hash:
+        print(f"  Dataset unchanged (version {manifest['latest']}, hash {new_hash})")
+        if data.get('datasetVersion') != manifest['latest'] or data.get('datasetHash') != new_hash:
+            _stamp_version(all_strokes_file, data, manifest['latest'], new_hash)
+        manifest['fullSize'] = os.path.getsize(all_strokes_file)
+        _write_json(os.path.join(versions_dir, MANIFEST_FILE), manifest)
+        return manifest
+
+    version = manifest['latest'] + 1
+    version_info = {
+        'version': version,
+        'hash': new_hash,
+        'created': datetime.now().isoformat(),
+        'characters': len(characters)
+    }
+
+    if manifest['versions']:
+        previous = manifest['versions'][-1]
+        with open(os.path.join(versions_dir, f"v{previous['version']}.records.json"), 'r', encoding='utf-8') as f:
+            old_hashes = json.load(f)
+        added, changed, removed = compute_delta(old_hashes, characters)
+        delta_name = f"delta_v{previous['version']}_v{version}.json"
+        _write_json(os.path.join(versions_dir, delta_name), {
+            'from': previous['version'],
+            'to': version,
+            'fromHash': previous['hash'],
+            'toHash': new_hash,
+            'added': added,
+            'changed': changed,
+            'removed': removed
+        })
+        version_info.update({
+            'delta': delta_name,
+            'deltaSize': os.path.getsize(os.path.join(versions_dir, delta_name)),
+            'added': len(added),
+            'changed': len(changed),
+            'removed': len(removed)
+        })
+
+    _write_json(os.path.join(versions_dir, f'v{version}.records.json'), hashes)
+
+    _stamp_version(all_strokes_file, data, version, new_hash)
+    manifest['latest'] = version
+    manifest['fullFile'] = os.path.basename(all_strokes_file)
+    manifest['fullSize'] = os.path.getsize(all_strokes_file)
+    manifest['versions'].append(version_info)
+    _write_json(os.path.join(versions_dir, MANIFEST_FILE), manifest)
+    return manifest
+
+
+def _stamp_version(all_strokes_file, data, version, version_hash):
+    """Write datasetVersion and datasetHash into the full file so clients know what they downloaded"""
+    data['datasetVersion'] = version
+    data['datasetHash'] = version_hash
+    with open(all_strokes_file, 'w', encoding='utf-8') as f:
+        if 'strokeTable' in data:
+            json.dump(data, f, ensure_ascii=False, separators=(',', ':'))
+        else:
+            json.dump(data, f, ensure_ascii=False, indent=2)
+
+
+def print_status(manifest):
+    print(f"  Latest version: {manifest['latest']}")
+    print(f"  Full file: {manifest.get('fullFile')} ({manifest.get('fullSize', 0) / 1024:.1f} KB)")
+    print(f"  Max delta chain: {manifest.get('maxChain', DEFAULT_MAX_CHAIN)}")
+    for info in manifest['versions'][-manifest.get('maxChain', DEFAULT_MAX_CHAIN):]:
+        line = f"  v{info['version']} {info['hash']} {info['characters']} chars"
+        if 'delta' in info:
+            line += (f" | +{info['added']} ~{info['changed']} -{info['removed']}"
+                     f" | delta {info['deltaSize'] / 1024:.1f} KB")
+        print(line)
+
+
+def main():
+    """Main function"""
+    if len(sys.argv) < 2 or sys.argv[1] not in ('publish', 'status'):
+        print("Usage: python dataset_versions.py publish [all_strokes_file]")
+        print("       python dataset_versions.py status")
+        return
+
+    if sys.argv[1] == 'publish':
+        all_strokes_file = sys.argv[2] if len(sys.argv) > 2 else '../data/all_strokes.json'
+        if not os.path.exists(all_strokes_file):
+            print(f"Error: File '{all_strokes_file}' not found")
+            return
+        print(f"Publishing dataset version from: {all_strokes_file}")
+        manifest = publish(all_strokes_file)
+    else:
+        manifest = load_manifest()
+        if manifest is None:
+            print(f"No versions published yet in {VERSIONS_DIR}")
+            return
+
+    print_status(manifest)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,243 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+Deduplicate stroke geometry across characters in all_strokes.json
+Many characters share components (氵, 口, 木 ...) whose strokes repeat the same
+outline and medians. Each stroke is translated so its first median point sits at
+the origin, hashed, and stored once in a shared 'strokeTable'. Characters then keep
+only 'strokeRefs' entries of [table id, dx, dy].
+
+Characters whose data cannot be reproduced exactly from the table (missing
+medians, unusual path commands, ...) are kept in full, so expanding the output
+always gives back the original entries.
+
+The client expands referenced characters on first access (see
+createDedupedCharacterMap in js/game.js).
+
+Usage:
+    python dedupe_strokes.py [input_file] [output_file]
+    (defaults: ../data/all_strokes.json -> ../data/all_strokes.dedup.json)
+"""
+
+import hashlib
+import json
+import os
+import re
+import sys
+import io
+
+# Fix Windows console encoding
+if sys.stdout.encoding != 'utf-8':
+    try:
+        sys.stdout = io.TextIOWrapper(sys.stdout.buffer, encoding='utf-8', errors='replace')
+        sys.stderr = io.TextIOWrapper(sys.stderr.buffer, encoding='utf-8', errors='replace')
+    except:
+        pass
+
+# Same reference height used by calculate_stroke_angle
+CONVERSION_HEIGHT = 900
+
+# Absolute commands whose arguments are all x,y pairs
+PAIR_COMMANDS = set('MLQCTSZ')
+
+_PATH_TOKEN = re.compile(r'[A-Za-z]|-?\d+(?:\.\d+)?')
+
+
+def _number(value):
+    """Keep integers as ints so re-serialized paths match the source text"""
+    return int(value) if value == int(value) else value
+
+
+def translate_path(path, dx, dy):
+    """Shift every coordinate of an absolute SVG path, None if it cannot be done safely"""
+    tokens = _PATH_TOKEN.findall(path)
+    out = []
+    is_x = True
+    for token in tokens:
+        if token.isalpha():
+            if token not in PAIR_COMMANDS:
+                return None
+            out.append(token)
+            is_x = True
+            continue
+        value = float(token)
+        out.append(str(_number(value + (dx if is_x else dy))))
+        is_x = not is_x
+    return ' '.join(out)
+
+
+def _canonical_stroke(outline, median):
+    """(canonical outline, canonical median, dx, dy) or None"""
+    if not median or not isinstance(outline, str):
+        return None
+    dx, dy = median[0][0], median[0][1]
+    canonical_outline = translate_path(outline, -dx, -dy)
+    if canonical_outline is None or translate_path(canonical_outline, dx, dy) != outline:
+        return None
+    canonical_median = [[_number(p[0] - dx), _number(p[1] - dy)] for p in median]
+    return canonical_outline, canonical_median, dx, dy
+
+
+def translate_processed_stroke(stroke, dx, dy):
+    """Move a processed stroke; medians are bottom-left origin, stroke points are screen space"""
+    moved = dict(stroke)
+    for key in ('startPoint', 'endPoint'):
+        point = stroke[key]
+        moved[key] = {'x': point['x'] + dx, 'y': point['y'] - dy}
+    return moved
+
+
+def expand_character(entry, stroke_table):
+    """Rebuild a full all_strokes.json entry from a referenced one"""
+    if 'strokeRefs' not in entry:
+        return entry
+    outlines = []
+    medians = []
+    strokes = []
+    for i, (stroke_id, dx, dy) in enumerate(entry['strokeRefs']):
+        shared = stroke_table[stroke_id]
+        outlines.append(translate_path(shared['outline'], dx, dy))
+        medians.append([[_number(p[0] + dx), _number(p[1] + dy)] for p in shared['median']])
+        stroke = translate_processed_stroke(shared['stroke'], dx, dy)
+        strokes.append(dict({'index': i}, **stroke))
+    return {
+        'character': entry['character'],
+        'unicode': entry['unicode'],
+        'unicodeHex': entry['unicodeHex'],
+        'totalStrokes': entry['totalStrokes'],
+        'strokes': strokes,
+        'rawCharData': {
+            'character': entry['character'],
+            'strokes': outlines,
+            'medians': medians
+        }
+    }
+
+
+def _reference_character(entry, stroke_table, table_ids):
+    """Referenced form of one entry, or None if it must be kept in full"""
+    raw = entry.get('rawCharData') or {}
+    outlines = raw.get('strokes')
+    medians = raw.get('medians')
+    strokes = entry.get('strokes')
+    if set(raw) != {'character', 'strokes', 'medians'}:
+        return None
+    if not outlines or not medians or len(outlines) != len(medians) or len(strokes or []) != len(medians):
+        return None
+
+    refs = []
+    new_ids = []
+    for i, (outline, median, stroke) in enumerate(zip(outlines, medians, strokes)):
+        canonical = _canonical_stroke(outline, median)
+        if canonical is None or stroke.get('index') != i:
+            break
+        canonical_outline, canonical_median, dx, dy = canonical
+        shared_stroke = {k: v for k, v in stroke.items() if k != 'index'}
+        shared_stroke = translate_processed_stroke(shared_stroke, -dx, -dy)
+
+        record = {'outline': canonical_outline, 'median': canonical_median, 'stroke': shared_stroke}
+        key = hashlib.sha1(json.dumps(record, sort_keys=True).encode('utf-8')).hexdigest()
+        if key not in table_ids:
+            table_ids[key] = len(stroke_table)
+            stroke_table.append(record)
+            new_ids.append(key)
+        refs.append([table_ids[key], dx, dy])
+    else:
+        referenced = {
+            'character': entry['character'],
+            'unicode': entry['unicode'],
+            'unicodeHex': entry['unicodeHex'],
+            'totalStrokes': entry['totalStrokes'],
+            'strokeRefs': refs
+        }
+        if expand_character(referenced, stroke_table) == entry:
+            return referenced
+
+    # Not reproducible: roll back the table rows this character added
+    for key in reversed(new_ids):
+        stroke_table.pop(table_ids.pop(key))
+    return None
+
+
+def deduplicate(all_strokes_data):
+    """Return (deduplicated data, stats) for a loaded all_strokes.json document"""
+    stroke_table = []
+    table_ids = {}
+    characters = {}
+    total_strokes = 0
+    full_characters = 0
+
+    for char, entry in all_strokes_data.get('characters', {}).items():
+        total_strokes += len(entry.get('strokes', []))
+        referenced = _reference_character(entry, stroke_table, table_ids)
+        if referenced is None:
+            characters[char] = entry
+            full_characters += 1
+        else:
+            characters[char] = referenced
+
+    output = {k: v for k, v in all_strokes_data.items() if k != 'characters'}
+    output['format'] = 'dedup'
+    output['strokeTable'] = stroke_table
+    output['characters'] = characters
+
+    before = len(json.dumps(all_strokes_data, ensure_ascii=False, separators=(',', ':')).encode('utf-8'))
+    after = len(json.dumps(output, ensure_ascii=False, separators=(',', ':')).encode('utf-8'))
+    stats = {
+        'characters': len(characters),
+        'fullCharacters': full_characters,
+        'totalStrokes': total_strokes,
+        'uniqueStrokes': len(stroke_table),
+        'bytesBefore': before,
+        'bytesAfter': after,
+        'compressionRatio': before / after if after else 1.0
+    }
+    output['dedupStats'] = stats
+    return output, stats
+
+
+def expand(dedup_data):
+    """Inverse of deduplicate(): back to the plain all_strokes.json layout"""
+    stroke_table = dedup_data.get('strokeTable', [])
+    output = {k: v for k, v in dedup_data.items()
+              if k not in ('format', 'strokeTable', 'dedupStats', 'characters')}
+    output['characters'] = {char: expand_character(entry, stroke_table)
+                            for char, entry in dedup_data.get('characters', {}).items()}
+    return output
+
+
+def print_stats(stats):
+    print(f"  Characters: {stats['characters']} ({stats['fullCharacters']} kept in full)")
+    print(f"  Strokes: {stats['totalStrokes']} -> {stats['uniqueStrokes']} unique")
+    print(f"  Size (compact JSON): {stats['bytesBefore'] / 1024:.1f} KB -> {stats['bytesAfter'] / 1024:.1f} KB")
+    print(f"  Compression ratio: {stats['compressionRatio']:.2f}x")
+
+
+def main():
+    """Main function"""
+    input_file = sys.argv[1] if len(sys.argv) > 1 else '../data/all_strokes.json'
+    output_file = sys.argv[2] if len(sys.argv) > 2 else '../data/all_strokes.dedup.json'
+
+    if not os.path.exists(input_file):
+        print(f"Error: File '{input_file}' not found")
+        return
+
+    print(f"Deduplicating stroke geometry in: {input_file}")
+    with open(input_file, 'r', encoding='utf-8') as f:
+        data = json.load(f)
+
+    output, stats = deduplicate(data)
+    if expand(output)['characters'] != data.get('characters', {}):
+        print("Error: deduplicated data does not expand back to the input, nothing written")
+        return
+
+    with open(output_file, 'w', encoding='utf-8') as f:
+        json.dump(output, f, ensure_ascii=False, separators=(',', ':'))
+
+    print_stats(stats)
+    print(f"  Output file: {output_file}")
+    print(f"  Output size: {os.path.getsize(output_file) / (1024*1024):.2f} MB")
+
+
+if __name__ == "__main__":
+    main()
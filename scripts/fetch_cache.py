@@ -0,0 +1,159 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+Size-capped on-disk cache for per-character source fetches
+Entries are keyed by (source, codepoint), evicted least-recently-used once the
+cache grows past its size cap, revalidated with ETags when stale, and can record
+that a character is known to be absent from a source (negative results)
+"""
+
+import json
+import os
+import time
+
+DEFAULT_MAX_BYTES = 50 * 1024 * 1024     # 50 MB of cached payloads
+DEFAULT_MAX_AGE = 7 * 24 * 3600          # serve without revalidating for a week
+DEFAULT_NEGATIVE_TTL = 24 * 3600         # retry absent characters after a day
+
+INDEX_FILE = 'index.json'
+
+
+class FetchCache:
+    """LRU cache of fetched character data stored under cache_dir"""
+
+    def __init__(self, cache_dir, max_bytes=DEFAULT_MAX_BYTES,
+                 max_age=DEFAULT_MAX_AGE, negative_ttl=DEFAULT_NEGATIVE_TTL):
+        self.cache_dir = cache_dir
+        self.max_bytes = max_bytes
+        self.max_age = max_age
+        self.negative_ttl = negative_ttl
+        self.entries = {}
+        self._load_index()
+
+    @staticmethod
+    def _key(source, codepoint):
+        return f'{source}:{codepoint:04X}'
+
+    def _index_path(self):
+        return os.path.join(self.cache_dir, INDEX_FILE)
+
+    def _payload_path(self, entry):
+        return os.path.join(self.cache_dir, entry['file'])
+
+    def _load_index(self):
+        try:
+            with open(self._index_path(), 'r', encoding='utf-8') as f:
+                self.entries = json.load(f)
+        except (FileNotFoundError, json.JSONDecodeError):
+            self.entries = {}
+
+    def save(self):
+        """Persist the index (written atomically)"""
+        os.makedirs(self.cache_dir, exist_ok=True)
+        tmp_path = self._index_path() + '.tmp'
+        with open(tmp_path, 'w', encoding='utf-8') as f:
+            json.dump(self.entries, f, ensure_ascii=False)
+        os.replace(tmp_path, self._index_path())
+
+    def total_bytes(self):
+        return sum(entry.get('size', 0) for entry in self.entries.values())
+
+    def lookup(self, source, codepoint):
+        """Return the cache entry for (source, codepoint) or None"""
+        entry = self.entries.get(self._key(source, codepoint))
+        if entry is None:
+            return None
+        if not entry['missing'] and not os.path.exists(self._payload_path(entry)):
+            # Payload removed behind our back, forget the entry
+            del self.entries[self._key(source, codepoint)]
+            return None
+        return entry
+
+    def is_fresh(self, entry):
+        """True if the entry can be served without contacting the source"""
+        # A payload the source no longer has is re-checked as often as a plain miss
+        ttl = self.negative_ttl if entry['missing'] or entry.get('goneFromSource') else self.max_age
+        return time.time() - entry['fetchedAt'] < ttl
+
+    def load(self, entry):
+        """Return cached data for an entry (None for negative entries)"""
+        entry['lastAccess'] = time.time()
+        self.save()
+        if entry['missing']:
+            return None
+        with open(self._payload_path(entry), 'r', encoding='utf-8') as f:
+            return json.load(f)
+
+    def revalidated(self, entry):
+        """Mark an entry as confirmed current by the source (HTTP 304)"""
+        entry['fetchedAt'] = time.time()
+        entry.pop('goneFromSource', None)
+        return self.load(entry)
+
+    def store(self, source, codepoint, data, etag=None, url=None):
+        """Cache a successful fetch and evict old entries if over the size cap"""
+        filename = os.path.join(source, f'{codepoint:04X}.json')
+        path = os.path.join(self.cache_dir, filename)
+        os.makedirs(os.path.dirname(path), exist_ok=True)
+        with open(path, 'w', encoding='utf-8') as f:
+            json.dump(data, f, ensure_ascii=False)
+
+        now = time.time()
+        self.entries[self._key(source, codepoint)] = {
+            'file': filename,
+            'size': os.path.getsize(path),
+            'missing': False,
+            'etag': etag,
+            'url': url,
+            'fetchedAt': now,
+            'lastAccess': now
+        }
+        self._evict()
+        self.save()
+
+    def store_missing(self, source, codepoint, etag=None, url=None):
+        """Remember that a character is absent from a source
+
+        A cached payload is never replaced: it stays valid data even if the source
+        stops serving it, so callers keep serving it as a stale result. The check
+        is recorded on it instead, so it is not fetched again until the negative TTL.
+        """
+        key = self._key(source, codepoint)
+        old = self.entries.get(key)
+        now = time.time()
+        if old and not old['missing']:
+            old['fetchedAt'] = now
+            old['goneFromSource'] = True
+            self.save()
+            return
+        self.entries[key] = {
+            'file': None,
+            'size': 0,
+            'missing': True,
+            'etag': etag,
+            'url': url,
+            'fetchedAt': now,
+            'lastAccess': now
+        }
+        self.save()
+
+    def _remove(self, key):
+        entry = self.entries.pop(key)
+        if entry['file']:
+            try:
+                os.remove(self._payload_path(entry))
+            except FileNotFoundError:
+                pass
+
+    def _evict(self):
+        """Drop least-recently-used payloads until the cache fits max_bytes"""
+        total = self.total_bytes()
+        if total <= self.max_bytes:
+            return
+        by_age = sorted((entry['lastAccess'], key) for key, entry in self.entries.items()
+                        if not entry['missing'])
+        for _, key in by_age:
+            if total <= self.max_bytes:
+                break
+            total -= self.entries[key]['size']
+            self._remove(key)
@@ -2,6 +2,8 @@
 # -*- coding: utf-8 -*-
 """
 Script to get stroke data for all characters in ToWriteText.txt
+--output-profile=game|minimal drops stroke fields the game does not read (default: full)
+--size-report prints how large the output would be with each profile
 """
 
 import json
@@ -14,8 +16,17 @@ from datetime import datetime
 from get_one_character_strokes import (
     parse_svg_path,
     calculate_stroke_angle,
-    process_stroke_data
+    process_stroke_data,
+    build_character_entry,
+    project_character_entry,
+    output_profile_from_argv,
+    profile_size_report,
+    print_profile_sizes,
+    SCHEMA_VERSION
 )
+from instrumentation import stage, enable_from_argv, print_report
+from dedupe_strokes import deduplicate, print_stats
+from graphics_archive import GraphicsArchive, find_graphics_file, is_archive
 
 # Fix Windows console encoding
 if sys.stdout.encoding != 'utf-8':
@@ -51,10 +62,11 @@ def download_graphics_txt(local_file='../data/graphics.txt'):
     
     url = 'https://raw.githubusercontent.com/skishore/makemeahanzi/master/graphics.txt'
     
-    # Check if file already exists locally
-    if os.path.exists(local_file):
-        print(f"Local graphics.txt found: {local_file}")
-        print(f"  File size: {os.path.getsize(local_file) / (1024*1024):.2f} MB")
+    # Check if file (or its compressed archive) already exists locally
+    existing = find_graphics_file(local_file)
+    if existing:
+        print(f"Local graphics data found: {existing}")
+        print(f"  File size: {os.path.getsize(existing) / (1024*1024):.2f} MB")
         return True
     
     try:
@@ -90,10 +102,20 @@ def fetch_all_characters_from_graphics_txt(characters_set, local_file='../data/g
     """Fetch character data for multiple characters from local graphics.txt file"""
     character_data_map = {}
     
-    if not os.path.exists(local_file):
+    source_file = find_graphics_file(local_file)
+    if source_file is None:
         print(f"Error: Local file '{local_file}' not found")
         return character_data_map
     
+    if is_archive(source_file):
+        # Seek straight to each character's block instead of scanning everything
+        print(f"Reading from archive: {source_file}")
+        with GraphicsArchive(source_file) as archive:
+            character_data_map = archive.get_many(characters_set)
+            print(f"  Total found: {len(character_data_map)}/{len(characters_set)} "
+                  f"({archive.blocks_read} of {archive.block_count} blocks decompressed)")
+        return character_data_map
+    
     try:
         print(f"Reading from local file: {local_file}")
         print("  Parsing graphics.txt for all characters...")
@@ -130,12 +152,22 @@ def fetch_all_characters_from_graphics_txt(characters_set, local_file='../data/g
 
 def main():
     """Main function"""
+    enable_from_argv()
     input_file = '../ToWriteText.txt'
     
     if not os.path.exists(input_file):
         print(f"Error: File '{input_file}' not found")
         return
     
+    try:
+        output_profile = output_profile_from_argv()
+    except ValueError as e:
+        print(f"Error: {e}")
+        return
+    if output_profile != 'full' and '--dedupe' in sys.argv:
+        print("Error: --dedupe shares full stroke entries, use it with --output-profile=full")
+        return
+    
     print(f"Reading characters from: {input_file}")
     characters = read_characters_from_file(input_file)
     
@@ -150,14 +182,18 @@ def main():
     # Download graphics.txt locally if needed, then fetch character data
     print()
     print("Step 1: Download graphics.txt (if needed)...")
-    if not download_graphics_txt():
+    with stage('fetch', source='graphics.txt'):
+        downloaded = download_graphics_txt()
+    if not downloaded:
         print("Failed to download graphics.txt. Exiting.")
         return
     
     print()
     print("Step 2: Fetching character data from local file...")
     characters_set = set(characters)
-    character_data_map = fetch_all_characters_from_graphics_txt(characters_set, local_file='../data/graphics.txt')
+    with stage('parse', source='graphics.txt') as s:
+        character_data_map = fetch_all_characters_from_graphics_txt(characters_set, local_file='../data/graphics.txt')
+        s.add_items(len(character_data_map))
     
     # Process all characters
     all_strokes_data = {}
@@ -165,41 +201,34 @@ def main():
     
     print()
     print("Processing stroke data...")
-    for i, character in enumerate(characters, 1):
-        try:
-            unicode_val = ord(character)
-            print(f"[{i}/{len(characters)}] Processing: {character} (U+{unicode_val:04X})")
+    with stage('process') as s:
+        for i, character in enumerate(characters, 1):
+            try:
+                unicode_val = ord(character)
+                print(f"[{i}/{len(characters)}] Processing: {character} (U+{unicode_val:04X})")
             
-            # Get character data from the map (local file only, no network needed)
-            char_data = character_data_map.get(character)
+                # Get character data from the map (local file only, no network needed)
+                char_data = character_data_map.get(character)
             
-            if not char_data:
-                print(f"  Failed to fetch data for {character}")
-                failed_characters.append(character)
-                continue
-            
-            # Process the stroke data
-            processed = process_stroke_data(char_data)
+                if not char_data:
+                    print(f"  Failed to fetch data for {character}")
+                    failed_characters.append(character)
+                    continue
             
-            # Store the data
-            all_strokes_data[character] = {
-                'character': character,
-                'unicode': unicode_val,
-                'unicodeHex': f'U+{unicode_val:04X}',
-                'totalStrokes': len(processed['strokes']),
-                'strokes': processed['strokes'],
-                'rawCharData': char_data
-            }
+                # Process the stroke data into the runtime structure (raises if any stroke fails)
+                all_strokes_data[character] = build_character_entry(character, char_data)
+                s.add_items()
             
-            print(f"  Success: {len(processed['strokes'])} strokes")
+                print(f"  Success: {all_strokes_data[character]['totalStrokes']} strokes")
             
-        except Exception as e:
-            print(f"  Error processing {character}: {e}")
-            failed_characters.append(character)
-            continue
+            except Exception as e:
+                print(f"  Error processing {character}: {e}")
+                failed_characters.append(character)
+                continue
     
     # Prepare output
     output_data = {
+        'schemaVersion': SCHEMA_VERSION,
         'sourceFile': input_file,
         'timestamp': datetime.now().isoformat(),
         'totalCharacters': len(characters),
@@ -211,10 +240,28 @@ def main():
     if failed_characters:
         output_data['failedCharacterList'] = failed_characters
     
+    # Keep only the fields the selected profile's consumer reads
+    profile_sizes = profile_size_report(output_data) if '--size-report' in sys.argv else None
+    if output_profile != 'full':
+        output_data['outputProfile'] = output_profile
+        output_data['characters'] = {char: project_character_entry(entry, output_profile)
+                                     for char, entry in all_strokes_data.items()}
+    
+    # Optionally share identical stroke geometry between characters
+    if '--dedupe' in sys.argv:
+        print()
+        print("Deduplicating stroke geometry...")
+        with stage('dedupe') as s:
+            output_data, dedup_stats = deduplicate(output_data)
+            s.add_items(dedup_stats['uniqueStrokes'])
+        print_stats(dedup_stats)
+    
     # Save to file
     output_file = '../data/all_strokes.json'
-    with open(output_file, 'w', encoding='utf-8') as f:
-        json.dump(output_data, f, ensure_ascii=False, indent=2)
+    with stage('write', output=output_file) as s:
+        with open(output_file, 'w', encoding='utf-8') as f:
+            json.dump(output_data, f, ensure_ascii=False, indent=2)
+        s.add_items(len(all_strokes_data))
     
     print()
     print("=" * 60)
@@ -223,10 +270,14 @@ def main():
     print(f"  Successful: {len(all_strokes_data)}")
     print(f"  Failed: {len(failed_characters)}")
     print(f"  Output file: {output_file}")
+    if profile_sizes:
+        print_profile_sizes(profile_sizes, output_profile)
     print("=" * 60)
     
     if failed_characters:
         print(f"\nFailed characters: {''.join(failed_characters)}")
+    
+    print_report()
 
 if __name__ == "__main__":
     main()
@@ -11,6 +11,12 @@ import io
 import requests
 from datetime import datetime
 
+from instrumentation import stage, enable_from_argv, print_report
+
+# Version of the all_strokes.json character structure. game.js uses entries as-is
+# (no restructuring at startup) when this matches STROKE_SCHEMA_VERSION there.
+SCHEMA_VERSION = 2
+
 # Fix Windows console encoding
 if sys.stdout.encoding != 'utf-8':
     try:
@@ -121,18 +127,34 @@ def calculate_stroke_angle(points):
         'switched': switched
     }
 
-def get_character_data_from_graphics_txt(character):
+def get_character_data_from_graphics_txt(character, cache=None):
     """Fetch character data from graphics.txt (newline-delimited JSON)"""
     url = 'https://raw.githubusercontent.com/skishore/makemeahanzi/master/graphics.txt'
+    codepoint = ord(character) if cache else None
+    
+    # Serve from the local cache while it is fresh (including known-absent characters)
+    entry = cache.lookup('graphics', codepoint) if cache else None
+    if entry and cache.is_fresh(entry):
+        print(f"Using cached graphics.txt result for {character}")
+        return cache.load(entry)
+    
+    headers = {}
+    if entry and entry.get('etag'):
+        headers['If-None-Match'] = entry['etag']
     
     try:
         print(f"Fetching graphics.txt from: {url}")
-        response = requests.get(url, timeout=30, stream=True)
+        response = requests.get(url, timeout=30, stream=True, headers=headers)
+        
+        if response.status_code == 304 and entry:
+            print("  graphics.txt not modified, using cached result")
+            return cache.revalidated(entry)
         
         if response.status_code != 200:
             print(f"  HTTP {response.status_code}")
-            return None
+            return cache.load(entry) if entry else None
         
+        etag = response.headers.get('ETag')
         print("  Parsing graphics.txt (this may take a moment)...")
         # Parse newline-delimited JSON
         for line in response.iter_lines(decode_unicode=True):
@@ -142,25 +164,31 @@ def get_character_data_from_graphics_txt(character):
                 data = json.loads(line)
                 if data.get('character') == character:
                     print(f"Successfully found character data in graphics.txt")
+                    if cache:
+                        cache.store('graphics', codepoint, data, etag=etag, url=url)
                     return data
             except json.JSONDecodeError:
                 continue
         
         print(f"  Character '{character}' not found in graphics.txt")
+        if cache:
+            # Keeps (and marks as checked) a cached payload instead of replacing it
+            cache.store_missing('graphics', codepoint, etag=etag, url=url)
+        if entry and not entry['missing']:
+            print("  Using stale cached result")
+            return cache.load(entry)
         return None
         
     except Exception as e:
         print(f"  Error fetching graphics.txt: {e}")
+        if entry:
+            # Offline: a stale cached result is better than nothing
+            print("  Using stale cached result")
+            return cache.load(entry)
         return None
 
-def get_character_data_from_api(character):
-    """Fetch character stroke data from hanzi-writer data source"""
-    # First try graphics.txt (most reliable source)
-    data = get_character_data_from_graphics_txt(character)
-    if data:
-        return data
-    
-    # Fallback: try other endpoints
+def get_character_data_from_jsdelivr(character, cache=None):
+    """Fetch character data from hanzi-writer-data on jsDelivr"""
     import urllib.parse
     try:
         char_encoded = urllib.parse.quote(character)
@@ -170,7 +198,16 @@ def get_character_data_from_api(character):
         char_encoded = urllib.parse.quote(character.encode('utf-8').decode('latin-1', errors='ignore'))
         char_unicode = None
     
+    entry = None
+    if cache and char_unicode:
+        entry = cache.lookup('jsdelivr', char_unicode)
+        if entry and cache.is_fresh(entry):
+            print(f"Using cached jsDelivr result for {character}")
+            return cache.load(entry)
+    
     sources = []
+    if entry and entry.get('url'):
+        sources.append(entry['url'])
     if char_unicode:
         sources.append(f'https://cdn.jsdelivr.net/npm/hanzi-writer-data@latest/{char_unicode}.json')
     sources.extend([
@@ -178,23 +215,55 @@ def get_character_data_from_api(character):
         f'https://cdn.jsdelivr.net/npm/hanzi-writer-data@latest/{character}.json',
     ])
     
-    for url in sources:
+    # Only a clean "not there" from every URL (404, or 200 without stroke data) is
+    # cached as absent; 5xx, 429 or a network error must not hide the character for a day
+    confirmed_absent = True
+    for url in dict.fromkeys(sources):
         try:
             print(f"Trying: {url}")
-            response = requests.get(url, timeout=10, headers={'User-Agent': 'Mozilla/5.0'})
+            headers = {'User-Agent': 'Mozilla/5.0'}
+            if entry and entry.get('etag') and url == entry.get('url'):
+                headers['If-None-Match'] = entry['etag']
+            response = requests.get(url, timeout=10, headers=headers)
             print(f"  Status code: {response.status_code}")
             
+            if response.status_code == 304 and entry:
+                print("  Not modified, using cached result")
+                return cache.revalidated(entry)
+            
             if response.status_code == 200:
                 data = response.json()
                 if isinstance(data, dict) and ('strokes' in data or 'medians' in data):
                     print(f"Successfully fetched data from: {url}")
+                    if cache and char_unicode:
+                        cache.store('jsdelivr', char_unicode, data,
+                                    etag=response.headers.get('ETag'), url=url)
                     return data
+            elif response.status_code != 404:
+                confirmed_absent = False
         except Exception as e:
             print(f"  Error: {e}")
+            confirmed_absent = False
             continue
     
+    if cache and char_unicode and confirmed_absent:
+        cache.store_missing('jsdelivr', char_unicode)
+    if entry and (not confirmed_absent or not entry['missing']):
+        # Source unavailable (or it lost the file): a stale cached result is better than nothing
+        print("  Using stale cached result")
+        return cache.load(entry)
     return None
 
+def get_character_data_from_api(character, cache=None):
+    """Fetch character stroke data from hanzi-writer data source"""
+    # First try graphics.txt (most reliable source)
+    data = get_character_data_from_graphics_txt(character, cache)
+    if data:
+        return data
+    
+    # Fallback: try other endpoints
+    return get_character_data_from_jsdelivr(character, cache)
+
 def process_stroke_data(char_data):
     """Process character data using the same logic as processStrokeData in index.html"""
     if not char_data:
@@ -277,20 +346,104 @@ def process_stroke_data(char_data):
     
     return {'strokes': processed_strokes}
 
+def build_character_entry(character, char_data):
+    """all_strokes.json entry in the exact structure game.js uses at runtime
+
+    Raises ValueError when not every stroke can be processed, so the client never
+    has to fall back to processing rawCharData itself.
+    """
+    processed = process_stroke_data(char_data)
+    strokes = processed['strokes']
+    raw_strokes = char_data.get('medians') if isinstance(char_data.get('medians'), list) else char_data.get('strokes')
+    if not strokes or len(strokes) != len(raw_strokes or []):
+        raise ValueError(f"processed {len(strokes)} of {len(raw_strokes or [])} strokes")
+    unicode_val = ord(character)
+    return {
+        'character': character,
+        'unicode': unicode_val,
+        'unicodeHex': f'U+{unicode_val:04X}',
+        'totalStrokes': len(strokes),
+        'strokes': strokes,
+        'rawCharData': char_data
+    }
+
+# Fields kept per processed stroke and in rawCharData for each output profile (None keeps all).
+# game.js reads angleDegrees for the drag direction check, the end points and length for
+# multi-stroke drags and rawCharData.medians for drawing; angle, direction, index, source
+# and pointsCount are derivable or never read, and rawCharData.character repeats the key.
+OUTPUT_PROFILES = {
+    'full': None,
+    'game': {'strokes': ('startPoint', 'endPoint', 'angleDegrees', 'length'),
+             'rawCharData': ('strokes', 'medians')},
+    # game without the SVG outlines, which the client never draws
+    'minimal': {'strokes': ('startPoint', 'endPoint', 'angleDegrees', 'length'),
+                'rawCharData': ('medians',)}
+}
+DEFAULT_OUTPUT_PROFILE = 'full'
+
+def output_profile_from_argv(argv=None):
+    """Profile named by --output-profile=<name>, raises ValueError for unknown names"""
+    argv = sys.argv if argv is None else argv
+    for arg in argv:
+        if arg.startswith('--output-profile='):
+            profile = arg.split('=', 1)[1]
+            if profile not in OUTPUT_PROFILES:
+                raise ValueError(f"unknown output profile '{profile}' (choose from {', '.join(OUTPUT_PROFILES)})")
+            return profile
+    return DEFAULT_OUTPUT_PROFILE
+
+def project_character_entry(entry, profile):
+    """Copy of an all_strokes.json entry with only the fields the profile keeps"""
+    fields = OUTPUT_PROFILES[profile]
+    if fields is None:
+        return entry
+    raw = entry.get('rawCharData') or {}
+    projected = dict(entry)
+    projected['strokes'] = [{k: stroke[k] for k in fields['strokes'] if k in stroke}
+                            for stroke in entry.get('strokes', [])]
+    projected['rawCharData'] = {k: raw[k] for k in fields['rawCharData'] if k in raw}
+    return projected
+
+def profile_size_report(output_data):
+    """{profile: bytes} of output_data as compact JSON with each profile (for --size-report)
+
+    Serializes the dataset once per profile, so the generators only call it when
+    asked. Indentation is left out: the ratios between profiles are what matter.
+    """
+    sizes = {}
+    for profile in OUTPUT_PROFILES:
+        projected = dict(output_data, characters={
+            char: project_character_entry(entry, profile)
+            for char, entry in output_data['characters'].items()})
+        if profile != 'full':
+            projected['outputProfile'] = profile
+        sizes[profile] = len(json.dumps(projected, ensure_ascii=False, separators=(',', ':')).encode('utf-8'))
+    return sizes
+
+def print_profile_sizes(sizes, selected):
+    print("  Output profiles (compact JSON):")
+    for profile, size in sizes.items():
+        marker = '  <- written' if profile == selected else ''
+        print(f"    {profile:<8} {size / (1024*1024):7.2f} MB  ({size / sizes['full'] * 100:5.1f}% of full){marker}")
+
 def main():
     """Main function"""
-    if len(sys.argv) < 2:
-        print("Usage: python get_one_character_strokes.py <character>")
+    enable_from_argv()
+    args = [arg for arg in sys.argv[1:] if not arg.startswith('--')]
+    use_cache = '--no-cache' not in sys.argv
+    
+    if len(args) < 1:
+        print("Usage: python get_one_character_strokes.py <character> [--no-cache] [--profile]")
         print("Example: python get_one_character_strokes.py 中")
         print("Or use Unicode: python get_one_character_strokes.py 20013")
         return
     
     # Check if argument is a Unicode code point (numeric)
-    if sys.argv[1].isdigit():
-        character = chr(int(sys.argv[1]))
-        print(f"Using Unicode code point: {sys.argv[1]} -> {character}")
+    if args[0].isdigit():
+        character = chr(int(args[0]))
+        print(f"Using Unicode code point: {args[0]} -> {character}")
     else:
-        character = sys.argv[1]
+        character = args[0]
         # Handle encoding issues with command line arguments
         # Windows console encoding can mangle Chinese characters
         try:
@@ -317,8 +470,17 @@ def main():
         print(f"Warning: Could not determine Unicode value")
         print()
     
-    # Fetch character data from API
-    char_data = get_character_data_from_api(character)
+    import os
+    strokes_dir = 'strokes_data'
+    
+    # Fetch character data from API (served from the local cache when possible)
+    cache = None
+    if use_cache and len(character) == 1:
+        from fetch_cache import FetchCache
+        cache = FetchCache(os.path.join(strokes_dir, '.cache'))
+    with stage('fetch', character=character) as s:
+        char_data = get_character_data_from_api(character, cache)
+        s.add_items(1 if char_data else 0)
     
     if not char_data:
         print("\\nFailed to fetch character data from all sources")
@@ -326,7 +488,9 @@ def main():
         return
     
     # Process the character data using the same logic as processStrokeData
-    processed = process_stroke_data(char_data)
+    with stage('process', character=character) as s:
+        processed = process_stroke_data(char_data)
+        s.add_items(len(processed['strokes']))
     
     # Prepare output
     output_data = {
@@ -338,21 +502,24 @@ def main():
     }
     
     # Save to file in strokes_data folder
-    import os
-    strokes_dir = 'strokes_data'
     if not os.path.exists(strokes_dir):
         os.makedirs(strokes_dir)
     
     # Create ASCII-safe filename (replace non-ASCII characters with Unicode code point)
+    # One file per character: repeated runs overwrite instead of piling up copies
     char_code = ord(character) if len(character) == 1 else 0
     safe_char_name = f'U{char_code:04X}' if char_code > 0 else 'unknown'
-    output_file = os.path.join(strokes_dir, f'stroke_data_{safe_char_name}_{int(datetime.now().timestamp() * 1000)}.json')
-    with open(output_file, 'w', encoding='utf-8') as f:
-        json.dump(output_data, f, ensure_ascii=False, indent=2)
+    output_file = os.path.join(strokes_dir, f'stroke_data_{safe_char_name}.json')
+    with stage('write', output=output_file) as s:
+        with open(output_file, 'w', encoding='utf-8') as f:
+            json.dump(output_data, f, ensure_ascii=False, indent=2)
+        s.add_items()
     
     print(f"\\nSuccessfully saved stroke data to: {output_file}")
     print(f"Character: {output_data['character']}")
     print(f"Total strokes: {output_data['totalStrokes']}")
+    
+    print_report()
 
 if __name__ == "__main__":
     main()
@@ -0,0 +1,371 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+Seekable compressed archive for graphics.txt
+graphics.txt is ~30 MB of newline-delimited JSON. This script packs it into
+independently compressed blocks of records sorted by codepoint, plus an index,
+so the file shrinks severalfold and any single character is read by
+decompressing one small block.
+
+File layout (little-endian):
+    header : magic 'HZGA', version, block count, record count, table offset
+    blocks : zlib streams of graphics.txt lines (~64 KB uncompressed each)
+    tables : block table (offset, compressed size, raw size) followed by the
+             record index (codepoint, block, offset and length inside the block)
+
+Every reader picks its source with find_graphics_file(), first match wins:
+    1. data/graphics_merged.hza (written by merge_stroke_sources.py)
+    2. data/graphics.hza (written by this script)
+    3. data/graphics.txt
+An archive older than graphics.txt (graphics.txt downloaded again after it was
+built) is skipped with a warning until it is rebuilt. Building here never
+touches the merged archive. Full scans go through iter_graphics_lines(); the
+generators look characters up in the archive directly.
+
+Usage:
+    python graphics_archive.py build [../data/graphics.txt] [../data/graphics.hza]
+    python graphics_archive.py info [../data/graphics.hza]
+    python graphics_archive.py show 中
+"""
+
+import json
+import os
+import struct
+import sys
+import io
+import time
+import zlib
+from collections import OrderedDict
+
+# Fix Windows console encoding
+if sys.stdout.encoding != 'utf-8':
+    try:
+        sys.stdout = io.TextIOWrapper(sys.stdout.buffer, encoding='utf-8', errors='replace')
+        sys.stderr = io.TextIOWrapper(sys.stderr.buffer, encoding='utf-8', errors='replace')
+    except:
+        pass
+
+DEFAULT_SOURCE_FILE = '../data/graphics.txt'
+DEFAULT_ARCHIVE_FILE = '../data/graphics.hza'
+DEFAULT_MERGED_FILE = '../data/graphics_merged.hza'
+
+ARCHIVE_MAGIC = b'HZGA'
+ARCHIVE_VERSION = 1
+
+# magic, version, reserved, block count, record count, table offset
+HEADER_FORMAT = '<4sHHIIQ'
+HEADER_SIZE = struct.calcsize(HEADER_FORMAT)
+
+# block offset, compressed size, raw size
+BLOCK_FORMAT = '<QII'
+BLOCK_ENTRY_SIZE = struct.calcsize(BLOCK_FORMAT)
+
+# codepoint, block number, offset and length inside the decompressed block
+RECORD_FORMAT = '<IIII'
+RECORD_ENTRY_SIZE = struct.calcsize(RECORD_FORMAT)
+
+BLOCK_SIZE = 64 * 1024     # uncompressed bytes per block
+COMPRESS_LEVEL = 9
+BLOCK_CACHE_SIZE = 8       # decompressed blocks kept per reader
+
+
+def archive_path(filename):
+    """graphics.txt -> graphics.hza next to it"""
+    return os.path.splitext(filename)[0] + '.hza'
+
+
+def merged_path(filename):
+    """graphics.txt -> graphics_merged.hza next to it"""
+    return os.path.splitext(filename)[0] + '_merged.hza'
+
+
+def find_graphics_file(filename=DEFAULT_SOURCE_FILE):
+    """Existing graphics source for filename (plain text or archive), or None
+
+    Every reader resolves the source here: the merged archive, then the plain
+    archive, then the text file. An archive older than the text file is skipped
+    until it is rebuilt. An archive path given directly is used as it is.
+    """
+    if filename.endswith('.hza'):
+        return filename if os.path.exists(filename) else None
+    text_exists = os.path.exists(filename)
+    for archive, rebuild in ((merged_path(filename), 'merge_stroke_sources.py'),
+                             (archive_path(filename), 'graphics_archive.py build')):
+        if not os.path.exists(archive):
+            continue
+        if text_exists and os.path.getmtime(archive) < os.path.getmtime(filename):
+            print(f"  [WARNING] {archive} is older than {filename}, skipping it (rebuild with {rebuild})")
+            continue
+        return archive
+    return filename if text_exists else None
+
+
+def is_archive(filename):
+    with open(filename, 'rb') as f:
+        return f.read(len(ARCHIVE_MAGIC)) == ARCHIVE_MAGIC
+
+
+def iter_file_lines(filename):
+    """Yield graphics.txt lines from exactly this file (plain text or archive)"""
+    if is_archive(filename):
+        with GraphicsArchive(filename) as archive:
+            yield from archive.iter_lines()
+        return
+    with open(filename, 'r', encoding='utf-8') as f:
+        yield from f
+
+
+def iter_graphics_lines(filename=DEFAULT_SOURCE_FILE):
+    """Yield graphics.txt lines from the source find_graphics_file() picks"""
+    source = find_graphics_file(filename)
+    if source is None:
+        raise FileNotFoundError(filename)
+    yield from iter_file_lines(source)
+
+
+class GraphicsArchive:
+    """Random access to graphics.txt records inside an archive"""
+
+    def __init__(self, filename=DEFAULT_ARCHIVE_FILE):
+        self.filename = filename
+        self._file = open(filename, 'rb')
+        header = self._file.read(HEADER_SIZE)
+        if len(header) < HEADER_SIZE or not header.startswith(ARCHIVE_MAGIC):
+            self._file.close()
+            raise ValueError(f"{filename} is not a graphics archive")
+        _, version, _, block_count, record_count, table_offset = struct.unpack(HEADER_FORMAT, header)
+        if version != ARCHIVE_VERSION:
+            self._file.close()
+            raise ValueError(f"Unsupported archive version {version}")
+
+        self._file.seek(table_offset)
+        tables = self._file.read(block_count * BLOCK_ENTRY_SIZE + record_count * RECORD_ENTRY_SIZE)
+        split = block_count * BLOCK_ENTRY_SIZE
+        self._blocks = list(struct.iter_unpack(BLOCK_FORMAT, tables[:split]))
+        self._records = {entry[0]: entry[1:] for entry in struct.iter_unpack(RECORD_FORMAT, tables[split:])}
+        self._cache = OrderedDict()
+        self.blocks_read = 0
+
+    def close(self):
+        self._file.close()
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc):
+        self.close()
+
+    def __len__(self):
+        return len(self._records)
+
+    @property
+    def block_count(self):
+        return len(self._blocks)
+
+    @property
+    def raw_size(self):
+        """Total uncompressed size of all blocks"""
+        return sum(block[2] for block in self._blocks)
+
+    def _block(self, number):
+        """Decompressed block, from the small LRU when possible"""
+        data = self._cache.get(number)
+        if data is not None:
+            self._cache.move_to_end(number)
+            return data
+        offset, compressed_size, raw_size = self._blocks[number]
+        self._file.seek(offset)
+        data = zlib.decompress(self._file.read(compressed_size))
+        if len(data) != raw_size:
+            raise ValueError(f"Block {number} is corrupt")
+        self.blocks_read += 1
+        self._cache[number] = data
+        if len(self._cache) > BLOCK_CACHE_SIZE:
+            self._cache.popitem(last=False)
+        return data
+
+    def get_line(self, character):
+        """Raw graphics.txt line for a character (or codepoint), None if missing"""
+        codepoint = character if isinstance(character, int) else ord(character)
+        entry = self._records.get(codepoint)
+        if entry is None:
+            return None
+        number, offset, length = entry
+        return self._block(number)[offset:offset + length].decode('utf-8')
+
+    def get(self, character, default=None):
+        """Parsed graphics.txt record for a character"""
+        line = self.get_line(character)
+        return json.loads(line) if line is not None else default
+
+    def get_many(self, characters):
+        """{character: record} for the characters present, each block decompressed once"""
+        found = {}
+        for character in sorted(set(characters), key=ord):
+            data = self.get(character)
+            if data is not None:
+                found[character] = data
+        return found
+
+    def __contains__(self, character):
+        codepoint = character if isinstance(character, int) else ord(character)
+        return codepoint in self._records
+
+    def codepoints(self):
+        """All codepoints in the archive, in ascending order"""
+        return sorted(self._records)
+
+    def iter_lines(self):
+        """Every line in codepoint order, one block in memory at a time"""
+        for number in range(len(self._blocks)):
+            offset, compressed_size, _ = self._blocks[number]
+            self._file.seek(offset)
+            data = zlib.decompress(self._file.read(compressed_size))
+            yield from data.decode('utf-8').splitlines(keepends=True)
+
+    def __iter__(self):
+        for line in self.iter_lines():
+            yield json.loads(line)
+
+
+def write_archive(source_file=DEFAULT_SOURCE_FILE, output_file=DEFAULT_ARCHIVE_FILE,
+                  block_size=BLOCK_SIZE):
+    """Pack graphics.txt into an archive, returns (record count, block count)"""
+    records = []
+    with open(source_file, 'r', encoding='utf-8') as f:
+        for line in f:
+            if not line.strip():
+                continue
+            try:
+                character = json.loads(line).get('character')
+            except json.JSONDecodeError:
+                continue
+            if character and len(character) == 1:
+                records.append((ord(character), line.rstrip('\r\n').encode('utf-8') + b'\n'))
+    records.sort(key=lambda record: record[0])
+    return write_sorted_archive(records, output_file, block_size)
+
+
+def write_sorted_archive(records, output_file=DEFAULT_ARCHIVE_FILE, block_size=BLOCK_SIZE):
+    """Archive (codepoint, line bytes ending in newline) pairs given in ascending order
+
+    Streams: only the current block and the 16-byte index entries stay in memory.
+    Later duplicates of a codepoint are skipped. Returns (record count, block count).
+    """
+    blocks = []
+    index = []
+    tmp_file = output_file + '.tmp'
+    try:
+        with open(tmp_file, 'wb') as f:
+            f.write(b'\0' * HEADER_SIZE)
+            offset = HEADER_SIZE
+            pending = []
+            pending_size = 0
+
+            def flush_block():
+                nonlocal offset, pending, pending_size
+                raw = b''.join(pending)
+                compressed = zlib.compress(raw, COMPRESS_LEVEL)
+                f.write(compressed)
+                blocks.append((offset, len(compressed), len(raw)))
+                offset += len(compressed)
+                pending = []
+                pending_size = 0
+
+            last = -1
+            for codepoint, line in records:
+                if codepoint == last:
+                    continue
+                if codepoint < last:
+                    raise ValueError(f"Records are not sorted (U+{codepoint:04X} after U+{last:04X})")
+                last = codepoint
+                if pending and pending_size + len(line) > block_size:
+                    flush_block()
+                index.append((codepoint, len(blocks), pending_size, len(line) - 1))
+                pending.append(line)
+                pending_size += len(line)
+            if pending:
+                flush_block()
+
+            for block in blocks:
+                f.write(struct.pack(BLOCK_FORMAT, *block))
+            for entry in index:
+                f.write(struct.pack(RECORD_FORMAT, *entry))
+
+            f.seek(0)
+            f.write(struct.pack(HEADER_FORMAT, ARCHIVE_MAGIC, ARCHIVE_VERSION, 0,
+                                len(blocks), len(index), offset))
+    except BaseException:
+        # Leave no half-written archive behind (e.g. unsorted input)
+        if os.path.exists(tmp_file):
+            os.remove(tmp_file)
+        raise
+
+    os.replace(tmp_file, output_file)
+    return len(index), len(blocks)
+
+
+def main():
+    """Main function"""
+    if len(sys.argv) < 2 or sys.argv[1] not in ('build', 'info', 'show'):
+        print("Usage: python graphics_archive.py build [source_file] [archive_file]")
+        print("       python graphics_archive.py info [archive_file]")
+        print("       python graphics_archive.py show <character>")
+        return
+
+    command = sys.argv[1]
+
+    if command == 'build':
+        source_file = sys.argv[2] if len(sys.argv) > 2 else DEFAULT_SOURCE_FILE
+        output_file = sys.argv[3] if len(sys.argv) > 3 else archive_path(source_file)
+        if not os.path.exists(source_file):
+            print(f"Error: File '{source_file}' not found")
+            return
+        print(f"Building graphics archive from: {source_file}")
+        start = time.perf_counter()
+        count, blocks = write_archive(source_file, output_file)
+        source_size = os.path.getsize(source_file)
+        archive_size = os.path.getsize(output_file)
+        print(f"  Records: {count} in {blocks} blocks")
+        print(f"  Source size: {source_size / (1024*1024):.2f} MB")
+        print(f"  Archive size: {archive_size / (1024*1024):.2f} MB ({source_size / archive_size:.1f}x smaller)")
+        print(f"  Build time: {time.perf_counter() - start:.2f}s")
+        print(f"  Output file: {output_file}")
+        merged_file = merged_path(source_file)
+        if os.path.exists(merged_file) and os.path.realpath(merged_file) != os.path.realpath(output_file):
+            print(f"  [NOTE] Readers keep using {merged_file} while it is not older than {source_file}; "
+                  f"delete it or rerun merge_stroke_sources.py to change that")
+        return
+
+    archive_file = sys.argv[2] if command == 'info' and len(sys.argv) > 2 else DEFAULT_ARCHIVE_FILE
+    if not os.path.exists(archive_file):
+        print(f"Error: File '{archive_file}' not found, run 'build' first")
+        return
+
+    with GraphicsArchive(archive_file) as archive:
+        if command == 'info':
+            codepoints = archive.codepoints()
+            print(f"Archive file: {archive_file}")
+            print(f"  Records: {len(archive)} in {archive.block_count} blocks")
+            print(f"  Uncompressed: {archive.raw_size / (1024*1024):.2f} MB, "
+                  f"archive: {os.path.getsize(archive_file) / (1024*1024):.2f} MB")
+            if codepoints:
+                print(f"  Codepoint range: U+{codepoints[0]:04X} - U+{codepoints[-1]:04X}")
+            return
+
+        if len(sys.argv) < 3:
+            print("Usage: python graphics_archive.py show <character>")
+            return
+        start = time.perf_counter()
+        data = archive.get(sys.argv[2])
+        elapsed = time.perf_counter() - start
+        if data is None:
+            print(f"Character '{sys.argv[2]}' not found in archive")
+            return
+        print(f"Character: {data['character']} (U+{ord(data['character']):04X})")
+        print(f"  Strokes: {len(data.get('strokes', []))}")
+        print(f"  Read time: {elapsed * 1000:.2f} ms ({archive.blocks_read} block decompressed)")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,181 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+Stage-level instrumentation for the stroke data scripts
+Records wall time, CPU time, allocated memory (tracemalloc) and item counts for
+named stages as structured JSON events. Disabled by default, so wrapping a stage
+costs next to nothing.
+
+Enable with either:
+    HANZI_PROFILE=1                      events go to profile_events.jsonl
+    HANZI_PROFILE=path/to/events.jsonl   events go to that file
+    --profile                            command line flag (same as HANZI_PROFILE=1)
+Optionally also:
+    HANZI_CPROFILE_DIR=profiles          one cProfile dump per stage
+
+Usage:
+    from instrumentation import stage, enable_from_argv, print_report
+
+    enable_from_argv()
+    with stage('parse') as s:
+        for line in lines:
+            ...
+            s.add_items()
+    print_report()
+"""
+
+import cProfile
+import json
+import os
+import sys
+import time
+import tracemalloc
+from datetime import datetime
+
+DEFAULT_EVENTS_FILE = 'profile_events.jsonl'
+
+_enabled = False
+_events_file = None
+_cprofile_dir = None
+_stack = []
+_events = []
+
+
+def enable(events_file=DEFAULT_EVENTS_FILE, cprofile_dir=None):
+    """Turn instrumentation on for the rest of the process"""
+    global _enabled, _events_file, _cprofile_dir
+    _enabled = True
+    _events_file = events_file
+    _cprofile_dir = cprofile_dir
+    if cprofile_dir:
+        os.makedirs(cprofile_dir, exist_ok=True)
+    if not tracemalloc.is_tracing():
+        tracemalloc.start()
+
+
+def enable_from_argv(argv=None):
+    """Enable from HANZI_PROFILE / HANZI_CPROFILE_DIR or a --profile flag"""
+    argv = sys.argv if argv is None else argv
+    setting = os.environ.get('HANZI_PROFILE', '')
+    cprofile_dir = os.environ.get('HANZI_CPROFILE_DIR') or None
+    if '--profile' in argv and not setting:
+        setting = '1'
+    if setting and setting != '0':
+        enable(DEFAULT_EVENTS_FILE if setting == '1' else setting, cprofile_dir)
+    return _enabled
+
+
+def is_enabled():
+    return _enabled
+
+
+class _NullStage:
+    """Stand-in used while instrumentation is disabled"""
+
+    def add_items(self, count=1):
+        pass
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, exc_type, exc_value, traceback):
+        return False
+
+
+_NULL_STAGE = _NullStage()
+
+
+class Stage:
+    """One measured stage; use through stage()"""
+
+    def __init__(self, name, fields):
+        self.name = name
+        self.fields = fields
+        self.items = 0
+        self.peak_bytes = 0
+        self._profiler = None
+
+    def add_items(self, count=1):
+        self.items += count
+
+    def __enter__(self):
+        self._mem_start = tracemalloc.get_traced_memory()[0]
+        tracemalloc.reset_peak()
+        if _cprofile_dir and not any(s._profiler for s in _stack):
+            self._profiler = cProfile.Profile()
+            self._profiler.enable()
+        _stack.append(self)
+        self._cpu_start = time.process_time()
+        self._wall_start = time.perf_counter()
+        return self
+
+    def __exit__(self, exc_type, exc_value, traceback):
+        wall = time.perf_counter() - self._wall_start
+        cpu = time.process_time() - self._cpu_start
+        current, peak = tracemalloc.get_traced_memory()
+        _stack.pop()
+
+        if self._profiler:
+            self._profiler.disable()
+            script = os.path.splitext(os.path.basename(sys.argv[0] or 'python'))[0]
+            self._profiler.dump_stats(os.path.join(_cprofile_dir, f'{script}_{self.name}.prof'))
+
+        # reset_peak() in a nested stage hides earlier peaks from this one
+        self.peak_bytes = max(self.peak_bytes, peak)
+        if _stack:
+            _stack[-1].peak_bytes = max(_stack[-1].peak_bytes, self.peak_bytes)
+
+        event = {
+            'event': 'stage',
+            'script': os.path.basename(sys.argv[0] or ''),
+            'stage': self.name,
+            'timestamp': datetime.now().isoformat(),
+            'wallSeconds': round(wall, 6),
+            'cpuSeconds': round(cpu, 6),
+            'allocatedBytes': current - self._mem_start,
+            'peakBytes': self.peak_bytes - self._mem_start,
+            'items': self.items,
+            'failed': exc_type is not None
+        }
+        event.update(self.fields)
+        _record(event)
+        return False
+
+
+def stage(name, **fields):
+    """Context manager measuring one stage; extra keyword fields go into the event"""
+    if not _enabled:
+        return _NULL_STAGE
+    return Stage(name, fields)
+
+
+def _record(event):
+    _events.append(event)
+    if _events_file:
+        with open(_events_file, 'a', encoding='utf-8') as f:
+            f.write(json.dumps(event, ensure_ascii=False) + '\n')
+
+
+def events():
+    """Events recorded so far in this process"""
+    return list(_events)
+
+
+def print_report():
+    """Print a summary table of this run's stages (no-op while disabled)"""
+    if not _enabled or not _events:
+        return
+    print()
+    print("=" * 70)
+    print("PROFILE:")
+    print("=" * 70)
+    print(f"  {'stage':<16}{'wall s':>10}{'cpu s':>10}{'alloc MB':>10}{'peak MB':>10}{'items':>10}")
+    for event in _events:
+        print(f"  {event['stage']:<16}{event['wallSeconds']:>10.3f}{event['cpuSeconds']:>10.3f}"
+              f"{event['allocatedBytes'] / (1024*1024):>10.2f}{event['peakBytes'] / (1024*1024):>10.2f}"
+              f"{event['items']:>10}")
+    if _events_file:
+        print(f"  Events appended to: {_events_file}")
+    if _cprofile_dir:
+        print(f"  cProfile dumps in: {_cprofile_dir}")
+    print("=" * 70)
@@ -0,0 +1,131 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+Load test for leaderboard_server.py
+Simulates players finishing levels in bursts: each client keeps one keep-alive
+connection, submits level results and asks for its rank with the players around
+it, and now and then reads a level's top list. Reports sustained requests/s,
+latencies, and how many SQLite transactions the server needed for the results.
+
+Usage:
+    python leaderboard_server.py 8050 /tmp/leaderboard.db      (in another terminal)
+    python leaderboard_loadtest.py [clients] [results_per_client] [port]
+
+Run the server pinned to one core (e.g. taskset -c 0) to measure single-core throughput.
+"""
+
+import asyncio
+import json
+import os
+import random
+import sys
+import io
+import time
+
+from progress_server_loadtest import fetch_stats, request
+from stroke_server_loadtest import percentile
+
+# Fix Windows console encoding
+if sys.stdout.encoding != 'utf-8':
+    try:
+        sys.stdout = io.TextIOWrapper(sys.stdout.buffer, encoding='utf-8', errors='replace')
+        sys.stderr = io.TextIOWrapper(sys.stderr.buffer, encoding='utf-8', errors='replace')
+    except:
+        pass
+
+DEFAULT_CLIENTS = 500
+DEFAULT_RESULTS_PER_CLIENT = 100
+BURST_SIZE = 10        # results sent back to back before a short pause
+TOP_QUERY_SHARE = 0.1  # share of results followed by a top-10 read
+
+
+def load_level_ids(config_file='../level_config.json'):
+    if os.path.exists(config_file):
+        with open(config_file, 'r', encoding='utf-8') as f:
+            return [str(level['id']) for level in json.load(f).get('levels', [])]
+    return []
+
+
+async def run_client(client_id, port, results, level_ids, latencies, stats):
+    """One simulated player submitting level results and reading ranks"""
+    rng = random.Random(client_id)
+    user = f'loadtest-{client_id:016d}'
+    skill = rng.uniform(40, 100)
+    try:
+        reader, writer = await asyncio.open_connection('127.0.0.1', port)
+    except OSError:
+        stats['connect_errors'] += 1
+        return
+
+    try:
+        for sent in range(results):
+            level_id = rng.choice(level_ids)
+            result = {'score': round(min(100, max(0, rng.gauss(skill, 10))), 1),
+                      'timeMs': rng.randint(30000, 600000), 'hp': rng.randint(0, 200),
+                      'perfect': rng.randint(0, 60), 'notGood': rng.randint(0, 20), 'name': f'Player {client_id}'}
+            start = time.perf_counter()
+            status, body = await request(reader, writer, 'POST', f'/leaderboard/{level_id}/{user}', result)
+            status, body = await request(reader, writer, 'GET', f'/leaderboard/{level_id}/{user}?around=5')
+            latencies.append(time.perf_counter() - start)
+            stats[status] = stats.get(status, 0) + 1
+            if status == 200 and not any(entry.get('you') for entry in body['around']):
+                stats['rank_mismatches'] += 1
+            if rng.random() < TOP_QUERY_SHARE:
+                status, _ = await request(reader, writer, 'GET', f'/leaderboard/{level_id}?top=10')
+                stats[f'top {status}'] = stats.get(f'top {status}', 0) + 1
+            if (sent + 1) % BURST_SIZE == 0:
+                await asyncio.sleep(rng.uniform(0, 0.02))
+    except (OSError, ConnectionError, asyncio.IncompleteReadError):
+        stats['errors'] += 1
+    finally:
+        writer.close()
+
+
+async def run_load_test(clients, results, port, level_ids):
+    latencies = []
+    stats = {'errors': 0, 'connect_errors': 0, 'rank_mismatches': 0}
+    before = await fetch_stats(port)
+
+    start = time.perf_counter()
+    await asyncio.gather(*(run_client(i, port, results, level_ids, latencies, stats) for i in range(clients)))
+    elapsed = time.perf_counter() - start
+
+    # Let the flusher catch up before reading the counters
+    await asyncio.sleep(0.5)
+    after = await fetch_stats(port)
+    submits = after['submits'] - before['submits']
+    rows = after['rowsWritten'] - before['rowsWritten']
+    transactions = after['transactions'] - before['transactions']
+
+    latencies.sort()
+    print()
+    print("=" * 70)
+    print("LOAD TEST RESULTS:")
+    print("=" * 70)
+    print(f"  Clients: {clients}, levels: {len(level_ids)}")
+    print(f"  Submit + rank round trips: {len(latencies)} in {elapsed:.2f}s")
+    print(f"  Sustained throughput: {len(latencies) / elapsed:.0f} submits/s")
+    print(f"  Latency p50: {percentile(latencies, 0.50) * 1000:.2f} ms")
+    print(f"  Latency p95: {percentile(latencies, 0.95) * 1000:.2f} ms")
+    print(f"  Latency p99: {percentile(latencies, 0.99) * 1000:.2f} ms")
+    print(f"  Results: {submits} submitted, {after['improved'] - before['improved']} new bests")
+    print(f"  Rows written: {rows} in {transactions} transactions")
+    print(f"  Players on the board: {after['results']} results on {after['levels']} levels")
+    for key, count in sorted(stats.items(), key=lambda item: str(item[0])):
+        print(f"  {key}: {count}")
+    print("=" * 70)
+
+
+def main():
+    """Main function"""
+    clients = int(sys.argv[1]) if len(sys.argv) > 1 else DEFAULT_CLIENTS
+    results = int(sys.argv[2]) if len(sys.argv) > 2 else DEFAULT_RESULTS_PER_CLIENT
+    port = int(sys.argv[3]) if len(sys.argv) > 3 else 8050
+
+    level_ids = load_level_ids() or [f'lesson_{i:03d}' for i in range(1, 101)]
+    print(f"Simulating {clients} clients x {results} level results against port {port}...")
+    asyncio.run(run_load_test(clients, results, port, level_ids))
+
+
+if __name__ == "__main__":
+    main()
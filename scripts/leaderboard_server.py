@@ -0,0 +1,445 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+Per-level leaderboard service
+When LEADERBOARD_URL is set in js/auth.js, onLevelComplete sends each level
+result (the calculateLevelScore() score, completion time from levelStartTime,
+HP left and stroke counts) here. Every player keeps their best result per level.
+
+Scores are self-reported by the client and not verified here: the range checks
+in parse_result only reject malformed results, so anyone can post any score for
+their own id. Treat the boards as a casual feature, not as a trusted ranking.
+Players are identified by the same opaque id progress_server.py uses (see
+getProgressSyncId in js/auth.js). That id also unlocks a player's progress, so
+responses never include it; a player's own entry is marked with "you".
+
+Players are ranked by score, then by faster completion time. Scores are kept as
+SCORE_BUCKETS buckets of 0.1 points. A Fenwick tree over the buckets counts the
+players in better buckets in O(log B), and each bucket holds its players sorted
+by time, so "my rank" is one prefix sum plus one bisect. "Top K" and "K around me"
+use the same tree to jump to a rank and then read the buckets in order.
+
+Results go into memory at once. A background flusher writes everything
+submitted since the last flush to SQLite (WAL) in batched transactions (see
+write_batcher.py), so a burst of level completions costs a few transactions. All rows are loaded again at startup.
+
+Endpoints:
+    POST /leaderboard/<level id>/<player id> {"score": 87.5, "timeMs": 95000, "hp": 70,
+                                              "perfect": 40, "notGood": 6, "name": "..."}
+    GET  /leaderboard/<level id>             ?top=10
+    GET  /leaderboard/<level id>/<player id> ?around=5, rank plus the players around it
+    GET  /stats                              submit / write counters
+
+Usage:
+    python leaderboard_server.py [port] [database_file]
+"""
+
+import asyncio
+import bisect
+import json
+import os
+import re
+import sqlite3
+import sys
+import io
+import time
+from concurrent.futures import ThreadPoolExecutor
+
+from async_http import json_response, start_server
+from progress_server import PLAYER_ID_PATTERN
+from write_batcher import WriteBatcher, flush_periodically
+
+# Fix Windows console encoding
+if sys.stdout.encoding != 'utf-8':
+    try:
+        sys.stdout = io.TextIOWrapper(sys.stdout.buffer, encoding='utf-8', errors='replace')
+        sys.stderr = io.TextIOWrapper(sys.stderr.buffer, encoding='utf-8', errors='replace')
+    except:
+        pass
+
+DEFAULT_PORT = 8050
+DEFAULT_DATABASE = '../data/leaderboard.db'
+LEVEL_CONFIG_FILE = '../level_config.json'
+
+# Levels compiled by level_compiler.py are accepted alongside level_config.json
+CUSTOM_LEVEL_PATTERN = re.compile(r'^custom_[0-9a-f]{10}$')
+
+MAX_SCORE = 100           # calculateLevelScore() returns 0-100
+SCORE_DECIMALS = 1        # bucket width 0.1 points
+SCORE_BUCKETS = MAX_SCORE * 10 ** SCORE_DECIMALS + 1
+MAX_TIME_MS = 24 * 3600 * 1000
+MAX_NAME_LENGTH = 40
+
+DEFAULT_TOP = 10
+DEFAULT_AROUND = 5
+MAX_LIST = 100
+
+FLUSH_INTERVAL = 0.25     # seconds between batched transactions
+DEFAULT_NAME = 'Player'
+
+SCHEMA = '''
+CREATE TABLE IF NOT EXISTS scores (
+    level_id   TEXT NOT NULL,
+    user_id    TEXT NOT NULL,
+    name       TEXT NOT NULL,
+    score      REAL NOT NULL,
+    time_ms    INTEGER NOT NULL,
+    hp         INTEGER NOT NULL,
+    perfect    INTEGER NOT NULL,
+    not_good   INTEGER NOT NULL,
+    updated_at INTEGER NOT NULL,
+    PRIMARY KEY (level_id, user_id)
+) WITHOUT ROWID
+'''
+
+
+class FenwickTree:
+    """Counts per position with O(log n) prefix sums and rank lookups"""
+
+    def __init__(self, size):
+        self.size = size
+        self._tree = [0] * (size + 1)
+        self._high_bit = 1 << (size.bit_length() - 1) if size else 0
+
+    def add(self, position, delta):
+        i = position + 1
+        while i <= self.size:
+            self._tree[i] += delta
+            i += i & -i
+
+    def prefix(self, position):
+        """Sum of counts at positions before position"""
+        total = 0
+        i = position
+        while i > 0:
+            total += self._tree[i]
+            i -= i & -i
+        return total
+
+    def find(self, rank):
+        """Position holding the item with 0-based rank (rank < total)"""
+        position = 0
+        step = self._high_bit
+        while step:
+            nxt = position + step
+            if nxt <= self.size and self._tree[nxt] <= rank:
+                position = nxt
+                rank -= self._tree[nxt]
+            step >>= 1
+        return position
+
+
+class ScoreEntry:
+    """Best result of one player on one level"""
+
+    __slots__ = ('user_id', 'name', 'score', 'time_ms', 'hp', 'perfect', 'not_good', 'updated_at')
+
+    def __init__(self, user_id, name, score, time_ms, hp, perfect, not_good, updated_at):
+        self.user_id = user_id
+        self.name = name
+        self.score = score
+        self.time_ms = time_ms
+        self.hp = hp
+        self.perfect = perfect
+        self.not_good = not_good
+        self.updated_at = updated_at
+
+    @property
+    def position(self):
+        """Tree position: 0 for the best score bucket"""
+        return SCORE_BUCKETS - 1 - round(self.score * 10 ** SCORE_DECIMALS)
+
+    @property
+    def key(self):
+        """Order inside a bucket: faster first"""
+        return (self.time_ms, self.user_id)
+
+    def beats(self, other):
+        return (self.position, self.key) < (other.position, other.key)
+
+    def to_dict(self, rank=None, viewer=None):
+        # The player id doubles as the key to their progress, so it is never sent back
+        result = {'name': self.name, 'score': self.score, 'timeMs': self.time_ms,
+                  'hp': self.hp, 'perfect': self.perfect, 'notGood': self.not_good}
+        if rank is not None:
+            result['rank'] = rank + 1
+        if viewer is not None and viewer == self.user_id:
+            result['you'] = True
+        return result
+
+    def row(self, level_id):
+        return (level_id, self.user_id, self.name, self.score, self.time_ms, self.hp,
+                self.perfect, self.not_good, self.updated_at)
+
+
+class LevelBoard:
+    """Best results of every player on one level, in rank order"""
+
+    def __init__(self):
+        self._tree = FenwickTree(SCORE_BUCKETS)
+        self._buckets = [[] for _ in range(SCORE_BUCKETS)]
+        self.entries = {}
+
+    def __len__(self):
+        return len(self.entries)
+
+    def submit(self, entry):
+        """Keep entry if it is the player's best result, returns whether it was"""
+        current = self.entries.get(entry.user_id)
+        if current is not None:
+            if not entry.beats(current):
+                return False
+            bucket = self._buckets[current.position]
+            del bucket[bisect.bisect_left(bucket, current.key)]
+            self._tree.add(current.position, -1)
+        self.entries[entry.user_id] = entry
+        bisect.insort(self._buckets[entry.position], entry.key)
+        self._tree.add(entry.position, 1)
+        return True
+
+    def rank(self, user_id):
+        """0-based rank of a player, None if they have no result"""
+        entry = self.entries.get(user_id)
+        if entry is None:
+            return None
+        position = entry.position
+        return self._tree.prefix(position) + bisect.bisect_left(self._buckets[position], entry.key)
+
+    def range(self, start, count):
+        """[(rank, entry)] for count players from rank start"""
+        start = max(0, start)
+        if start >= len(self.entries) or count <= 0:
+            return []
+        position = self._tree.find(start)
+        offset = start - self._tree.prefix(position)
+        result = []
+        rank = start
+        while position < SCORE_BUCKETS and len(result) < count:
+            bucket = self._buckets[position]
+            for _, user_id in bucket[offset:offset + count - len(result)]:
+                result.append((rank, self.entries[user_id]))
+                rank += 1
+            position += 1
+            offset = 0
+        return result
+
+    def around(self, user_id, k):
+        """(rank, [(rank, entry)] for k players above and below), rank None if unknown"""
+        rank = self.rank(user_id)
+        if rank is None:
+            return None, []
+        return rank, self.range(rank - k, 2 * k + 1 - max(0, k - rank))
+
+
+def parse_result(user_id, data, now):
+    """ScoreEntry from a submitted result (raises ValueError on bad input)"""
+    if not isinstance(data, dict):
+        raise ValueError('expected a JSON object')
+    try:
+        score = float(data['score'])
+        time_ms = int(data['timeMs'])
+        hp = int(data.get('hp', 0))
+        perfect = int(data.get('perfect', 0))
+        not_good = int(data.get('notGood', 0))
+    except (KeyError, TypeError, ValueError):
+        raise ValueError('score and timeMs are required numbers')
+    if not 0 <= score <= MAX_SCORE:
+        raise ValueError(f'score must be between 0 and {MAX_SCORE}')
+    if not 0 <= time_ms <= MAX_TIME_MS:
+        raise ValueError('timeMs out of range')
+    if hp < 0 or perfect < 0 or not_good < 0:
+        raise ValueError('hp and stroke counts cannot be negative')
+    name = str(data.get('name') or DEFAULT_NAME)[:MAX_NAME_LENGTH]
+    return ScoreEntry(user_id, name, round(score, SCORE_DECIMALS), time_ms,
+                      hp, perfect, not_good, now)
+
+
+class LeaderboardStore:
+    """SQLite persistence; every call runs on one dedicated thread"""
+
+    def __init__(self, filename):
+        self.filename = filename
+        self._executor = ThreadPoolExecutor(max_workers=1)
+        self._connection = None
+
+    def _open(self):
+        self._connection = sqlite3.connect(self.filename, check_same_thread=False)
+        self._connection.execute('PRAGMA journal_mode=WAL')
+        self._connection.execute('PRAGMA synchronous=NORMAL')
+        self._connection.execute(SCHEMA)
+        self._connection.commit()
+
+    def _load_all(self):
+        return self._connection.execute(
+            'SELECT level_id, user_id, name, score, time_ms, hp, perfect, not_good, updated_at FROM scores'
+        ).fetchall()
+
+    def _write_batch(self, rows):
+        with self._connection:
+            self._connection.executemany('INSERT OR REPLACE INTO scores VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?)', rows)
+
+    def _close(self):
+        if self._connection:
+            self._connection.close()
+
+    async def _run(self, func, *args):
+        return await asyncio.get_running_loop().run_in_executor(self._executor, func, *args)
+
+    async def open(self):
+        await self._run(self._open)
+
+    async def load_all(self):
+        return await self._run(self._load_all)
+
+    async def write_batch(self, rows):
+        await self._run(self._write_batch, rows)
+
+    async def close(self):
+        await self._run(self._close)
+        self._executor.shutdown()
+
+
+class LeaderboardService:
+    """All level boards in memory, improved results written back in batches"""
+
+    def __init__(self, store, level_config_file=LEVEL_CONFIG_FILE, flush_interval=FLUSH_INTERVAL):
+        self.store = store
+        self.flush_interval = flush_interval
+        self.boards = {}
+        self.level_ids = None
+        if os.path.exists(level_config_file):
+            with open(level_config_file, 'r', encoding='utf-8') as f:
+                self.level_ids = {str(level.get('id')) for level in json.load(f).get('levels', [])}
+        self._flush_task = None
+        self.stats = {'submits': 0, 'improved': 0, 'queries': 0,
+                      'rowsWritten': 0, 'transactions': 0}
+        # Dirty keys are (level id, user id)
+        self._writer = WriteBatcher(store.write_batch, self._row, stats=self.stats)
+
+    async def start(self):
+        await self.store.open()
+        for level_id, *fields in await self.store.load_all():
+            self.board(level_id).submit(ScoreEntry(*fields))
+        self._flush_task = asyncio.create_task(
+            flush_periodically(self.flush, self.flush_interval, 'scores'))
+
+    async def stop(self):
+        if self._flush_task:
+            self._flush_task.cancel()
+        await self.flush()
+        await self.store.close()
+
+    def board(self, level_id):
+        board = self.boards.get(level_id)
+        if board is None:
+            board = self.boards[level_id] = LevelBoard()
+        return board
+
+    def is_level(self, level_id):
+        return (self.level_ids is None or level_id in self.level_ids
+                or CUSTOM_LEVEL_PATTERN.match(level_id) is not None)
+
+    def submit(self, level_id, entry):
+        """Returns (whether it is the player's new best, rank, players on the level)"""
+        board = self.board(level_id)
+        improved = board.submit(entry)
+        self.stats['submits'] += 1
+        if improved:
+            self.stats['improved'] += 1
+            self._writer.mark((level_id, entry.user_id))
+        return improved, board.rank(entry.user_id), len(board)
+
+    def _row(self, key):
+        level_id, user_id = key
+        return self.boards[level_id].entries[user_id].row(level_id)
+
+    async def flush(self):
+        """Write every result improved since the last flush (unwritten ones stay dirty on failure)"""
+        await self._writer.flush()
+
+
+def _query_int(request, name, default):
+    try:
+        return max(0, min(int(request.query.get(name, [default])[0]), MAX_LIST))
+    except ValueError:
+        raise ValueError(f'{name} must be a number')
+
+
+def route(service, request):
+    """Return (status, Response or None) for a request"""
+    parts = request.parts
+
+    if parts == ['stats'] and request.method == 'GET':
+        players = sum(len(board) for board in service.boards.values())
+        return 200, json_response(dict(service.stats, levels=len(service.boards), results=players),
+                                  etag=False)
+
+    if len(parts) not in (2, 3) or parts[0] != 'leaderboard' or not service.is_level(parts[1]):
+        return 404, None
+    level_id = parts[1]
+
+    try:
+        if len(parts) == 2:
+            if request.method != 'GET':
+                return 405, None
+            board = service.board(level_id)
+            service.stats['queries'] += 1
+            top = board.range(0, _query_int(request, 'top', DEFAULT_TOP))
+            return 200, json_response({'level': level_id, 'players': len(board),
+                                       'top': [entry.to_dict(rank) for rank, entry in top]}, etag=False)
+
+        user_id = parts[2]
+        if not PLAYER_ID_PATTERN.match(user_id):
+            return 400, json_response({'error': 'expected an opaque player id'}, etag=False)
+        if request.method == 'GET':
+            board = service.board(level_id)
+            service.stats['queries'] += 1
+            rank, nearby = board.around(user_id, _query_int(request, 'around', DEFAULT_AROUND))
+            if rank is None:
+                return 404, json_response({'error': 'no result for this player'}, etag=False)
+            return 200, json_response({'level': level_id, 'players': len(board), 'rank': rank + 1,
+                                       'around': [entry.to_dict(r, user_id) for r, entry in nearby]},
+                                  etag=False)
+
+        if request.method != 'POST':
+            return 405, None
+        entry = parse_result(user_id, request.json(), int(time.time() * 1000))
+    except ValueError as e:
+        return 400, json_response({'error': str(e)}, etag=False)
+
+    improved, rank, players = service.submit(level_id, entry)
+    return 200, json_response({'best': improved, 'rank': rank + 1, 'players': players}, etag=False)
+
+
+async def serve(port=DEFAULT_PORT, database=DEFAULT_DATABASE, host='127.0.0.1'):
+    """Run the server until cancelled"""
+    os.makedirs(os.path.dirname(database) or '.', exist_ok=True)
+    service = LeaderboardService(LeaderboardStore(database))
+    start = time.perf_counter()
+    await service.start()
+    results = sum(len(board) for board in service.boards.values())
+    print(f"Loaded {results} results on {len(service.boards)} levels in {time.perf_counter() - start:.2f}s")
+    server = await start_server(lambda request: route(service, request), host, port)
+    print(f"Leaderboard server on http://localhost:{port}/leaderboard/<level>")
+    print(f"  Database: {database} (WAL)")
+    print(f"  Flush interval: {FLUSH_INTERVAL * 1000:.0f} ms")
+    print("Press Ctrl+C to stop the server")
+    try:
+        async with server:
+            await server.serve_forever()
+    finally:
+        await service.stop()
+
+
+def main():
+    """Main function"""
+    port = int(sys.argv[1]) if len(sys.argv) > 1 else DEFAULT_PORT
+    database = sys.argv[2] if len(sys.argv) > 2 else DEFAULT_DATABASE
+    try:
+        asyncio.run(serve(port, database))
+    except KeyboardInterrupt:
+        print("\nServer stopped")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,243 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+On-demand custom level compiler
+Turns pasted text into a level definition (same fields as level_config.json) and
+a minimal stroke pack holding only that text's characters (all_strokes.json
+format). Data comes from the graphics character store (data/graphics.store,
+built from graphics.txt so it holds every character), so a compile costs a few
+milliseconds instead of a get_all_strokes_from_text.py run. Compiled levels are
+kept in an LRU, so re-posting the same text is a dictionary lookup.
+
+Endpoints (serve mode):
+    POST /compile    body {"text": "...", "name": "...", "difficulty": "easy"}
+                     or the raw text as text/plain
+    GET  /compile?text=...&difficulty=medium
+    GET  /stats      cache hit / miss counters
+
+Response: {"level": {...}, "strokes": {"characters": {...}, ...}, "missing": [...]}
+
+Usage:
+    python character_store.py build ../data/graphics.txt
+    python level_compiler.py serve [port]
+    python level_compiler.py compile "床前明月光" [difficulty]
+"""
+
+import asyncio
+import hashlib
+import json
+import os
+import sys
+import io
+import time
+from collections import OrderedDict
+
+from async_http import json_response, start_server
+from character_store import CharacterStore, DEFAULT_GRAPHICS_STORE_FILE, SOURCE_GRAPHICS, store_source
+from get_one_character_strokes import SCHEMA_VERSION
+from optimize_level_order import DIFFICULTY_MAX_HP, is_cjk
+from stroke_server import StrokeDataService
+
+# Fix Windows console encoding
+if sys.stdout.encoding != 'utf-8':
+    try:
+        sys.stdout = io.TextIOWrapper(sys.stdout.buffer, encoding='utf-8', errors='replace')
+        sys.stderr = io.TextIOWrapper(sys.stderr.buffer, encoding='utf-8', errors='replace')
+    except:
+        pass
+
+DEFAULT_PORT = 8020
+LEVEL_CACHE_CAPACITY = 512
+MAX_TEXT_CHARACTERS = 2000
+SECONDS_PER_STROKE = 1.2   # rough pace for estimatedTime
+
+
+def estimated_time(total_strokes):
+    """"2-3 mins" style estimate like the entries in level_config.json"""
+    minutes = total_strokes * SECONDS_PER_STROKE / 60
+    low = max(1, int(minutes))
+    return f"{low}-{low + 1} mins"
+
+
+class LevelCompiler:
+    """Compiles text into (level, stroke pack) with an LRU of encoded results"""
+
+    def __init__(self, service, capacity=LEVEL_CACHE_CAPACITY):
+        self.service = service
+        self.capacity = capacity
+        self._cache = OrderedDict()
+        self.hits = 0
+        self.misses = 0
+
+    def compile(self, text, name=None, difficulty='easy'):
+        """{"level", "strokes", "missing"} for the CJK characters of text"""
+        return self._compiled(text, name, difficulty)[0]
+
+    def compile_response(self, text, name=None, difficulty='easy'):
+        """Same result, encoded for the HTTP endpoint"""
+        return self._compiled(text, name, difficulty)[1]
+
+    def _compiled(self, text, name, difficulty):
+        """(result, Response), cached by text, name and difficulty"""
+        characters = ''.join(c for c in text if is_cjk(c))
+        if not characters:
+            raise ValueError('text contains no Chinese characters')
+        if len(characters) > MAX_TEXT_CHARACTERS:
+            raise ValueError(f'text is longer than {MAX_TEXT_CHARACTERS} characters')
+        if difficulty not in DIFFICULTY_MAX_HP:
+            raise ValueError(f"difficulty must be one of {', '.join(DIFFICULTY_MAX_HP)}")
+
+        # The description quotes the text itself, so punctuation and words are part of the key
+        key = (text.strip(), name, difficulty)
+        cached = self._cache.get(key)
+        if cached is not None:
+            self._cache.move_to_end(key)
+            self.hits += 1
+            return cached
+
+        self.misses += 1
+        result = self._compile(text, characters, name, difficulty)
+        cached = (result, json_response(result))
+        self._cache[key] = cached
+        if len(self._cache) > self.capacity:
+            self._cache.popitem(last=False)
+        return cached
+
+    def _compile(self, text, characters, name, difficulty):
+        pack = {}
+        missing = []
+        total_strokes = 0
+        for char in characters:
+            if char in pack:
+                total_strokes += pack[char]['totalStrokes']
+                continue
+            entry = self.service.character_entry(ord(char))
+            if entry is None:
+                if char not in missing:
+                    missing.append(char)
+                continue
+            pack[char] = entry
+            total_strokes += entry['totalStrokes']
+
+        # One leaderboard board per (characters, difficulty): easy and hard runs are not comparable
+        digest = hashlib.sha1(f'{difficulty}:{characters}'.encode('utf-8')).hexdigest()[:10]
+        level = {
+            'id': f'custom_{digest}',
+            'name': name or characters[:8],
+            'description': text.strip()[:30] + ('...' if len(text.strip()) > 30 else ''),
+            'characters': ''.join(c for c in characters if c in pack),
+            'numCharacters': sum(1 for c in characters if c in pack),
+            'totalStrokes': total_strokes,
+            'difficulty': difficulty,
+            'maxHP': DIFFICULTY_MAX_HP[difficulty],
+            'estimatedTime': estimated_time(total_strokes)
+        }
+        strokes = {
+            'schemaVersion': SCHEMA_VERSION,
+            'sourceFile': level['id'],
+            'totalCharacters': len(pack) + len(missing),
+            'successfulCharacters': len(pack),
+            'failedCharacters': len(missing),
+            'characters': pack
+        }
+        return {'level': level, 'strokes': strokes, 'missing': missing}
+
+    def stats(self):
+        return {'cachedLevels': len(self._cache), 'hits': self.hits, 'misses': self.misses,
+                'characterHits': self.service.hits, 'characterMisses': self.service.misses}
+
+
+def route(compiler, request):
+    """Return (status, Response or None) for a request"""
+    parts = request.parts
+
+    if parts == ['stats'] and request.method == 'GET':
+        return 200, json_response(compiler.stats(), etag=False)
+
+    if parts != ['compile']:
+        return 404, None
+
+    if request.method == 'GET':
+        options = {key: values[0] for key, values in request.query.items() if values}
+    elif request.method == 'POST':
+        if request.headers.get('content-type', '').startswith('application/json'):
+            try:
+                options = request.json()
+            except ValueError:
+                return 400, json_response({'error': 'invalid JSON'}, etag=False)
+            if not isinstance(options, dict):
+                return 400, json_response({'error': 'expected a JSON object'}, etag=False)
+        else:
+            options = {'text': request.body.decode('utf-8', errors='replace')}
+    else:
+        return 405, None
+
+    try:
+        name = options.get('name')
+        response = compiler.compile_response(str(options.get('text', '')), str(name) if name else None,
+                                             str(options.get('difficulty') or 'easy'))
+    except ValueError as e:
+        return 400, json_response({'error': str(e)}, etag=False)
+    return 200, response
+
+
+async def serve(port=DEFAULT_PORT, store_file=DEFAULT_GRAPHICS_STORE_FILE, host='127.0.0.1'):
+    """Run the server until cancelled"""
+    with CharacterStore(store_file) as store:
+        compiler = LevelCompiler(StrokeDataService(store))
+        server = await start_server(lambda request: route(compiler, request), host, port)
+        print(f"Compiling levels from {len(store)} characters in {store_file}")
+        print(f"  POST http://localhost:{port}/compile")
+        print("Press Ctrl+C to stop the server")
+        async with server:
+            await server.serve_forever()
+
+
+def main():
+    """Main function"""
+    if len(sys.argv) < 2 or sys.argv[1] not in ('serve', 'compile'):
+        print("Usage: python level_compiler.py serve [port]")
+        print("       python level_compiler.py compile <text> [difficulty]")
+        return
+
+    if not os.path.exists(DEFAULT_GRAPHICS_STORE_FILE):
+        print(f"Error: File '{DEFAULT_GRAPHICS_STORE_FILE}' not found")
+        print("Run 'python character_store.py build ../data/graphics.txt' first")
+        return
+    if store_source(DEFAULT_GRAPHICS_STORE_FILE) != SOURCE_GRAPHICS:
+        # A store of only the level characters would report most pasted text as missing
+        print(f"Error: '{DEFAULT_GRAPHICS_STORE_FILE}' was not built from graphics.txt")
+        print("Run 'python character_store.py build ../data/graphics.txt' to rebuild it")
+        return
+
+    if sys.argv[1] == 'serve':
+        port = int(sys.argv[2]) if len(sys.argv) > 2 else DEFAULT_PORT
+        try:
+            asyncio.run(serve(port))
+        except KeyboardInterrupt:
+            print("\nServer stopped")
+        return
+
+    if len(sys.argv) < 3:
+        print("Usage: python level_compiler.py compile <text> [difficulty]")
+        return
+    difficulty = sys.argv[3] if len(sys.argv) > 3 else 'easy'
+    with CharacterStore(DEFAULT_GRAPHICS_STORE_FILE) as store:
+        compiler = LevelCompiler(StrokeDataService(store))
+        start = time.perf_counter()
+        try:
+            result = compiler.compile(sys.argv[2], difficulty=difficulty)
+        except ValueError as e:
+            print(f"Error: {e}")
+            return
+        elapsed = time.perf_counter() - start
+
+    print(json.dumps(result['level'], ensure_ascii=False, indent=2))
+    print(f"\nStroke pack: {len(result['strokes']['characters'])} characters")
+    if result['missing']:
+        print(f"[WARNING] Not in store: {''.join(result['missing'])}")
+    print(f"Compiled in {elapsed * 1000:.2f} ms")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,239 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+Merge several stroke data sources into one graphics archive
+graphics.txt is the only offline source the generators read, so characters it
+lacks end up in failedCharacterList. This script merges graphics.txt with
+supplementary datasets into one codepoint-sorted source, written as its own
+graphics archive (data/graphics_merged.hza) and optionally as a plain
+graphics.txt-style file. find_graphics_file() in graphics_archive.py gives the
+merged archive precedence over data/graphics.hza for every reader, so rebuilding
+graphics.hza never hides or overwrites the merge. Once graphics.txt is
+downloaded again, readers skip the (now older) merge until it is rerun.
+
+Every source must be NDJSON (or a graphics archive) sorted by codepoint, like
+makemeahanzi's graphics.txt. The sources are read side by side in a k-way merge
+(heapq.merge), so memory use does not depend on their size. Sources are listed
+in priority order: for each character the first source with a usable record
+wins, and an unusable record (missing medians, a stroke that cannot be
+processed, ...) falls through to the next source.
+
+Records are normalized into the makemeahanzi schema
+{"character", "strokes": [SVG path, ...], "medians": [[[x, y], ...], ...]}. Accepted
+variants: "char" / "codepoint" instead of "character", median points as
+{"x", "y"}, and strokes as {"path", "median"} objects. Coordinates are taken as
+they are, so supplementary data must already use makemeahanzi's 1024 box.
+
+Usage:
+    python merge_stroke_sources.py <source> [<source> ...] [--archive out.hza] [--text out.txt]
+    python merge_stroke_sources.py ../data/graphics.txt ../data/extra_strokes.ndjson
+
+Sources are read exactly as given (no archive lookup next to them), and the
+default output is ../data/graphics_merged.hza.
+"""
+
+import heapq
+import itertools
+import json
+import os
+import sys
+import io
+import time
+
+from get_one_character_strokes import build_character_entry
+from graphics_archive import DEFAULT_MERGED_FILE, iter_file_lines, write_sorted_archive
+
+# Fix Windows console encoding
+if sys.stdout.encoding != 'utf-8':
+    try:
+        sys.stdout = io.TextIOWrapper(sys.stdout.buffer, encoding='utf-8', errors='replace')
+        sys.stderr = io.TextIOWrapper(sys.stderr.buffer, encoding='utf-8', errors='replace')
+    except:
+        pass
+
+SCHEMA_KEYS = ('character', 'strokes', 'medians')
+
+
+def record_character(record):
+    """Character of a source record, None if it has none"""
+    character = record.get('character') or record.get('char')
+    if not character and record.get('codepoint') is not None:
+        try:
+            character = chr(int(record['codepoint']))
+        except (TypeError, ValueError, OverflowError):
+            return None
+    return character if isinstance(character, str) and len(character) == 1 else None
+
+
+def normalize_record(record, character):
+    """Record in the makemeahanzi schema, raises ValueError when it is unusable"""
+    strokes = record.get('strokes')
+    medians = record.get('medians')
+    if isinstance(strokes, list) and strokes and all(isinstance(s, dict) for s in strokes):
+        if medians is None:
+            medians = [s.get('median') for s in strokes]
+        strokes = [s.get('path') for s in strokes]
+    if not isinstance(strokes, list) or not strokes or not all(isinstance(s, str) and s for s in strokes):
+        raise ValueError('no stroke paths')
+    if not isinstance(medians, list) or len(medians) != len(strokes):
+        raise ValueError('medians do not match strokes')
+
+    normalized_medians = []
+    for median in medians:
+        if not isinstance(median, list):
+            raise ValueError('median is not a list of points')
+        points = []
+        for point in median:
+            if isinstance(point, dict):
+                point = [point.get('x'), point.get('y')]
+            if not isinstance(point, list) or len(point) < 2:
+                raise ValueError('invalid median point')
+            points.append([point[0], point[1]])
+        normalized_medians.append(points)
+
+    normalized = {'character': character, 'strokes': strokes, 'medians': normalized_medians}
+    # Same check the generators apply, so a merged record is never rejected later
+    build_character_entry(character, normalized)
+    return normalized
+
+
+def iter_source(filename, priority, stats):
+    """Yield (codepoint, priority, line number, record) in codepoint order"""
+    last = -1
+    for number, line in enumerate(iter_file_lines(filename)):
+        if not line.strip():
+            continue
+        try:
+            record = json.loads(line)
+        except json.JSONDecodeError:
+            stats['unreadable'] += 1
+            continue
+        character = record_character(record) if isinstance(record, dict) else None
+        if character is None:
+            stats['unreadable'] += 1
+            continue
+        codepoint = ord(character)
+        if codepoint < last:
+            raise ValueError(f"{filename} is not sorted by codepoint "
+                             f"(U+{codepoint:04X} after U+{last:04X})")
+        last = codepoint
+        stats['records'] += 1
+        yield codepoint, priority, number, (line, record)
+
+
+def merge_sources(sources, source_stats):
+    """Yield (codepoint, line bytes) with the best usable record per character"""
+    streams = [iter_source(filename, priority, source_stats[priority])
+               for priority, filename in enumerate(sources)]
+    merged = heapq.merge(*streams)
+    for codepoint, candidates in itertools.groupby(merged, key=lambda item: item[0]):
+        winner = None
+        for _, priority, _, (line, record) in candidates:
+            stats = source_stats[priority]
+            if winner is not None:
+                stats['overridden'] += 1
+                continue
+            try:
+                normalized = normalize_record(record, chr(codepoint))
+            except (ValueError, TypeError, KeyError, ZeroDivisionError):
+                stats['invalid'] += 1
+                continue
+            stats['used'] += 1
+            if list(record) == list(SCHEMA_KEYS) and normalized == record:
+                winner = line.rstrip('\r\n')   # already in the schema: keep the line as it is
+            else:
+                stats['normalized'] += 1
+                winner = json.dumps(normalized, ensure_ascii=False)
+        if winner is not None:
+            yield codepoint, winner.encode('utf-8') + b'\n'
+
+
+def write_merged(sources, archive_file, text_file=None):
+    """Merge sources into archive_file (and text_file), returns (records, blocks, per-source stats)"""
+    source_stats = [{'records': 0, 'used': 0, 'normalized': 0, 'overridden': 0,
+                     'invalid': 0, 'unreadable': 0} for _ in sources]
+    records = merge_sources(sources, source_stats)
+    if not text_file:
+        count, blocks = write_sorted_archive(records, archive_file)
+        return count, blocks, source_stats
+
+    tmp_file = text_file + '.tmp'
+    try:
+        with open(tmp_file, 'wb') as f:
+            def tee():
+                for codepoint, line in records:
+                    f.write(line)
+                    yield codepoint, line
+            count, blocks = write_sorted_archive(tee(), archive_file)
+    except BaseException:
+        if os.path.exists(tmp_file):
+            os.remove(tmp_file)
+        raise
+    os.replace(tmp_file, text_file)
+    return count, blocks, source_stats
+
+
+def main():
+    """Main function"""
+    args = sys.argv[1:]
+    archive_file = DEFAULT_MERGED_FILE
+    text_file = None
+    sources = []
+    i = 0
+    while i < len(args):
+        if args[i] == '--archive' and i + 1 < len(args):
+            archive_file = args[i + 1]
+            i += 2
+        elif args[i] == '--text' and i + 1 < len(args):
+            text_file = args[i + 1]
+            i += 2
+        else:
+            sources.append(args[i])
+            i += 1
+
+    if not sources:
+        print("Usage: python merge_stroke_sources.py <source> [<source> ...] [--archive out.hza] [--text out.txt]")
+        print("Sources are NDJSON files (or graphics archives) sorted by codepoint, highest priority first")
+        return
+
+    for source in sources:
+        if not os.path.exists(source):
+            print(f"Error: File '{source}' not found")
+            return
+    outputs = {os.path.realpath(path) for path in (archive_file, text_file) if path}
+    for source in sources:
+        if os.path.realpath(source) in outputs:
+            print(f"Error: '{source}' is also an output file, write the merge somewhere else first")
+            return
+
+    print("=" * 70)
+    print("MERGING STROKE SOURCES")
+    print("=" * 70)
+    for priority, source in enumerate(sources, 1):
+        print(f"  {priority}. {source}")
+    print()
+
+    start = time.perf_counter()
+    try:
+        count, blocks, source_stats = write_merged(sources, archive_file, text_file)
+    except ValueError as e:
+        print(f"Error: {e}")
+        return
+    elapsed = time.perf_counter() - start
+
+    print(f"  {'source':<36}{'records':>9}{'used':>8}{'normalized':>12}{'overridden':>12}{'invalid':>9}")
+    for source, stats in zip(sources, source_stats):
+        print(f"  {os.path.basename(source)[:35]:<36}{stats['records']:>9}{stats['used']:>8}"
+              f"{stats['normalized']:>12}{stats['overridden']:>12}{stats['invalid'] + stats['unreadable']:>9}")
+    first = source_stats[0]['used']
+    print()
+    print(f"  Merged characters: {count} ({count - first} more than {os.path.basename(sources[0])} alone)")
+    print(f"  Archive: {archive_file} ({blocks} blocks, {os.path.getsize(archive_file) / (1024*1024):.2f} MB)")
+    if text_file:
+        print(f"  Text: {text_file} ({os.path.getsize(text_file) / (1024*1024):.2f} MB)")
+    print(f"  Merge time: {elapsed:.2f}s")
+    print("=" * 70)
+
+
+if __name__ == "__main__":
+    main()
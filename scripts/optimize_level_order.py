@@ -0,0 +1,258 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+Curriculum optimizer for level ordering in level_config.json
+The current order (and the index-based difficulty from convert_224_to_levels.py)
+ignores how many new characters each level introduces. This script represents each
+level's character set as a bitset over the corpus vocabulary and orders levels
+greedily: the next level is always the one whose not-yet-learned characters cost
+the fewest strokes. New-character load then ramps up smoothly from level to level.
+
+Costs only ever drop as characters are learned, so the greedy pick runs on a
+bucket queue with lazy updates driven by an inverted index (character -> levels).
+Each character triggers updates once, which keeps 100k-level corpora to seconds.
+
+Usage:
+    python optimize_level_order.py [--dry-run] [--assign-difficulty]
+    python optimize_level_order.py benchmark [levels]
+
+Leading 'lesson_' levels stay pinned at the start. Stroke counts come from
+data/all_strokes.json when available (unknown characters count as DEFAULT_STROKES).
+"""
+
+import heapq
+import json
+import os
+import random
+import sys
+import io
+import time
+
+# Fix Windows console encoding
+if sys.stdout.encoding != 'utf-8':
+    try:
+        sys.stdout = io.TextIOWrapper(sys.stdout.buffer, encoding='utf-8', errors='replace')
+        sys.stderr = io.TextIOWrapper(sys.stderr.buffer, encoding='utf-8', errors='replace')
+    except:
+        pass
+
+DEFAULT_STROKES = 10
+
+# Same HP per difficulty as convert_224_to_levels.py
+DIFFICULTY_MAX_HP = {'easy': 100, 'medium': 150, 'hard': 200}
+DIFFICULTY_ORDER = ['easy', 'medium', 'hard']
+
+
+def is_cjk(char):
+    return '一' <= char <= '鿿'
+
+
+def load_stroke_counts(filename='../data/all_strokes.json'):
+    """{character: stroke count} from all_strokes.json, empty if unavailable"""
+    if not os.path.exists(filename):
+        return {}
+    with open(filename, 'r', encoding='utf-8') as f:
+        data = json.load(f)
+    return {char: entry.get('totalStrokes') or DEFAULT_STROKES
+            for char, entry in data.get('characters', {}).items()}
+
+
+class Curriculum:
+    """Levels as bitsets over a shared vocabulary"""
+
+    def __init__(self, level_texts, stroke_counts=None):
+        stroke_counts = stroke_counts or {}
+        self.vocabulary = []
+        self.vocab_ids = {}
+        self.level_bits = []
+        self.level_chars = []
+        for text in level_texts:
+            bits = 0
+            ids = []
+            for char in text:
+                if not is_cjk(char):
+                    continue
+                char_id = self.vocab_ids.get(char)
+                if char_id is None:
+                    char_id = len(self.vocabulary)
+                    self.vocab_ids[char] = char_id
+                    self.vocabulary.append(char)
+                if not bits >> char_id & 1:
+                    bits |= 1 << char_id
+                    ids.append(char_id)
+            self.level_bits.append(bits)
+            self.level_chars.append(ids)
+        self.weights = [stroke_counts.get(char, DEFAULT_STROKES) for char in self.vocabulary]
+
+    def __len__(self):
+        return len(self.level_bits)
+
+    def _ids(self, bits):
+        while bits:
+            low = bits & -bits
+            yield low.bit_length() - 1
+            bits ^= low
+
+    def new_load(self, order):
+        """(new characters, new strokes) introduced by each level in the given order"""
+        learned = 0
+        loads = []
+        for level in order:
+            new = self.level_bits[level] & ~learned
+            learned |= new
+            ids = list(self._ids(new))
+            loads.append((len(ids), sum(self.weights[i] for i in ids)))
+        return loads
+
+    def optimize(self, pinned=0):
+        """Greedy order: keep the first `pinned` levels, then always pick the cheapest level"""
+        order = list(range(pinned))
+        learned = 0
+        for level in order:
+            learned |= self.level_bits[level]
+
+        # Inverted index: character -> levels (not yet placed) that contain it
+        postings = [[] for _ in self.vocabulary]
+        cost = [0] * len(self)
+        for level in range(pinned, len(self)):
+            for char_id in self.level_chars[level]:
+                if not learned >> char_id & 1:
+                    postings[char_id].append(level)
+                    cost[level] += self.weights[char_id]
+
+        # Bucket queue keyed by cost (costs are small integers that only decrease);
+        # within a bucket the earlier level in the current order wins
+        buckets = {}
+        for level in range(pinned, len(self)):
+            buckets.setdefault(cost[level], []).append(level)
+        lowest = min(buckets) if buckets else 0
+        placed = [False] * len(self)
+
+        while len(order) < len(self):
+            while not buckets.get(lowest):
+                lowest += 1
+            level = heapq.heappop(buckets[lowest])
+            if placed[level] or cost[level] != lowest:
+                continue  # stale entry
+            placed[level] = True
+            order.append(level)
+
+            new = self.level_bits[level] & ~learned
+            learned |= new
+            touched = set()
+            for char_id in self._ids(new):
+                weight = self.weights[char_id]
+                for other in postings[char_id]:
+                    if not placed[other]:
+                        cost[other] -= weight
+                        touched.add(other)
+                postings[char_id] = None
+            for other in touched:
+                heapq.heappush(buckets.setdefault(cost[other], []), other)
+                lowest = min(lowest, cost[other])
+        return order
+
+
+def smoothness(loads):
+    """Sum of positive jumps in new-stroke load between consecutive levels (lower is smoother)"""
+    return sum(max(0, b[1] - a[1]) for a, b in zip(loads, loads[1:]))
+
+
+def print_comparison(curriculum, current, optimized, groups=5):
+    before = curriculum.new_load(current)
+    after = curriculum.new_load(optimized)
+    size = max(1, len(current) // groups)
+    print()
+    print("=" * 70)
+    print("NEW-CHARACTER LOAD PER GROUP (new chars / new strokes)")
+    print("=" * 70)
+    print(f"  {'group':<10}{'current':>20}{'optimized':>20}")
+    for g in range(groups):
+        end = (g + 1) * size if g < groups - 1 else len(current)
+        b = before[g * size:end]
+        a = after[g * size:end]
+        print(f"  {g + 1:<10}{sum(x[0] for x in b):>10}/{sum(x[1] for x in b):<9}"
+              f"{sum(x[0] for x in a):>10}/{sum(x[1] for x in a):<9}")
+    print(f"  Vocabulary: {len(curriculum.vocabulary)} characters")
+    print(f"  Load jumps (lower is smoother): {smoothness(before)} -> {smoothness(after)}")
+    print("=" * 70)
+
+
+def assign_difficulty(levels):
+    """Hand out the existing easy/medium/hard counts along the new order"""
+    difficulties = sorted((level.get('difficulty', 'easy') for level in levels),
+                          key=lambda d: DIFFICULTY_ORDER.index(d) if d in DIFFICULTY_ORDER else 0)
+    for level, difficulty in zip(levels, difficulties):
+        level['difficulty'] = difficulty
+        level['maxHP'] = DIFFICULTY_MAX_HP.get(difficulty, level.get('maxHP'))
+
+
+def run_benchmark(num_levels, config_file='../level_config.json', seed=0):
+    """Time optimize() on a synthetic corpus drawn from the real vocabulary"""
+    with open(config_file, 'r', encoding='utf-8') as f:
+        config = json.load(f)
+    text = ''.join(level.get('characters', '') for level in config.get('levels', []))
+    vocab = sorted({c for c in text if is_cjk(c)})
+    # Extend with rarer characters so the vocabulary keeps growing with the corpus
+    vocab += [chr(0x4e00 + i) for i in range(0, 20000, 3) if chr(0x4e00 + i) not in vocab]
+    rng = random.Random(seed)
+    weights = [1 / (rank + 1) for rank in range(len(vocab))]  # Zipf-like frequencies
+
+    print(f"Generating {num_levels} synthetic levels over {len(vocab)} characters...")
+    texts = [''.join(rng.choices(vocab, weights, k=rng.randint(20, 56))) for _ in range(num_levels)]
+    curriculum = Curriculum(texts)
+
+    start = time.perf_counter()
+    order = curriculum.optimize()
+    elapsed = time.perf_counter() - start
+    print(f"  Levels ordered: {len(order)}")
+    print(f"  Vocabulary: {len(curriculum.vocabulary)}")
+    print(f"  Optimize time: {elapsed:.2f}s")
+
+
+def main():
+    """Main function"""
+    if len(sys.argv) > 1 and sys.argv[1] == 'benchmark':
+        run_benchmark(int(sys.argv[2]) if len(sys.argv) > 2 else 100000)
+        return
+
+    config_file = '../level_config.json'
+    if not os.path.exists(config_file):
+        print(f"Error: File '{config_file}' not found")
+        return
+
+    with open(config_file, 'r', encoding='utf-8') as f:
+        config = json.load(f)
+    levels = config.get('levels', [])
+
+    pinned = 0
+    while pinned < len(levels) and str(levels[pinned].get('id', '')).startswith('lesson_'):
+        pinned += 1
+
+    stroke_counts = load_stroke_counts()
+    if not stroke_counts:
+        print(f"Note: data/all_strokes.json not found, every character counts as {DEFAULT_STROKES} strokes")
+
+    curriculum = Curriculum([level.get('characters', '') for level in levels], stroke_counts)
+    start = time.perf_counter()
+    order = curriculum.optimize(pinned)
+    elapsed = time.perf_counter() - start
+
+    print(f"Optimized order for {len(levels)} levels ({pinned} pinned) in {elapsed * 1000:.1f} ms")
+    print_comparison(curriculum, list(range(len(levels))), order)
+
+    if '--dry-run' in sys.argv:
+        print("\nDry run, level_config.json not modified")
+        return
+
+    config['levels'] = [levels[i] for i in order]
+    if '--assign-difficulty' in sys.argv:
+        assign_difficulty(config['levels'])
+
+    with open(config_file, 'w', encoding='utf-8') as f:
+        json.dump(config, f, ensure_ascii=False, indent=2)
+    print(f"\n[OK] Wrote new level order to {config_file}")
+
+
+if __name__ == '__main__':
+    main()
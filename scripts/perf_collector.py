@@ -0,0 +1,309 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+Collector for client performance beacons
+When PERF_BEACON_URL is set in js/game.js, the game batches load timings
+(level_config.json, all_strokes.json download and parse, level start) and sends
+them here with navigator.sendBeacon. Timings are folded into streaming quantile
+sketches per (metric, build commit, device class), so p50/p95/p99 are available
+at any time without keeping individual samples.
+
+Each sketch is a log-bucketed histogram (the DDSketch idea): quantiles are within
+RELATIVE_ACCURACY of the true value and a sketch never holds more than
+MAX_BUCKETS counters. At most MAX_SERIES sketches are kept; the series updated
+least recently is dropped first.
+
+Every REPORT_INTERVAL seconds with new beacons, a report is printed and written
+to ../data/perf_reports/.
+
+Endpoints:
+    POST /beacon     {"build": "abc1234", "device": "mobile-low",
+                      "timings": [{"metric": "strokesParse", "ms": 182.4}, ...]}
+    GET  /report     current percentiles for every series
+    GET  /stats      beacon / timing / rejection counters
+
+Usage:
+    python perf_collector.py [port] [report_dir]
+"""
+
+import asyncio
+import json
+import math
+import os
+import re
+import sys
+import io
+import time
+from collections import OrderedDict
+from datetime import datetime
+
+from async_http import json_response, start_server
+
+# Fix Windows console encoding
+if sys.stdout.encoding != 'utf-8':
+    try:
+        sys.stdout = io.TextIOWrapper(sys.stdout.buffer, encoding='utf-8', errors='replace')
+        sys.stderr = io.TextIOWrapper(sys.stderr.buffer, encoding='utf-8', errors='replace')
+    except:
+        pass
+
+DEFAULT_PORT = 8030
+DEFAULT_REPORT_DIR = '../data/perf_reports'
+
+RELATIVE_ACCURACY = 0.01   # quantiles within 1% of the true value
+MAX_BUCKETS = 1024         # counters per sketch (lowest buckets merge beyond this)
+MIN_TRACKED_MS = 0.01      # smaller timings are counted as zero
+MAX_SERIES = 2000          # (metric, build, device) sketches kept in memory
+REPORT_INTERVAL = 60       # seconds between reports
+QUANTILES = (0.5, 0.95, 0.99)
+
+MAX_TIMINGS_PER_BEACON = 100
+MAX_TIMING_MS = 10 * 60 * 1000
+NAME_PATTERN = re.compile(r'^[A-Za-z0-9_.\-]{1,64}$')
+
+
+class QuantileSketch:
+    """Log-bucketed histogram with relative-error quantiles and bounded size"""
+
+    __slots__ = ('gamma', '_log_gamma', 'max_buckets', 'buckets', 'zero_count', 'count', 'total', 'min', 'max')
+
+    def __init__(self, accuracy=RELATIVE_ACCURACY, max_buckets=MAX_BUCKETS):
+        self.gamma = (1 + accuracy) / (1 - accuracy)
+        self._log_gamma = math.log(self.gamma)
+        self.max_buckets = max_buckets
+        self.buckets = {}
+        self.zero_count = 0
+        self.count = 0
+        self.total = 0.0
+        self.min = math.inf
+        self.max = -math.inf
+
+    def add(self, value):
+        self.count += 1
+        self.total += value
+        self.min = min(self.min, value)
+        self.max = max(self.max, value)
+        if value < MIN_TRACKED_MS:
+            self.zero_count += 1
+            return
+        key = math.ceil(math.log(value) / self._log_gamma)
+        self.buckets[key] = self.buckets.get(key, 0) + 1
+        if len(self.buckets) > self.max_buckets:
+            self._collapse()
+
+    def _collapse(self):
+        """Merge the lowest buckets so the high quantiles keep their accuracy"""
+        keys = sorted(self.buckets)
+        excess = len(keys) - self.max_buckets
+        merged = sum(self.buckets.pop(key) for key in keys[:excess])
+        self.buckets[keys[excess]] += merged
+
+    def merge(self, other):
+        for key, count in other.buckets.items():
+            self.buckets[key] = self.buckets.get(key, 0) + count
+        self.zero_count += other.zero_count
+        self.count += other.count
+        self.total += other.total
+        self.min = min(self.min, other.min)
+        self.max = max(self.max, other.max)
+        if len(self.buckets) > self.max_buckets:
+            self._collapse()
+
+    def quantile(self, q):
+        """Estimated value at quantile q (0-1), None when empty"""
+        if not self.count:
+            return None
+        rank = q * (self.count - 1)
+        seen = self.zero_count
+        if rank < seen:
+            return 0.0
+        for key in sorted(self.buckets):
+            seen += self.buckets[key]
+            if seen > rank:
+                value = 2 * self.gamma ** key / (self.gamma + 1)
+                return min(max(value, self.min), self.max)
+        return self.max
+
+    def summary(self):
+        result = {'count': self.count, 'mean': self.total / self.count if self.count else None,
+                  'min': self.min if self.count else None, 'max': self.max if self.count else None}
+        for q in QUANTILES:
+            result[f'p{round(q * 100)}'] = self.quantile(q)
+        return result
+
+
+def _name(value, default):
+    value = str(value) if value is not None else ''
+    return value if NAME_PATTERN.match(value) else default
+
+
+class PerfCollector:
+    """Quantile sketches per (metric, build, device), least recently updated dropped first"""
+
+    def __init__(self, max_series=MAX_SERIES):
+        self.max_series = max_series
+        self._series = OrderedDict()
+        self.started = time.time()
+        self.stats = {'beacons': 0, 'timings': 0, 'rejectedTimings': 0,
+                      'rejectedBeacons': 0, 'seriesEvicted': 0}
+        self.updates_since_report = 0
+
+    def __len__(self):
+        return len(self._series)
+
+    def add_beacon(self, beacon):
+        """Fold one beacon into the sketches, returns the number of timings accepted"""
+        timings = beacon.get('timings') if isinstance(beacon, dict) else None
+        if not isinstance(timings, list) or not timings or len(timings) > MAX_TIMINGS_PER_BEACON:
+            self.stats['rejectedBeacons'] += 1
+            raise ValueError(f'expected 1-{MAX_TIMINGS_PER_BEACON} timings')
+        build = _name(beacon.get('build'), 'unknown')
+        device = _name(beacon.get('device'), 'unknown')
+
+        accepted = 0
+        for timing in timings:
+            try:
+                metric = timing['metric']
+                value = float(timing['ms'])
+            except (TypeError, KeyError, ValueError):
+                self.stats['rejectedTimings'] += 1
+                continue
+            # Only string names: a number would match the pattern once str()'d but
+            # then sit next to str keys, and sorting the report would fail
+            if not isinstance(metric, str) or not NAME_PATTERN.match(metric) or not 0 <= value <= MAX_TIMING_MS:
+                self.stats['rejectedTimings'] += 1
+                continue
+            self._sketch((metric, build, device)).add(value)
+            accepted += 1
+
+        self.stats['beacons'] += 1
+        self.stats['timings'] += accepted
+        self.updates_since_report += accepted
+        return accepted
+
+    def _sketch(self, key):
+        sketch = self._series.get(key)
+        if sketch is not None:
+            self._series.move_to_end(key)
+            return sketch
+        sketch = self._series[key] = QuantileSketch()
+        if len(self._series) > self.max_series:
+            self._series.popitem(last=False)
+            self.stats['seriesEvicted'] += 1
+        return sketch
+
+    def report(self):
+        """Percentiles per series, plus every device class combined per (metric, build)"""
+        series = []
+        combined = {}
+        for (metric, build, device), sketch in self._series.items():
+            series.append(dict({'metric': metric, 'build': build, 'device': device}, **sketch.summary()))
+            total = combined.get((metric, build))
+            if total is None:
+                total = combined[(metric, build)] = QuantileSketch()
+            total.merge(sketch)
+        for (metric, build), sketch in combined.items():
+            series.append(dict({'metric': metric, 'build': build, 'device': '*'}, **sketch.summary()))
+        series.sort(key=lambda s: (s['metric'], s['build'], s['device']))
+        return {
+            'generated': datetime.now().isoformat(),
+            'since': datetime.fromtimestamp(self.started).isoformat(),
+            'relativeAccuracy': RELATIVE_ACCURACY,
+            'stats': dict(self.stats, series=len(self._series)),
+            'series': series
+        }
+
+
+def print_report(report):
+    print()
+    print("=" * 70)
+    print(f"PERFORMANCE REPORT {report['generated'][:19]}")
+    print("=" * 70)
+    print(f"  {'metric':<16}{'build':<10}{'device':<13}{'count':>7}{'p50':>9}{'p95':>9}{'p99':>9}")
+    for s in report['series']:
+        print(f"  {s['metric'][:15]:<16}{s['build'][:9]:<10}{s['device'][:12]:<13}{s['count']:>7}"
+              f"{s['p50']:>9.0f}{s['p95']:>9.0f}{s['p99']:>9.0f}")
+    stats = report['stats']
+    print(f"  {stats['beacons']} beacons, {stats['timings']} timings, "
+          f"{stats['rejectedTimings']} rejected, {stats['series']} series (ms)")
+    print("=" * 70)
+
+
+def write_report(report, report_dir):
+    """Write a report as perf_<timestamp>.json, returns the path"""
+    os.makedirs(report_dir, exist_ok=True)
+    path = os.path.join(report_dir, f"perf_{datetime.now():%Y%m%d_%H%M%S}.json")
+    with open(path, 'w', encoding='utf-8') as f:
+        json.dump(report, f, ensure_ascii=False, indent=2)
+    return path
+
+
+def route(collector, request):
+    """Return (status, Response or None) for a request"""
+    parts = request.parts
+
+    if parts == ['stats'] and request.method == 'GET':
+        return 200, json_response(dict(collector.stats, series=len(collector)), etag=False)
+
+    if parts == ['report'] and request.method == 'GET':
+        return 200, json_response(collector.report(), etag=False)
+
+    if parts != ['beacon']:
+        return 404, None
+    if request.method != 'POST':
+        return 405, None
+
+    # sendBeacon posts text/plain to avoid a CORS preflight, so ignore the content type
+    try:
+        beacon = request.json()
+        accepted = collector.add_beacon(beacon)
+    except ValueError as e:
+        return 400, json_response({'error': str(e)}, etag=False)
+    return 200, json_response({'accepted': accepted}, etag=False)
+
+
+async def report_loop(collector, report_dir, interval=REPORT_INTERVAL):
+    while True:
+        await asyncio.sleep(interval)
+        if not collector.updates_since_report:
+            continue
+        collector.updates_since_report = 0
+        report = collector.report()
+        print_report(report)
+        try:
+            print(f"  Wrote: {write_report(report, report_dir)}")
+        except OSError as e:
+            print(f"  [ERROR] Writing report: {e}")
+
+
+async def serve(port=DEFAULT_PORT, report_dir=DEFAULT_REPORT_DIR, host='127.0.0.1'):
+    """Run the server until cancelled"""
+    collector = PerfCollector()
+    server = await start_server(lambda request: route(collector, request), host, port)
+    reporter = asyncio.create_task(report_loop(collector, report_dir))
+    print(f"Performance beacon collector on http://localhost:{port}/beacon")
+    print(f"  Reports every {REPORT_INTERVAL}s to: {report_dir}")
+    print("Press Ctrl+C to stop the server")
+    try:
+        async with server:
+            await server.serve_forever()
+    finally:
+        reporter.cancel()
+        if collector.updates_since_report:
+            report = collector.report()
+            print_report(report)
+            print(f"  Wrote: {write_report(report, report_dir)}")
+
+
+def main():
+    """Main function"""
+    port = int(sys.argv[1]) if len(sys.argv) > 1 else DEFAULT_PORT
+    report_dir = sys.argv[2] if len(sys.argv) > 2 else DEFAULT_REPORT_DIR
+    try:
+        asyncio.run(serve(port, report_dir))
+    except KeyboardInterrupt:
+        print("\nServer stopped")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,316 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+Progress sync backend with write coalescing
+saveGameProgress / saveCharacterIndex in js/auth.js write localStorage after every
+character, which ties progress to one device. When PROGRESS_SYNC_URL is set in
+auth.js, the client also sends those updates here.
+
+Updates land in an in-memory cache straight away, so reads always see the
+latest state. Every field keeps the timestamp of its last write
+(fieldTimestamps), so a late update only loses the fields that were written
+again since; e.g. a delayed currentLevel / hp save still lands after a newer
+characterIndex update. A background flusher then writes all users touched since the
+last flush in one SQLite transaction (WAL mode, see write_batcher.py). A burst
+of updates from one user becomes one row write.
+
+Players are identified by an opaque random id the client keeps in localStorage
+(never an email address), so knowing who a player is does not give access to
+their progress. The game has no verified sign-in to derive that id from, so a
+second device joins with a link code instead: the first device asks for a
+short-lived one-time code, the player types it on the second device, and
+redeeming it hands over the same id.
+
+Endpoints:
+    POST /progress/<player id>   partial update, e.g. {"characterIndex": 12, "timestamp": ...}
+    GET  /progress/<player id>   merged progress for the user
+    POST /link/<player id>       one-time code for another device, {"code", "expiresIn"}
+    POST /link/redeem            {"code": "..."} -> {"playerId": ...}, the code is used up
+    GET  /stats                  update / write / transaction counters
+
+Usage:
+    python progress_server.py [port] [database_file]
+"""
+
+import asyncio
+import json
+import os
+import re
+import secrets
+import sqlite3
+import sys
+import io
+import itertools
+import time
+from collections import OrderedDict
+from concurrent.futures import ThreadPoolExecutor
+
+from async_http import json_response, start_server
+from write_batcher import WriteBatcher, flush_periodically
+
+# Fix Windows console encoding
+if sys.stdout.encoding != 'utf-8':
+    try:
+        sys.stdout = io.TextIOWrapper(sys.stdout.buffer, encoding='utf-8', errors='replace')
+        sys.stderr = io.TextIOWrapper(sys.stderr.buffer, encoding='utf-8', errors='replace')
+    except:
+        pass
+
+DEFAULT_PORT = 8010
+DEFAULT_DATABASE = '../data/progress.db'
+
+FLUSH_INTERVAL = 0.25     # seconds between batched transactions
+CACHE_CAPACITY = 100000   # users kept in memory
+
+# Opaque ids generated by getProgressSyncId in js/auth.js (also used by leaderboard_server.py)
+PLAYER_ID_PATTERN = re.compile(r'^[A-Za-z0-9_-]{22,64}$')
+
+# Link codes: 10 characters from an unambiguous alphabet (~50 bits), valid for 10 minutes
+LINK_CODE_ALPHABET = 'ABCDEFGHJKLMNPQRSTUVWXYZ23456789'
+LINK_CODE_LENGTH = 10
+LINK_CODE_TTL = 600
+
+# Fields the client may send, mirroring the progress object in js/auth.js
+PROGRESS_FIELDS = ('currentLevel', 'hp', 'characterIndex', 'levelStates')
+
+SCHEMA = '''
+CREATE TABLE IF NOT EXISTS progress (
+    user_id    TEXT PRIMARY KEY,
+    state      TEXT NOT NULL,
+    updated_at INTEGER NOT NULL
+)
+'''
+
+
+class ProgressStore:
+    """SQLite persistence; every call runs on one dedicated thread"""
+
+    def __init__(self, filename):
+        self.filename = filename
+        self._executor = ThreadPoolExecutor(max_workers=1)
+        self._connection = None
+
+    def _open(self):
+        self._connection = sqlite3.connect(self.filename, check_same_thread=False)
+        self._connection.execute('PRAGMA journal_mode=WAL')
+        self._connection.execute('PRAGMA synchronous=NORMAL')
+        self._connection.execute(SCHEMA)
+        self._connection.commit()
+
+    def _read(self, user_id):
+        row = self._connection.execute(
+            'SELECT state FROM progress WHERE user_id = ?', (user_id,)).fetchone()
+        return json.loads(row[0]) if row else None
+
+    def _write_batch(self, rows):
+        with self._connection:
+            self._connection.executemany(
+                'INSERT INTO progress (user_id, state, updated_at) VALUES (?, ?, ?) '
+                'ON CONFLICT(user_id) DO UPDATE SET state = excluded.state, updated_at = excluded.updated_at',
+                rows)
+
+    def _close(self):
+        if self._connection:
+            self._connection.close()
+
+    async def _run(self, func, *args):
+        return await asyncio.get_running_loop().run_in_executor(self._executor, func, *args)
+
+    async def open(self):
+        await self._run(self._open)
+
+    async def read(self, user_id):
+        return await self._run(self._read, user_id)
+
+    async def write_batch(self, rows):
+        await self._run(self._write_batch, rows)
+
+    async def close(self):
+        await self._run(self._close)
+        self._executor.shutdown()
+
+
+class ProgressService:
+    """Read-through cache in front of ProgressStore with coalesced writes"""
+
+    def __init__(self, store, flush_interval=FLUSH_INTERVAL, cache_capacity=CACHE_CAPACITY):
+        self.store = store
+        self.flush_interval = flush_interval
+        self.cache_capacity = cache_capacity
+        self._cache = OrderedDict()
+        self._link_codes = {}    # code -> (player id, expiry time)
+        self._flush_task = None
+        self.stats = {'updates': 0, 'staleUpdates': 0, 'rowsWritten': 0,
+                      'transactions': 0, 'cacheHits': 0, 'cacheMisses': 0}
+        self._writer = WriteBatcher(store.write_batch, self._row, stats=self.stats)
+
+    async def start(self):
+        await self.store.open()
+        self._flush_task = asyncio.create_task(
+            flush_periodically(self.flush, self.flush_interval, 'progress'))
+
+    async def stop(self):
+        if self._flush_task:
+            self._flush_task.cancel()
+        await self.flush()
+        await self.store.close()
+
+    async def get(self, user_id):
+        state = self._cache.get(user_id)
+        if state is not None:
+            self._cache.move_to_end(user_id)
+            self.stats['cacheHits'] += 1
+            return state
+        self.stats['cacheMisses'] += 1
+        state = await self.store.read(user_id) or {}
+        # Another request may have filled the cache while we were reading
+        state = self._cache.setdefault(user_id, state)
+        self._trim_cache()
+        return state
+
+    async def update(self, user_id, changes):
+        """Merge an update into the cached state field by field; persisted by the next flush"""
+        timestamp = changes.get('timestamp') or int(time.time() * 1000)
+        if isinstance(timestamp, bool) or not isinstance(timestamp, (int, float)):
+            raise ValueError('timestamp must be a number')
+        state = await self.get(user_id)
+        field_timestamps = state.get('fieldTimestamps')
+        if field_timestamps is None:
+            # Rows written before per-field timestamps carry only the overall one
+            legacy = state.get('timestamp', 0)
+            field_timestamps = state['fieldTimestamps'] = {f: legacy for f in PROGRESS_FIELDS if f in state}
+        applied = False
+        for field in PROGRESS_FIELDS:
+            if field not in changes:
+                continue
+            if timestamp < field_timestamps.get(field, 0):
+                continue   # written again since (e.g. a late retry from another device)
+            state[field] = changes[field]
+            field_timestamps[field] = timestamp
+            applied = True
+        if not applied:
+            self.stats['staleUpdates'] += 1
+            return state
+        state['timestamp'] = max(timestamp, state.get('timestamp', 0))
+        self._writer.mark(user_id)
+        self.stats['updates'] += 1
+        return state
+
+    def create_link_code(self, user_id):
+        """New one-time code handing user_id to another device, returns (code, ttl seconds)"""
+        now = time.time()
+        for code, (_, expires) in list(self._link_codes.items()):
+            if expires <= now:
+                del self._link_codes[code]
+        code = ''.join(secrets.choice(LINK_CODE_ALPHABET) for _ in range(LINK_CODE_LENGTH))
+        self._link_codes[code] = (user_id, now + LINK_CODE_TTL)
+        return code, LINK_CODE_TTL
+
+    def redeem_link_code(self, code):
+        """Player id behind a link code (used up), None if unknown or expired"""
+        code = re.sub(r'[^A-Z0-9]', '', str(code).upper())
+        user_id, expires = self._link_codes.pop(code, (None, 0))
+        return user_id if expires > time.time() else None
+
+    def _trim_cache(self):
+        """Drop least recently used clean users above capacity"""
+        while len(self._cache) > self.cache_capacity:
+            # Never the most recent user: update() is about to change it
+            for user_id in itertools.islice(self._cache, len(self._cache) - 1):
+                if user_id not in self._writer:
+                    del self._cache[user_id]
+                    break
+            else:
+                return
+
+    def _row(self, user_id):
+        # Dirty users are never trimmed, so their state is always cached
+        state = self._cache[user_id]
+        return user_id, json.dumps(state, ensure_ascii=False), state['timestamp']
+
+    async def flush(self):
+        """Write every user dirty at call time in batched transactions"""
+        try:
+            await self._writer.flush()
+        finally:
+            self._trim_cache()
+
+
+async def route(service, request):
+    """Return (status, Response or None) for a request"""
+    parts = request.parts
+
+    if parts == ['stats'] and request.method == 'GET':
+        return 200, json_response(service.stats, etag=False)
+
+    if len(parts) == 2 and parts[0] == 'link':
+        if request.method != 'POST':
+            return 405, None
+        if parts[1] == 'redeem':
+            try:
+                body = request.json()
+            except ValueError:
+                return 400, json_response({'error': 'invalid JSON'}, etag=False)
+            user_id = service.redeem_link_code(body.get('code', '')) if isinstance(body, dict) else None
+            if user_id is None:
+                return 404, json_response({'error': 'unknown or expired link code'}, etag=False)
+            return 200, json_response({'playerId': user_id}, etag=False)
+        if not PLAYER_ID_PATTERN.match(parts[1]):
+            return 400, json_response({'error': 'expected an opaque player id'}, etag=False)
+        code, ttl = service.create_link_code(parts[1])
+        return 200, json_response({'code': code, 'expiresIn': ttl}, etag=False)
+
+    if len(parts) != 2 or parts[0] != 'progress':
+        return 404, None
+    user_id = parts[1]
+    if not PLAYER_ID_PATTERN.match(user_id):
+        return 400, json_response({'error': 'expected an opaque player id'}, etag=False)
+
+    if request.method == 'GET':
+        return 200, json_response(await service.get(user_id), etag=False)
+
+    if request.method in ('POST', 'PUT'):
+        try:
+            changes = request.json()
+        except ValueError:
+            return 400, json_response({'error': 'invalid JSON'}, etag=False)
+        if not isinstance(changes, dict):
+            return 400, json_response({'error': 'expected a JSON object'}, etag=False)
+        try:
+            state = await service.update(user_id, changes)
+        except ValueError as e:
+            return 400, json_response({'error': str(e)}, etag=False)
+        return 200, json_response(state, etag=False)
+
+    return 405, None
+
+
+async def serve(port=DEFAULT_PORT, database=DEFAULT_DATABASE, host='127.0.0.1'):
+    """Run the server until cancelled"""
+    os.makedirs(os.path.dirname(database) or '.', exist_ok=True)
+    service = ProgressService(ProgressStore(database))
+    await service.start()
+    server = await start_server(lambda request: route(service, request), host, port)
+    print(f"Progress sync server on http://localhost:{port}/progress/<user>")
+    print(f"  Database: {database} (WAL)")
+    print(f"  Flush interval: {FLUSH_INTERVAL * 1000:.0f} ms")
+    print("Press Ctrl+C to stop the server")
+    try:
+        async with server:
+            await server.serve_forever()
+    finally:
+        await service.stop()
+
+
+def main():
+    """Main function"""
+    port = int(sys.argv[1]) if len(sys.argv) > 1 else DEFAULT_PORT
+    database = sys.argv[2] if len(sys.argv) > 2 else DEFAULT_DATABASE
+    try:
+        asyncio.run(serve(port, database))
+    except KeyboardInterrupt:
+        print("\nServer stopped")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,151 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+Load test for progress_server.py
+Simulates players finishing characters in bursts: each client keeps one keep-alive
+connection and sends characterIndex updates (plus an occasional level save),
+then reads its progress back. Reports sustained updates/s and how well the
+server coalesced them into SQLite transactions.
+
+Usage:
+    python progress_server.py 8010 /tmp/progress.db      (in another terminal)
+    python progress_server_loadtest.py [clients] [updates_per_client] [port]
+
+Run the server pinned to one core (e.g. taskset -c 0) to measure single-core throughput.
+"""
+
+import asyncio
+import json
+import random
+import sys
+import io
+import time
+
+from stroke_server_loadtest import percentile
+
+# Fix Windows console encoding
+if sys.stdout.encoding != 'utf-8':
+    try:
+        sys.stdout = io.TextIOWrapper(sys.stdout.buffer, encoding='utf-8', errors='replace')
+        sys.stderr = io.TextIOWrapper(sys.stderr.buffer, encoding='utf-8', errors='replace')
+    except:
+        pass
+
+DEFAULT_CLIENTS = 500
+DEFAULT_UPDATES_PER_CLIENT = 200
+BURST_SIZE = 10   # updates sent back to back before a short pause
+
+
+async def request(reader, writer, method, target, payload=None):
+    """Send one request and return (status, decoded JSON body)"""
+    body = json.dumps(payload).encode('utf-8') if payload is not None else b''
+    head = f'{method} {target} HTTP/1.1\r\nHost: localhost\r\nContent-Length: {len(body)}\r\n'
+    if body:
+        head += 'Content-Type: application/json\r\n'
+    writer.write((head + '\r\n').encode('latin-1') + body)
+    await writer.drain()
+
+    status_line = await reader.readline()
+    if not status_line:
+        raise ConnectionError('connection closed')
+    status = int(status_line.split()[1])
+    length = 0
+    while True:
+        line = await reader.readline()
+        if line in (b'\r\n', b''):
+            break
+        name, _, value = line.decode('latin-1').partition(':')
+        if name.strip().lower() == 'content-length':
+            length = int(value)
+    data = await reader.readexactly(length) if length else b''
+    return status, json.loads(data) if data else None
+
+
+async def run_client(client_id, port, updates, latencies, stats):
+    """One simulated player sending bursts of progress updates"""
+    rng = random.Random(client_id)
+    user = f'loadtest-{client_id:016d}'
+    try:
+        reader, writer = await asyncio.open_connection('127.0.0.1', port)
+    except OSError:
+        stats['connect_errors'] += 1
+        return
+
+    try:
+        index = 0
+        for sent in range(updates):
+            index += 1
+            changes = {'characterIndex': index, 'timestamp': int(time.time() * 1000)}
+            if rng.random() < 0.05:
+                changes.update({'currentLevel': f'level_{rng.randint(1, 103)}', 'hp': rng.randint(0, 200)})
+            start = time.perf_counter()
+            status, _ = await request(reader, writer, 'POST', f'/progress/{user}', changes)
+            latencies.append(time.perf_counter() - start)
+            stats[status] = stats.get(status, 0) + 1
+            if (sent + 1) % BURST_SIZE == 0:
+                await asyncio.sleep(rng.uniform(0, 0.02))
+
+        # Read-your-writes check
+        status, state = await request(reader, writer, 'GET', f'/progress/{user}')
+        if status != 200 or state.get('characterIndex') != index:
+            stats['stale_reads'] += 1
+    except (OSError, ConnectionError, asyncio.IncompleteReadError):
+        stats['errors'] += 1
+    finally:
+        writer.close()
+
+
+async def fetch_stats(port):
+    reader, writer = await asyncio.open_connection('127.0.0.1', port)
+    try:
+        return (await request(reader, writer, 'GET', '/stats'))[1]
+    finally:
+        writer.close()
+
+
+async def run_load_test(clients, updates, port):
+    latencies = []
+    stats = {'errors': 0, 'connect_errors': 0, 'stale_reads': 0}
+    before = await fetch_stats(port)
+
+    start = time.perf_counter()
+    await asyncio.gather(*(run_client(i, port, updates, latencies, stats) for i in range(clients)))
+    elapsed = time.perf_counter() - start
+
+    # Let the flusher catch up before reading the counters
+    await asyncio.sleep(0.5)
+    after = await fetch_stats(port)
+    rows = after['rowsWritten'] - before['rowsWritten']
+    transactions = after['transactions'] - before['transactions']
+
+    latencies.sort()
+    print()
+    print("=" * 70)
+    print("LOAD TEST RESULTS:")
+    print("=" * 70)
+    print(f"  Clients: {clients}")
+    print(f"  Updates: {len(latencies)} in {elapsed:.2f}s")
+    print(f"  Sustained throughput: {len(latencies) / elapsed:.0f} updates/s")
+    print(f"  Latency p50: {percentile(latencies, 0.50) * 1000:.2f} ms")
+    print(f"  Latency p95: {percentile(latencies, 0.95) * 1000:.2f} ms")
+    print(f"  Latency p99: {percentile(latencies, 0.99) * 1000:.2f} ms")
+    print(f"  Rows written: {rows} in {transactions} transactions")
+    if rows:
+        print(f"  Coalescing: {len(latencies) / rows:.1f} updates per row write")
+    for key, count in sorted(stats.items(), key=lambda item: str(item[0])):
+        print(f"  {key}: {count}")
+    print("=" * 70)
+
+
+def main():
+    """Main function"""
+    clients = int(sys.argv[1]) if len(sys.argv) > 1 else DEFAULT_CLIENTS
+    updates = int(sys.argv[2]) if len(sys.argv) > 2 else DEFAULT_UPDATES_PER_CLIENT
+    port = int(sys.argv[3]) if len(sys.argv) > 3 else 8010
+
+    print(f"Simulating {clients} clients x {updates} updates against port {port}...")
+    asyncio.run(run_load_test(clients, updates, port))
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,547 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+Spaced-repetition review scheduler for learned characters
+Progress in the game is one linear character index, so characters a player got
+wrong never come back. When REVIEW_SCHEDULER_URL is set in js/auth.js, the game
+sends the perfect / not-good stroke counts of every finished character here, and
+this service schedules the next review of that character for the player.
+
+Scheduling is SM-2 style: the stroke accuracy of a character becomes a 0-5 grade,
+a passing grade (>= PASS_GRADE) grows the interval by the item's ease factor, a
+failing one sends the character back for review after LAPSE_INTERVAL. Intervals
+are a closed-form function of (repetitions, ease), so changing the parameters
+can reschedule every stored item with one UPDATE (see 'recompute').
+
+The game reports every finished character, including replays of ones that are
+not due yet. A passing result before the due time leaves the schedule alone
+(only a failure counts early), so replaying common characters does not inflate
+their repetitions.
+
+Each loaded user keeps a heap of (due time, character). Finding the next N due
+characters pops and re-pushes N entries, O(N log n) for a user with n items.
+
+Endpoints (serve mode):
+    POST /reviews/<player id>      {"character": "中", "perfect": 5, "notGood": 1}
+                                   or {"results": [...]} for several characters
+    GET  /reviews/<player id>/due  ?limit=10, due characters, most overdue first
+    GET  /stats                    review / write / cache counters
+
+Usage:
+    python review_scheduler.py serve [port] [database_file]
+    python review_scheduler.py recompute [database_file] [--interval-modifier X] [--max-interval DAYS]
+    python review_scheduler.py bench [items]
+"""
+
+import asyncio
+import heapq
+import itertools
+import math
+import os
+import random
+import sqlite3
+import sys
+import io
+import tempfile
+import time
+from collections import OrderedDict
+from concurrent.futures import ThreadPoolExecutor
+
+from async_http import json_response, start_server
+from progress_server import PLAYER_ID_PATTERN
+from write_batcher import WriteBatcher, flush_periodically
+
+# Fix Windows console encoding
+if sys.stdout.encoding != 'utf-8':
+    try:
+        sys.stdout = io.TextIOWrapper(sys.stdout.buffer, encoding='utf-8', errors='replace')
+        sys.stderr = io.TextIOWrapper(sys.stderr.buffer, encoding='utf-8', errors='replace')
+    except:
+        pass
+
+DEFAULT_PORT = 8040
+DEFAULT_DATABASE = '../data/reviews.db'
+
+DAY = 86400
+
+# SM-2 style parameters (intervals in days)
+INITIAL_EASE = 2.5
+MIN_EASE = 1.3
+MAX_EASE = 5.0
+FIRST_INTERVAL = 1.0
+SECOND_INTERVAL = 3.0
+MAX_INTERVAL = 365.0
+LAPSE_INTERVAL = 10 / (24 * 60)   # failed characters come back after 10 minutes
+INTERVAL_MODIFIER = 1.0
+
+# (grade, minimum share of perfect strokes), checked in order
+GRADE_THRESHOLDS = ((5, 1.0), (4, 0.85), (3, 0.7), (2, 0.5), (1, 0.25))
+PASS_GRADE = 3
+
+DEFAULT_DUE_LIMIT = 10
+MAX_DUE_LIMIT = 200
+MAX_RESULTS_PER_REQUEST = 500
+HEAP_SLACK = 64            # stale heap entries tolerated before a rebuild
+FLUSH_INTERVAL = 0.5       # seconds between batched transactions
+USER_CACHE_CAPACITY = 20000
+
+SCHEMA = '''
+CREATE TABLE IF NOT EXISTS reviews (
+    user_id     TEXT NOT NULL,
+    character   TEXT NOT NULL,
+    ease        REAL NOT NULL,
+    reps        INTEGER NOT NULL,
+    lapses      INTEGER NOT NULL,
+    interval    REAL NOT NULL,
+    last_review INTEGER NOT NULL,
+    due         INTEGER NOT NULL,
+    PRIMARY KEY (user_id, character)
+) WITHOUT ROWID
+'''
+
+
+def review_grade(perfect, not_good):
+    """0-5 grade from the stroke outcomes of one character"""
+    total = perfect + not_good
+    if perfect < 0 or not_good < 0 or total == 0:
+        raise ValueError('expected stroke counts with at least one stroke')
+    accuracy = perfect / total
+    for grade, threshold in GRADE_THRESHOLDS:
+        if accuracy >= threshold:
+            return grade
+    return 0
+
+
+def interval_days(reps, ease, modifier=INTERVAL_MODIFIER, max_interval=MAX_INTERVAL):
+    """Days until the next review after reps passing reviews in a row"""
+    if reps <= 0:
+        return LAPSE_INTERVAL
+    if reps == 1:
+        return min(FIRST_INTERVAL * modifier, max_interval)
+    if modifier <= 0:
+        return 0.0
+    # In log space: ease ** (reps - 2) overflows a float long before reps stops growing
+    log_days = math.log(SECOND_INTERVAL * modifier) + (reps - 2) * math.log(ease)
+    return math.exp(min(log_days, math.log(max_interval)))
+
+
+class ReviewItem:
+    """Scheduling state of one character for one user"""
+
+    __slots__ = ('character', 'ease', 'reps', 'lapses', 'interval', 'last_review', 'due')
+
+    def __init__(self, character, ease=INITIAL_EASE, reps=0, lapses=0, interval=0.0, last_review=0, due=0):
+        self.character = character
+        self.ease = ease
+        self.reps = reps
+        self.lapses = lapses
+        self.interval = interval
+        self.last_review = last_review
+        self.due = due
+
+    def review(self, grade, now):
+        """Apply one graded review at time now (seconds), returns whether it was rescheduled"""
+        if grade >= PASS_GRADE and now < self.due:
+            return False   # passed before it was due (a replay): keep the schedule
+        if grade >= PASS_GRADE:
+            reps, lapses = self.reps + 1, self.lapses
+        else:
+            reps, lapses = 0, self.lapses + 1
+        ease = min(MAX_EASE, max(MIN_EASE, self.ease + 0.1 - (5 - grade) * (0.08 + (5 - grade) * 0.02)))
+        # Everything is computed before the item changes, so a failure cannot leave it half updated
+        interval = interval_days(reps, ease)
+        self.reps, self.lapses, self.ease, self.interval = reps, lapses, ease, interval
+        self.last_review = int(now)
+        self.due = int(now + interval * DAY)
+        return True
+
+    def to_dict(self):
+        return {'character': self.character, 'due': self.due * 1000, 'interval': round(self.interval, 4),
+                'ease': round(self.ease, 3), 'reps': self.reps, 'lapses': self.lapses}
+
+    def row(self, user_id):
+        return (user_id, self.character, self.ease, self.reps, self.lapses,
+                self.interval, self.last_review, self.due)
+
+
+class UserReviews:
+    """One user's review items with a heap of (due, character) for due lookups
+
+    Rescheduling pushes a new heap entry and leaves the old one in place; entries
+    whose due time no longer matches the item are skipped when they surface.
+    """
+
+    def __init__(self, items=()):
+        self.items = {item.character: item for item in items}
+        self._heap = [(item.due, item.character) for item in self.items.values()]
+        heapq.heapify(self._heap)
+
+    def __len__(self):
+        return len(self.items)
+
+    def record(self, character, grade, now):
+        """Review a character (new characters start a schedule), returns (item, rescheduled)"""
+        item = self.items.get(character)
+        if item is None:
+            item = self.items[character] = ReviewItem(character)
+        if not item.review(grade, now):
+            return item, False
+        heapq.heappush(self._heap, (item.due, character))
+        if len(self._heap) > 2 * len(self.items) + HEAP_SLACK:
+            self._heap = [(i.due, i.character) for i in self.items.values()]
+            heapq.heapify(self._heap)
+        return item, True
+
+    def _is_current(self, entry):
+        item = self.items.get(entry[1])
+        return item is not None and item.due == entry[0]
+
+    def next_due(self, limit, now):
+        """Up to limit items due at now, most overdue first"""
+        found = []
+        seen = set()
+        while self._heap and len(found) < limit:
+            entry = self._heap[0]
+            # Stale, or a duplicate from two reviews landing on the same due second
+            if not self._is_current(entry) or entry[1] in seen:
+                heapq.heappop(self._heap)
+                continue
+            if entry[0] > now:
+                break
+            found.append(heapq.heappop(self._heap))
+            seen.add(entry[1])
+        for entry in found:
+            heapq.heappush(self._heap, entry)
+        return [self.items[character] for _, character in found]
+
+    def next_due_time(self):
+        """Earliest due time (seconds), None without items"""
+        while self._heap and not self._is_current(self._heap[0]):
+            heapq.heappop(self._heap)
+        return self._heap[0][0] if self._heap else None
+
+
+class ReviewStore:
+    """SQLite persistence; every call runs on one dedicated thread"""
+
+    def __init__(self, filename):
+        self.filename = filename
+        self._executor = ThreadPoolExecutor(max_workers=1)
+        self._connection = None
+
+    def _open(self):
+        self._connection = connect(self.filename)
+
+    def _load(self, user_id):
+        rows = self._connection.execute(
+            'SELECT character, ease, reps, lapses, interval, last_review, due FROM reviews WHERE user_id = ?',
+            (user_id,))
+        return [ReviewItem(*row) for row in rows]
+
+    def _write_batch(self, rows):
+        with self._connection:
+            self._connection.executemany('INSERT OR REPLACE INTO reviews VALUES (?, ?, ?, ?, ?, ?, ?, ?)', rows)
+
+    def _close(self):
+        if self._connection:
+            self._connection.close()
+
+    async def _run(self, func, *args):
+        return await asyncio.get_running_loop().run_in_executor(self._executor, func, *args)
+
+    async def open(self):
+        await self._run(self._open)
+
+    async def load(self, user_id):
+        return await self._run(self._load, user_id)
+
+    async def write_batch(self, rows):
+        await self._run(self._write_batch, rows)
+
+    async def close(self):
+        await self._run(self._close)
+        self._executor.shutdown()
+
+
+def connect(filename):
+    connection = sqlite3.connect(filename, check_same_thread=False)
+    connection.execute('PRAGMA journal_mode=WAL')
+    connection.execute('PRAGMA synchronous=NORMAL')
+    connection.execute(SCHEMA)
+    connection.commit()
+    return connection
+
+
+def recompute(connection, modifier=INTERVAL_MODIFIER, max_interval=MAX_INTERVAL):
+    """Reschedule every stored item with new interval parameters, returns the row count
+
+    Runs inside SQLite in one transaction, so memory use does not grow with the
+    number of items.
+    """
+    connection.create_function('interval_days', 2,
+                               lambda reps, ease: interval_days(reps, ease, modifier, max_interval),
+                               deterministic=True)
+    with connection:
+        count = connection.execute('UPDATE reviews SET interval = interval_days(reps, ease)').rowcount
+        connection.execute(f'UPDATE reviews SET due = last_review + CAST(interval * {DAY} AS INTEGER)')
+    return count
+
+
+class ReviewService:
+    """Per-user review heaps in an LRU, with reviews written back in batches"""
+
+    def __init__(self, store, flush_interval=FLUSH_INTERVAL, cache_capacity=USER_CACHE_CAPACITY):
+        self.store = store
+        self.flush_interval = flush_interval
+        self.cache_capacity = cache_capacity
+        self._users = OrderedDict()
+        self._flush_task = None
+        self.stats = {'reviews': 0, 'dueQueries': 0, 'rowsWritten': 0,
+                      'transactions': 0, 'usersLoaded': 0}
+        # Dirty keys are (user id, character); a user with any is kept in memory
+        self._writer = WriteBatcher(store.write_batch, self._row, owner=lambda key: key[0], stats=self.stats)
+
+    async def start(self):
+        await self.store.open()
+        self._flush_task = asyncio.create_task(
+            flush_periodically(self.flush, self.flush_interval, 'reviews'))
+
+    async def stop(self):
+        if self._flush_task:
+            self._flush_task.cancel()
+        await self.flush()
+        await self.store.close()
+
+    async def user(self, user_id):
+        reviews = self._users.get(user_id)
+        if reviews is not None:
+            self._users.move_to_end(user_id)
+            return reviews
+        items = await self.store.load(user_id)
+        # Another request may have loaded the user while we were reading
+        reviews = self._users.get(user_id)
+        if reviews is None:
+            reviews = self._users[user_id] = UserReviews(items)
+            self.stats['usersLoaded'] += 1
+            self._trim_cache()
+        return reviews
+
+    async def record(self, user_id, results, now=None):
+        """Apply [{"character", "perfect", "notGood"}, ...], returns the updated items"""
+        now = now or time.time()
+        graded = []
+        for result in results:
+            character = result.get('character') if isinstance(result, dict) else None
+            if not isinstance(character, str) or len(character) != 1:
+                raise ValueError('each result needs a single "character"')
+            try:
+                grade = review_grade(int(result.get('perfect', 0)), int(result.get('notGood', 0)))
+            except (TypeError, ValueError):
+                raise ValueError(f'invalid stroke counts for {character}')
+            graded.append((character, grade))
+
+        reviews = await self.user(user_id)
+        items = []
+        for character, grade in graded:
+            item, rescheduled = reviews.record(character, grade, now)
+            items.append(item)
+            if rescheduled:
+                self._writer.mark((user_id, character))
+        self.stats['reviews'] += len(items)
+        return items
+
+    async def due(self, user_id, limit=DEFAULT_DUE_LIMIT, now=None):
+        reviews = await self.user(user_id)
+        self.stats['dueQueries'] += 1
+        return reviews.next_due(limit, now or time.time()), reviews.next_due_time(), len(reviews)
+
+    def _trim_cache(self):
+        """Drop least recently used users without unsaved reviews above capacity"""
+        while len(self._users) > self.cache_capacity:
+            # Never the most recent user: record() is about to change it
+            for user_id in itertools.islice(self._users, len(self._users) - 1):
+                if not self._writer.is_pinned(user_id):
+                    del self._users[user_id]
+                    break
+            else:
+                return
+
+    def _row(self, key):
+        # Users with unsaved reviews are never trimmed, so they are always cached
+        user_id, character = key
+        return self._users[user_id].items[character].row(user_id)
+
+    async def flush(self):
+        """Write every item reviewed since the last flush in batched transactions"""
+        try:
+            await self._writer.flush()
+        finally:
+            self._trim_cache()
+
+
+async def route(service, request):
+    """Return (status, Response or None) for a request"""
+    parts = request.parts
+
+    if parts == ['stats'] and request.method == 'GET':
+        return 200, json_response(dict(service.stats, usersCached=len(service._users)), etag=False)
+
+    if len(parts) not in (2, 3) or parts[0] != 'reviews':
+        return 404, None
+    user_id = parts[1]
+    if not PLAYER_ID_PATTERN.match(user_id):
+        return 400, json_response({'error': 'expected an opaque player id'}, etag=False)
+
+    if len(parts) == 3:
+        if parts[2] != 'due':
+            return 404, None
+        if request.method != 'GET':
+            return 405, None
+        try:
+            limit = int(request.query.get('limit', [DEFAULT_DUE_LIMIT])[0])
+        except ValueError:
+            return 400, json_response({'error': 'limit must be a number'}, etag=False)
+        items, next_due, total = await service.due(user_id, max(1, min(limit, MAX_DUE_LIMIT)))
+        return 200, json_response({'due': [item.to_dict() for item in items],
+                                   'nextDue': next_due * 1000 if next_due is not None else None,
+                                   'items': total}, etag=False)
+
+    if request.method != 'POST':
+        return 405, None
+    try:
+        body = request.json()
+    except ValueError:
+        return 400, json_response({'error': 'invalid JSON'}, etag=False)
+    results = body.get('results', [body]) if isinstance(body, dict) else None
+    if not isinstance(results, list) or not 0 < len(results) <= MAX_RESULTS_PER_REQUEST:
+        return 400, json_response({'error': f'expected 1-{MAX_RESULTS_PER_REQUEST} results'}, etag=False)
+    try:
+        items = await service.record(user_id, results)
+    except ValueError as e:
+        return 400, json_response({'error': str(e)}, etag=False)
+    return 200, json_response({'reviews': [item.to_dict() for item in items]}, etag=False)
+
+
+async def serve(port=DEFAULT_PORT, database=DEFAULT_DATABASE, host='127.0.0.1'):
+    """Run the server until cancelled"""
+    os.makedirs(os.path.dirname(database) or '.', exist_ok=True)
+    service = ReviewService(ReviewStore(database))
+    await service.start()
+    server = await start_server(lambda request: route(service, request), host, port)
+    print(f"Review scheduler on http://localhost:{port}/reviews/<user>")
+    print(f"  Database: {database} (WAL)")
+    print("Press Ctrl+C to stop the server")
+    try:
+        async with server:
+            await server.serve_forever()
+    finally:
+        await service.stop()
+
+
+def bench(item_count):
+    """Time due lookups on one large user and a bulk recompute of item_count rows"""
+    rng = random.Random(0)
+    now = time.time()
+    characters = [chr(0x4E00 + i % 20000) + str(i // 20000) for i in range(item_count)]
+
+    start = time.perf_counter()
+    items = []
+    for i, character in enumerate(characters[:min(item_count, 200000)]):
+        item = ReviewItem(character)
+        for _ in range(rng.randint(1, 6)):
+            item.review(rng.choice((2, 3, 4, 5, 5)), now - rng.uniform(0, 60) * DAY)
+        items.append(item)
+    reviews = UserReviews(items)
+    print(f"  Built one user with {len(reviews)} items in {time.perf_counter() - start:.2f}s")
+
+    start = time.perf_counter()
+    queries = 10000
+    for _ in range(queries):
+        reviews.next_due(10, now)
+    elapsed = time.perf_counter() - start
+    print(f"  next_due(10): {elapsed / queries * 1e6:.1f} us per query")
+
+    keys = list(reviews.items)
+    start = time.perf_counter()
+    for _ in range(queries):
+        reviews.record(rng.choice(keys), rng.randint(0, 5), now)
+    print(f"  record: {(time.perf_counter() - start) / queries * 1e6:.1f} us per review")
+
+    with tempfile.TemporaryDirectory() as tmp_dir:
+        connection = connect(os.path.join(tmp_dir, 'bench.db'))
+        start = time.perf_counter()
+        batch = []
+        with connection:
+            for i in range(item_count):
+                item = items[i % len(items)]
+                batch.append((f'user{i // 500}', characters[i], item.ease, item.reps, item.lapses,
+                              item.interval, item.last_review, item.due))
+                if len(batch) == 50000:
+                    connection.executemany('INSERT INTO reviews VALUES (?, ?, ?, ?, ?, ?, ?, ?)', batch)
+                    batch = []
+            connection.executemany('INSERT INTO reviews VALUES (?, ?, ?, ?, ?, ?, ?, ?)', batch)
+        print(f"  Wrote {item_count} rows in {time.perf_counter() - start:.2f}s")
+
+        start = time.perf_counter()
+        count = recompute(connection, modifier=0.8)
+        elapsed = time.perf_counter() - start
+        print(f"  Recomputed {count} items in {elapsed:.2f}s ({count / elapsed:.0f}/s)")
+        connection.close()
+
+
+def main():
+    """Main function"""
+    args = sys.argv[1:]
+    if not args or args[0] not in ('serve', 'recompute', 'bench'):
+        print("Usage: python review_scheduler.py serve [port] [database_file]")
+        print("       python review_scheduler.py recompute [database_file] [--interval-modifier X] [--max-interval DAYS]")
+        print("       python review_scheduler.py bench [items]")
+        return
+
+    if args[0] == 'serve':
+        port = int(args[1]) if len(args) > 1 else DEFAULT_PORT
+        database = args[2] if len(args) > 2 else DEFAULT_DATABASE
+        try:
+            asyncio.run(serve(port, database))
+        except KeyboardInterrupt:
+            print("\nServer stopped")
+        return
+
+    if args[0] == 'bench':
+        item_count = int(args[1]) if len(args) > 1 else 1000000
+        print("=" * 70)
+        print(f"REVIEW SCHEDULER BENCHMARK ({item_count} items)")
+        print("=" * 70)
+        bench(item_count)
+        return
+
+    modifier = INTERVAL_MODIFIER
+    max_interval = MAX_INTERVAL
+    positional = []
+    i = 1
+    while i < len(args):
+        if args[i] == '--interval-modifier' and i + 1 < len(args):
+            modifier = float(args[i + 1])
+            i += 2
+        elif args[i] == '--max-interval' and i + 1 < len(args):
+            max_interval = float(args[i + 1])
+            i += 2
+        else:
+            positional.append(args[i])
+            i += 1
+    database = positional[0] if positional else DEFAULT_DATABASE
+    if not os.path.exists(database):
+        print(f"Error: File '{database}' not found")
+        return
+
+    print(f"Recomputing due dates in {database} (interval x{modifier}, max {max_interval:g} days)...")
+    print("Stop the review server first: it keeps its own copy of loaded users.")
+    connection = connect(database)
+    start = time.perf_counter()
+    count = recompute(connection, modifier, max_interval)
+    connection.close()
+    print(f"[OK] Rescheduled {count} items in {time.perf_counter() - start:.2f}s")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,286 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+Shape-similarity index for confusable-character lookup
+Extracts a fixed-length shape descriptor from each character's medians in
+graphics.txt and indexes all of them with random-hyperplane LSH, so "which
+characters look like 未?" is answered in milliseconds (for distractor hints and
+review drills).
+
+Descriptor (weighted blocks, one vector per character):
+    - stroke count (log scaled)
+    - direction histogram: 8 bins of median segment directions, length weighted
+    - occupancy grid: medians resampled evenly and binned into a 6x6 grid
+    - stroke-order layout: start point of the first strokes, so 土/士 and 未/末 differ
+
+Requires NumPy.
+
+Usage:
+    python similarity_index.py build [../data/graphics.txt]
+    python similarity_index.py query 未 [k]
+    python similarity_index.py query 未末本 [k]      (batch)
+"""
+
+import json
+import math
+import os
+import sys
+import io
+import time
+
+import numpy as np
+
+from graphics_archive import find_graphics_file, iter_graphics_lines
+
+# Fix Windows console encoding
+if sys.stdout.encoding != 'utf-8':
+    try:
+        sys.stdout = io.TextIOWrapper(sys.stdout.buffer, encoding='utf-8', errors='replace')
+        sys.stderr = io.TextIOWrapper(sys.stderr.buffer, encoding='utf-8', errors='replace')
+    except:
+        pass
+
+DEFAULT_INDEX_FILE = '../data/similarity_index.npz'
+
+# graphics.txt coordinate box: x in [0, 1024], y in [-124, 900]
+BOX_MIN_X, BOX_MIN_Y, BOX_SIZE = 0.0, -124.0, 1024.0
+
+DIRECTION_BINS = 8
+GRID_SIZE = 6
+ORDER_STROKES = 6
+SAMPLES_PER_STROKE = 16
+
+# Relative weight of each descriptor block
+COUNT_WEIGHT = 0.6
+DIRECTION_WEIGHT = 1.0
+GRID_WEIGHT = 1.5
+ORDER_WEIGHT = 0.5
+
+FEATURE_SIZE = 1 + DIRECTION_BINS + GRID_SIZE * GRID_SIZE + ORDER_STROKES * 2
+
+# LSH parameters: tables x bits per table, with single-bit multi-probe
+LSH_TABLES = 12
+LSH_BITS = 10
+
+
+def _resample(points, count):
+    """Evenly spaced points along a polyline"""
+    if len(points) == 1:
+        return [points[0]] * count
+    lengths = [math.dist(points[i - 1], points[i]) for i in range(1, len(points))]
+    total = sum(lengths)
+    if total == 0:
+        return [points[0]] * count
+    samples = []
+    segment = 0
+    walked = 0.0
+    for j in range(count):
+        target = total * j / (count - 1)
+        while segment < len(lengths) - 1 and walked + lengths[segment] < target:
+            walked += lengths[segment]
+            segment += 1
+        t = (target - walked) / lengths[segment] if lengths[segment] else 0.0
+        t = min(max(t, 0.0), 1.0)
+        (x0, y0), (x1, y1) = points[segment], points[segment + 1]
+        samples.append((x0 + (x1 - x0) * t, y0 + (y1 - y0) * t))
+    return samples
+
+
+def extract_features(medians):
+    """Shape descriptor for one character's rawCharData.medians"""
+    strokes = [[(float(p[0]), float(p[1])) for p in median] for median in medians if median]
+    features = np.zeros(FEATURE_SIZE, dtype=np.float32)
+    if not strokes:
+        return features
+
+    features[0] = COUNT_WEIGHT * math.log1p(len(strokes))
+
+    directions = np.zeros(DIRECTION_BINS)
+    grid = np.zeros((GRID_SIZE, GRID_SIZE))
+    for stroke in strokes:
+        for (x0, y0), (x1, y1) in zip(stroke, stroke[1:]):
+            length = math.hypot(x1 - x0, y1 - y0)
+            angle = math.atan2(y1 - y0, x1 - x0) % (2 * math.pi)
+            directions[int(angle / (2 * math.pi) * DIRECTION_BINS) % DIRECTION_BINS] += length
+        for x, y in _resample(stroke, SAMPLES_PER_STROKE):
+            gx = min(GRID_SIZE - 1, max(0, int((x - BOX_MIN_X) / BOX_SIZE * GRID_SIZE)))
+            gy = min(GRID_SIZE - 1, max(0, int((y - BOX_MIN_Y) / BOX_SIZE * GRID_SIZE)))
+            grid[gy, gx] += 1
+
+    if directions.sum():
+        directions /= directions.sum()
+    grid /= grid.sum()
+
+    offset = 1
+    features[offset:offset + DIRECTION_BINS] = DIRECTION_WEIGHT * directions
+    offset += DIRECTION_BINS
+    features[offset:offset + grid.size] = GRID_WEIGHT * grid.ravel() * math.sqrt(grid.size) / 2
+    offset += grid.size
+    for i, stroke in enumerate(strokes[:ORDER_STROKES]):
+        x, y = stroke[0]
+        features[offset + 2 * i] = ORDER_WEIGHT * (x - BOX_MIN_X) / BOX_SIZE
+        features[offset + 2 * i + 1] = ORDER_WEIGHT * (y - BOX_MIN_Y) / BOX_SIZE
+    return features
+
+
+def read_graphics_medians(filename='../data/graphics.txt'):
+    """Yield (character, medians) from graphics.txt (or its archive)"""
+    for line in iter_graphics_lines(filename):
+        if not line.strip():
+            continue
+        try:
+            data = json.loads(line)
+        except json.JSONDecodeError:
+            continue
+        if data.get('character') and data.get('medians'):
+            yield data['character'], data['medians']
+
+
+class SimilarityIndex:
+    """LSH index over shape descriptors with exact re-ranking of candidates"""
+
+    def __init__(self, characters, features, hyperplanes, center):
+        self.characters = list(characters)
+        self.features = np.asarray(features, dtype=np.float32)
+        self.hyperplanes = np.asarray(hyperplanes, dtype=np.float32)
+        self.center = np.asarray(center, dtype=np.float32)
+        self.positions = {char: i for i, char in enumerate(self.characters)}
+        self._powers = (1 << np.arange(self.hyperplanes.shape[1])).astype(np.int64)
+        self._tables = self._build_tables(self._codes(self.features))
+
+    @classmethod
+    def build(cls, items, seed=0):
+        """Build from (character, medians) pairs"""
+        characters = []
+        rows = []
+        for char, medians in items:
+            characters.append(char)
+            rows.append(extract_features(medians))
+        features = np.vstack(rows) if rows else np.zeros((0, FEATURE_SIZE), dtype=np.float32)
+        center = features.mean(axis=0) if len(features) else np.zeros(FEATURE_SIZE)
+        rng = np.random.default_rng(seed)
+        hyperplanes = rng.standard_normal((LSH_TABLES, LSH_BITS, FEATURE_SIZE))
+        return cls(characters, features, hyperplanes, center)
+
+    @classmethod
+    def load(cls, filename=DEFAULT_INDEX_FILE):
+        with np.load(filename) as data:
+            characters = [chr(cp) for cp in data['codepoints']]
+            return cls(characters, data['features'], data['hyperplanes'], data['center'])
+
+    def save(self, filename=DEFAULT_INDEX_FILE):
+        np.savez_compressed(filename,
+                            codepoints=np.array([ord(c) for c in self.characters], dtype=np.uint32),
+                            features=self.features,
+                            hyperplanes=self.hyperplanes,
+                            center=self.center)
+
+    def _codes(self, vectors):
+        """LSH bucket code per table for each vector: shape (tables, n)"""
+        projections = np.einsum('tbd,nd->tnb', self.hyperplanes, vectors - self.center)
+        return ((projections > 0).astype(np.int64) * self._powers).sum(axis=2)
+
+    @staticmethod
+    def _build_tables(codes):
+        tables = []
+        for table_codes in codes:
+            order = np.argsort(table_codes, kind='stable')
+            keys, starts = np.unique(table_codes[order], return_index=True)
+            ends = np.append(starts[1:], len(order))
+            tables.append({int(k): order[s:e] for k, s, e in zip(keys, starts, ends)})
+        return tables
+
+    def _candidates(self, codes):
+        """Ids sharing a bucket (or a bucket one bit away) in any table"""
+        found = []
+        for table, code in zip(self._tables, codes):
+            code = int(code)
+            for probe in [code] + [code ^ (1 << b) for b in range(self.hyperplanes.shape[1])]:
+                ids = table.get(probe)
+                if ids is not None:
+                    found.append(ids)
+        return np.unique(np.concatenate(found)) if found else np.zeros(0, dtype=np.int64)
+
+    def query_vectors(self, vectors, k=10, exclude=None, exact=False):
+        """Top-k (character, distance) lists for each query vector"""
+        vectors = np.atleast_2d(np.asarray(vectors, dtype=np.float32))
+        codes = self._codes(vectors)
+        results = []
+        for row, vector in enumerate(vectors):
+            skip = exclude[row] if exclude else None
+            candidates = None if exact else self._candidates(codes[:, row])
+            if candidates is None or len(candidates) <= k:
+                candidates = np.arange(len(self.characters))
+            distances = np.linalg.norm(self.features[candidates] - vector, axis=1)
+            order = np.argsort(distances)
+            hits = []
+            for i in order:
+                char = self.characters[candidates[i]]
+                if char == skip:
+                    continue
+                hits.append((char, float(distances[i])))
+                if len(hits) == k:
+                    break
+            results.append(hits)
+        return results
+
+    def query(self, characters, k=10, exact=False):
+        """Top-k look-alikes for each indexed character, {char: [(char, distance)]}"""
+        known = [c for c in characters if c in self.positions]
+        if not known:
+            return {}
+        vectors = self.features[[self.positions[c] for c in known]]
+        results = self.query_vectors(vectors, k, exclude=known, exact=exact)
+        return dict(zip(known, results))
+
+    def query_medians(self, medians, k=10):
+        """Top-k indexed characters that look like arbitrary medians"""
+        return self.query_vectors(extract_features(medians), k)[0]
+
+
+def main():
+    """Main function"""
+    if len(sys.argv) < 2 or sys.argv[1] not in ('build', 'query'):
+        print("Usage: python similarity_index.py build [graphics_file]")
+        print("       python similarity_index.py query <characters> [k]")
+        return
+
+    if sys.argv[1] == 'build':
+        source_file = sys.argv[2] if len(sys.argv) > 2 else '../data/graphics.txt'
+        if find_graphics_file(source_file) is None:
+            print(f"Error: File '{source_file}' not found")
+            return
+        print(f"Building similarity index from: {source_file}")
+        start = time.perf_counter()
+        index = SimilarityIndex.build(read_graphics_medians(source_file))
+        index.save()
+        print(f"  Characters: {len(index.characters)}")
+        print(f"  Feature size: {FEATURE_SIZE}")
+        print(f"  Build time: {time.perf_counter() - start:.2f}s")
+        print(f"  Output file: {DEFAULT_INDEX_FILE}")
+        return
+
+    if len(sys.argv) < 3:
+        print("Usage: python similarity_index.py query <characters> [k]")
+        return
+    if not os.path.exists(DEFAULT_INDEX_FILE):
+        print(f"Error: File '{DEFAULT_INDEX_FILE}' not found, run 'build' first")
+        return
+
+    k = int(sys.argv[3]) if len(sys.argv) > 3 else 10
+    index = SimilarityIndex.load()
+    start = time.perf_counter()
+    results = index.query(sys.argv[2], k)
+    elapsed = time.perf_counter() - start
+
+    for char in sys.argv[2]:
+        if char not in results:
+            print(f"{char}: not in index")
+            continue
+        similar = ' '.join(f"{c}({d:.2f})" for c, d in results[char])
+        print(f"{char}: {similar}")
+    print(f"\nQuery time: {elapsed * 1000:.2f} ms for {len(results)} characters")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,263 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+Monte Carlo balance simulator for the HP system
+Plays every level in level_config.json with simulated player populations and
+reports game-over rates and completion times per level. Balance changes can be
+checked here before shipping instead of by hand.
+
+Stroke rules mirror the game:
+    - checkDragDirection (game.js): perfect when the angle difference is <= 30 deg
+      or the drag is reversed (170-190 deg); a perfect stroke applies
+      applyPerfectBonus (hp-system.js) = difficulties[d].perfectHPBonus
+    - calculatePunishment (game.js): near-reversed drags (> 150 deg) are measured
+      from 180 deg; punishment = (difference - 30) per stroke drawn
+    - punishmentToHPDeduction (hp-system.js): nothing below 50, otherwise
+      punishment / 10 * difficulties[d].punishmentMultiplier
+    - HP starts at the level's maxHP, is capped there, and 0 HP is game over
+
+Players are modelled as one drag per stroke with a per-player angle error
+(half-normal, plus occasional random "slips") and a per-stroke pace. Each level is
+simulated for a whole population at once in NumPy arrays, one stroke at a time.
+
+Requires NumPy.
+
+Usage:
+    python simulate_balance.py [players_per_level] [--seed N] [--output report.json]
+    python simulate_balance.py 20000 --set medium.punishmentMultiplier=2.5 --set hard.perfectHPBonus=0.1
+"""
+
+import json
+import os
+import sys
+import io
+import time
+
+import numpy as np
+
+from optimize_level_order import DEFAULT_STROKES, is_cjk, load_stroke_counts
+
+# Fix Windows console encoding
+if sys.stdout.encoding != 'utf-8':
+    try:
+        sys.stdout = io.TextIOWrapper(sys.stdout.buffer, encoding='utf-8', errors='replace')
+        sys.stderr = io.TextIOWrapper(sys.stderr.buffer, encoding='utf-8', errors='replace')
+    except:
+        pass
+
+DEFAULT_PLAYERS = 20000
+
+# Same thresholds as checkDragDirection / calculatePunishment in game.js
+PERFECT_ANGLE = 30
+OPPOSITE_MIN_ANGLE = 170
+NEAR_OPPOSITE_ANGLE = 150
+MIN_PUNISHMENT = 50
+
+# Player population: (share, angle error sigma in degrees, slip probability, seconds per stroke)
+PLAYER_PROFILES = {
+    'novice': (0.3, 35.0, 0.08, 1.6),
+    'casual': (0.5, 22.0, 0.04, 1.1),
+    'expert': (0.2, 12.0, 0.01, 0.7),
+}
+SKILL_SPREAD = 0.25        # lognormal spread of sigma between players of one profile
+PACE_SPREAD = 0.35         # lognormal spread of individual stroke times
+CHARACTER_OVERHEAD = 0.8   # seconds between characters (completion animation)
+
+
+def sample_players(count, rng):
+    """Per-player profile id, angle sigma, slip probability and mean stroke time"""
+    names = list(PLAYER_PROFILES)
+    shares = np.array([PLAYER_PROFILES[n][0] for n in names])
+    profile = rng.choice(len(names), size=count, p=shares / shares.sum())
+    table = np.array([PLAYER_PROFILES[n][1:] for n in names])
+    sigma = table[profile, 0] * rng.lognormal(0.0, SKILL_SPREAD, count)
+    slip = table[profile, 1]
+    pace = table[profile, 2] * rng.lognormal(0.0, SKILL_SPREAD, count)
+    return {'names': names, 'profile': profile, 'sigma': sigma, 'slip': slip, 'pace': pace}
+
+
+def stroke_outcomes(players, rng):
+    """(perfect mask, punishment) for one stroke of every player"""
+    count = len(players['sigma'])
+    error = np.abs(rng.standard_normal(count) * players['sigma'])
+    slipped = rng.random(count) < players['slip']
+    error = np.where(slipped, rng.uniform(0, 180, count), error) % 360
+    difference = np.where(error > 180, 360 - error, error)
+
+    perfect = (difference <= PERFECT_ANGLE) | (difference >= OPPOSITE_MIN_ANGLE)
+    adjusted = np.where(difference > NEAR_OPPOSITE_ANGLE, np.abs(difference - 180), difference)
+    punishment = np.where(adjusted > PERFECT_ANGLE, adjusted - PERFECT_ANGLE, 0.0)
+    return perfect, punishment
+
+
+def simulate_level(character_strokes, max_hp, settings, players, rng):
+    """Play one level for every player, returns per-player result arrays"""
+    count = len(players['sigma'])
+    multiplier = settings.get('punishmentMultiplier', 1)
+    bonus = settings.get('perfectHPBonus', 1)
+
+    hp = np.full(count, float(max_hp))
+    alive = np.ones(count, dtype=bool)
+    elapsed = np.zeros(count)
+    perfect_strokes = np.zeros(count, dtype=np.int32)
+    died_at = np.full(count, -1, dtype=np.int32)
+    stroke_number = 0
+
+    for strokes in character_strokes:
+        for _ in range(strokes):
+            perfect, punishment = stroke_outcomes(players, rng)
+            deduction = np.where(punishment >= MIN_PUNISHMENT, punishment / 10 * multiplier, 0.0)
+            hp = np.where(perfect, np.minimum(hp + bonus, max_hp), hp - deduction)
+            elapsed += np.where(alive, players['pace'] * rng.lognormal(0.0, PACE_SPREAD, count), 0.0)
+            perfect_strokes += perfect & alive
+
+            died = alive & (hp <= 0)
+            died_at[died] = stroke_number
+            alive &= ~died
+            stroke_number += 1
+        elapsed += np.where(alive, CHARACTER_OVERHEAD, 0.0)
+
+    return {
+        'completed': alive,
+        'time': elapsed,
+        'hpLeft': np.maximum(hp, 0),
+        'perfectRate': perfect_strokes / np.maximum(1, np.where(alive, stroke_number, died_at + 1)),
+        'diedAt': died_at,
+        'totalStrokes': stroke_number
+    }
+
+
+def summarize(level, result, players):
+    completed = result['completed']
+    times = result['time'][completed]
+    summary = {
+        'id': level.get('id'),
+        'difficulty': level.get('difficulty', 'easy'),
+        'strokes': result['totalStrokes'],
+        'gameOverRate': float(1 - completed.mean()),
+        'gameOverByProfile': {name: float(1 - completed[players['profile'] == i].mean())
+                              for i, name in enumerate(players['names'])
+                              if (players['profile'] == i).any()},
+        'perfectRate': float(result['perfectRate'].mean()),
+        'hpLeftMean': float(result['hpLeft'][completed].mean()) if completed.any() else 0.0,
+    }
+    if len(times):
+        p10, p50, p90 = np.percentile(times, [10, 50, 90])
+        summary['completionSeconds'] = {'p10': float(p10), 'p50': float(p50), 'p90': float(p90)}
+    died = result['diedAt'][~completed]
+    if len(died):
+        summary['gameOverStrokeMedian'] = int(np.median(died))
+    return summary
+
+
+def level_character_strokes(level, stroke_counts):
+    return [stroke_counts.get(char, DEFAULT_STROKES) for char in level.get('characters', '') if is_cjk(char)]
+
+
+def apply_overrides(difficulties, overrides):
+    """--set medium.punishmentMultiplier=2.5 style overrides"""
+    for override in overrides:
+        key, _, value = override.partition('=')
+        difficulty, _, field = key.partition('.')
+        if difficulty not in difficulties or not field or not value:
+            raise ValueError(f"Invalid override '{override}' (expected difficulty.field=value)")
+        difficulties[difficulty][field] = float(value)
+
+
+def print_report(summaries, players_per_level, elapsed):
+    print()
+    print("=" * 70)
+    print("BALANCE SIMULATION RESULTS")
+    print("=" * 70)
+    print(f"  {'level':<14}{'diff':<8}{'strokes':>8}{'game over':>11}{'perfect':>9}"
+          f"{'HP left':>9}{'p50 time':>10}{'p90 time':>10}")
+    for s in summaries:
+        times = s.get('completionSeconds', {})
+        p50 = f"{times['p50'] / 60:.1f}m" if times else '-'
+        p90 = f"{times['p90'] / 60:.1f}m" if times else '-'
+        print(f"  {str(s['id'])[:13]:<14}{s['difficulty']:<8}{s['strokes']:>8}"
+              f"{s['gameOverRate'] * 100:>10.1f}%{s['perfectRate'] * 100:>8.1f}%"
+              f"{s['hpLeftMean']:>9.1f}{p50:>10}{p90:>10}")
+    print("-" * 70)
+    for difficulty in sorted({s['difficulty'] for s in summaries}):
+        rows = [s for s in summaries if s['difficulty'] == difficulty]
+        rate = sum(s['gameOverRate'] for s in rows) / len(rows)
+        worst = max(rows, key=lambda s: s['gameOverRate'])
+        print(f"  {difficulty}: {len(rows)} levels, mean game over {rate * 100:.1f}%, "
+              f"worst {worst['id']} ({worst['gameOverRate'] * 100:.1f}%)")
+    total = players_per_level * len(summaries)
+    print(f"  Simulated {total} playthroughs in {elapsed:.1f}s ({total / elapsed:.0f}/s)")
+    print("=" * 70)
+
+
+def main():
+    """Main function"""
+    args = sys.argv[1:]
+    overrides = []
+    seed = 0
+    output_file = None
+    positional = []
+    i = 0
+    while i < len(args):
+        if args[i] == '--set' and i + 1 < len(args):
+            overrides.append(args[i + 1])
+            i += 2
+        elif args[i] == '--seed' and i + 1 < len(args):
+            seed = int(args[i + 1])
+            i += 2
+        elif args[i] == '--output' and i + 1 < len(args):
+            output_file = args[i + 1]
+            i += 2
+        else:
+            positional.append(args[i])
+            i += 1
+    players_per_level = int(positional[0]) if positional else DEFAULT_PLAYERS
+
+    config_file = '../level_config.json'
+    if not os.path.exists(config_file):
+        print(f"Error: File '{config_file}' not found")
+        return
+    with open(config_file, 'r', encoding='utf-8') as f:
+        config = json.load(f)
+
+    difficulties = config.get('difficulties', {})
+    game_settings = config.get('gameSettings', {})
+    try:
+        apply_overrides(difficulties, overrides)
+    except ValueError as e:
+        print(f"Error: {e}")
+        return
+
+    stroke_counts = load_stroke_counts()
+    if not stroke_counts:
+        print(f"Note: data/all_strokes.json not found, every character counts as {DEFAULT_STROKES} strokes")
+
+    levels = config.get('levels', [])
+    print(f"Simulating {players_per_level} players on each of {len(levels)} levels...")
+    for difficulty, settings in difficulties.items():
+        print(f"  {difficulty}: x{settings.get('punishmentMultiplier', 1)} punishment, "
+              f"+{settings.get('perfectHPBonus', 1)} HP per perfect stroke")
+
+    rng = np.random.default_rng(seed)
+    start = time.perf_counter()
+    summaries = []
+    for level in levels:
+        settings = difficulties.get(level.get('difficulty', 'easy'), {})
+        max_hp = level.get('maxHP') or game_settings.get('defaultMaxHP', 100)
+        players = sample_players(players_per_level, rng)
+        result = simulate_level(level_character_strokes(level, stroke_counts), max_hp, settings, players, rng)
+        summaries.append(summarize(level, result, players))
+    elapsed = time.perf_counter() - start
+
+    print_report(summaries, players_per_level, elapsed)
+
+    if output_file:
+        with open(output_file, 'w', encoding='utf-8') as f:
+            json.dump({'playersPerLevel': players_per_level, 'seed': seed,
+                       'difficulties': difficulties, 'levels': summaries},
+                      f, ensure_ascii=False, indent=2)
+        print(f"\n[OK] Wrote report to {output_file}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,224 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+Inverted index over stroke-direction sequences for free-write candidate pruning
+In a free-write mode the player writes without a target character, so after every
+stroke the candidate list (~9,500 characters in graphics.txt) has to shrink.
+
+Each stroke (as produced by calculate_stroke_angle) is quantized into a code:
+8 direction bins x 3 length classes. The index keeps
+    - a prefix table: exact code prefix -> characters, and
+    - an inverted index: (stroke position, code) -> bitset of characters
+so a FreeWriteSession narrows its candidate bitset with a single AND per stroke,
+tolerating one direction bin and one length class of error.
+
+Usage:
+    python stroke_sequence_index.py benchmark [samples] [graphics_file]
+"""
+
+import random
+import sys
+import io
+import time
+
+from graphics_archive import find_graphics_file
+
+# Fix Windows console encoding
+if sys.stdout.encoding != 'utf-8':
+    try:
+        sys.stdout = io.TextIOWrapper(sys.stdout.buffer, encoding='utf-8', errors='replace')
+        sys.stderr = io.TextIOWrapper(sys.stderr.buffer, encoding='utf-8', errors='replace')
+    except:
+        pass
+
+DIRECTION_BINS = 8
+# Stroke length class boundaries (graphics.txt 1024-unit box)
+LENGTH_THRESHOLDS = (150, 400)
+LENGTH_CLASSES = len(LENGTH_THRESHOLDS) + 1
+
+
+def direction_bin(angle_degrees):
+    """0-7, bin 0 centred on 0 degrees (pointing right in screen space)"""
+    return int(round(angle_degrees / (360 / DIRECTION_BINS))) % DIRECTION_BINS
+
+
+def length_class(length):
+    for i, threshold in enumerate(LENGTH_THRESHOLDS):
+        if length < threshold:
+            return i
+    return len(LENGTH_THRESHOLDS)
+
+
+def encode_stroke(stroke):
+    """Code for one processed stroke (needs angleDegrees and length)"""
+    return direction_bin(stroke['angleDegrees']) * LENGTH_CLASSES + length_class(stroke['length'])
+
+
+def tolerant_codes(code, direction_tolerance=1, length_tolerance=1):
+    """Codes within the given number of direction bins / length classes"""
+    direction, length = divmod(code, LENGTH_CLASSES)
+    codes = []
+    for d in range(-direction_tolerance, direction_tolerance + 1):
+        for l in range(length - length_tolerance, length + length_tolerance + 1):
+            if 0 <= l < LENGTH_CLASSES:
+                codes.append(((direction + d) % DIRECTION_BINS) * LENGTH_CLASSES + l)
+    return codes
+
+
+class StrokeSequenceIndex:
+    """Prefix table and positional inverted index over quantized stroke sequences"""
+
+    def __init__(self):
+        self.characters = []
+        self.sequences = []
+        self.prefixes = {}
+        self.postings = {}
+
+    @classmethod
+    def build(cls, items):
+        """Build from (character, processed strokes) pairs"""
+        index = cls()
+        for char, strokes in items:
+            index.add(char, strokes)
+        index.freeze()
+        return index
+
+    def add(self, char, strokes):
+        char_id = len(self.characters)
+        sequence = bytes(encode_stroke(stroke) for stroke in strokes)
+        self.characters.append(char)
+        self.sequences.append(sequence)
+        for position, code in enumerate(sequence):
+            self.prefixes.setdefault(sequence[:position + 1], []).append(char_id)
+            key = (position, code)
+            self.postings[key] = self.postings.get(key, 0) | (1 << char_id)
+
+    def freeze(self):
+        self.prefixes = {prefix: tuple(ids) for prefix, ids in self.prefixes.items()}
+        self.all_ids = (1 << len(self.characters)) - 1
+
+    def __len__(self):
+        return len(self.characters)
+
+    def exact_prefix(self, codes):
+        """Characters whose first strokes match the codes exactly"""
+        return [self.characters[i] for i in self.prefixes.get(bytes(codes), ())]
+
+    def position_bitset(self, position, code, direction_tolerance=1, length_tolerance=1):
+        """Bitset of characters whose stroke at position matches code within tolerance"""
+        bits = 0
+        for candidate in tolerant_codes(code, direction_tolerance, length_tolerance):
+            bits |= self.postings.get((position, candidate), 0)
+        return bits
+
+    def decode(self, bits, limit=None):
+        """Characters in a bitset (lowest ids first)"""
+        chars = []
+        while bits and (limit is None or len(chars) < limit):
+            low = bits & -bits
+            chars.append(self.characters[low.bit_length() - 1])
+            bits ^= low
+        return chars
+
+
+class FreeWriteSession:
+    """Candidate set for one free-write attempt, narrowed after every stroke"""
+
+    def __init__(self, index, direction_tolerance=1, length_tolerance=1):
+        self.index = index
+        self.direction_tolerance = direction_tolerance
+        self.length_tolerance = length_tolerance
+        self.strokes = 0
+        self.bits = index.all_ids
+
+    def add_stroke(self, stroke):
+        """Narrow candidates with one processed stroke, returns the candidate count"""
+        code = encode_stroke(stroke)
+        self.bits &= self.index.position_bitset(self.strokes, code,
+                                                self.direction_tolerance, self.length_tolerance)
+        self.strokes += 1
+        return self.count()
+
+    def count(self):
+        return self.bits.bit_count() if hasattr(self.bits, 'bit_count') else bin(self.bits).count('1')
+
+    def candidates(self, limit=None):
+        return self.index.decode(self.bits, limit)
+
+    def contains(self, char_id):
+        return bool(self.bits >> char_id & 1)
+
+
+def _noisy_stroke(stroke, rng, angle_noise=10.0, length_noise=0.15):
+    """Simulate a player's imperfect version of a stroke"""
+    return {
+        'angleDegrees': stroke['angleDegrees'] + rng.gauss(0, angle_noise),
+        'length': stroke['length'] * max(0.1, 1 + rng.gauss(0, length_noise))
+    }
+
+
+def run_benchmark(index, strokes_by_char, samples=500, max_position=12, seed=0):
+    """Pruning ratio, latency and target recall per stroke position"""
+    rng = random.Random(seed)
+    chars = rng.sample(range(len(index)), min(samples, len(index)))
+    stats = {}
+    for char_id in chars:
+        session = FreeWriteSession(index)
+        strokes = strokes_by_char[index.characters[char_id]]
+        for position, stroke in enumerate(strokes[:max_position]):
+            noisy = _noisy_stroke(stroke, rng)
+            start = time.perf_counter()
+            count = session.add_stroke(noisy)
+            elapsed = time.perf_counter() - start
+            row = stats.setdefault(position + 1, {'n': 0, 'count': 0, 'time': 0.0, 'found': 0})
+            row['n'] += 1
+            row['count'] += count
+            row['time'] += elapsed
+            row['found'] += session.contains(char_id)
+    return stats
+
+
+def print_benchmark(index, stats):
+    total = len(index)
+    print()
+    print("=" * 70)
+    print(f"FREE-WRITE PRUNING BENCHMARK ({total} characters)")
+    print("=" * 70)
+    print(f"  {'stroke':>6}{'samples':>10}{'avg cands':>12}{'pruned':>10}{'recall':>10}{'us/stroke':>12}")
+    for position in sorted(stats):
+        row = stats[position]
+        avg = row['count'] / row['n']
+        print(f"  {position:>6}{row['n']:>10}{avg:>12.1f}{(1 - avg / total) * 100:>9.2f}%"
+              f"{row['found'] / row['n'] * 100:>9.1f}%{row['time'] / row['n'] * 1e6:>12.1f}")
+    print("=" * 70)
+
+
+def main():
+    """Main function"""
+    if len(sys.argv) < 2 or sys.argv[1] != 'benchmark':
+        print("Usage: python stroke_sequence_index.py benchmark [samples] [graphics_file]")
+        return
+
+    samples = int(sys.argv[2]) if len(sys.argv) > 2 else 500
+    source_file = sys.argv[3] if len(sys.argv) > 3 else '../data/graphics.txt'
+    if find_graphics_file(source_file) is None:
+        print(f"Error: File '{source_file}' not found")
+        return
+
+    from character_store import iter_graphics_txt
+
+    print(f"Building stroke sequence index from: {source_file}")
+    start = time.perf_counter()
+    strokes_by_char = {char: entry['strokes'] for char, entry in iter_graphics_txt(source_file)
+                       if entry['strokes']}
+    index = StrokeSequenceIndex.build(strokes_by_char.items())
+    print(f"  Characters: {len(index)}")
+    print(f"  Prefixes: {len(index.prefixes)}")
+    print(f"  Build time: {time.perf_counter() - start:.2f}s")
+
+    stats = run_benchmark(index, strokes_by_char, samples)
+    print_benchmark(index, stats)
+
+
+if __name__ == "__main__":
+    main()
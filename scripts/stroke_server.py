@@ -0,0 +1,272 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+Async local server for stroke data
+Serves per-character, batch and per-level stroke data straight from the character
+store (see character_store.py), with ETags, gzip and an in-memory LRU for hot
+characters. Any other path is served as a static file from the project root, so
+the game itself can be played from the same server.
+
+The store is checked against data/all_strokes.json at startup and every
+STORE_CHECK_INTERVAL seconds, like verify_all_chars_in_strokes.py does: when the
+JSON is newer (a generator or watch_strokes.py rewrote it) the store is rebuilt,
+and a rebuilt store is reopened with the caches cleared.
+
+Endpoints:
+    GET /strokes/<character or hex codepoint>   one all_strokes.json entry
+    GET /strokes?chars=中国人                   batch, {"characters": {...}}
+    GET /strokes?codepoints=4E2D,56FD           batch by hex codepoint
+    GET /levels/<level id>/strokes              every character of one level
+
+Usage:
+    python character_store.py build
+    python stroke_server.py [port]
+"""
+
+import asyncio
+import json
+import mimetypes
+import os
+import sys
+import io
+from collections import OrderedDict
+
+from async_http import Response, json_response, start_server
+from character_store import (CharacterStore, DEFAULT_STORE_FILE, SOURCE_ALL_STROKES,
+                             build_store, is_current_store, store_source)
+
+# Fix Windows console encoding
+if sys.stdout.encoding != 'utf-8':
+    try:
+        sys.stdout = io.TextIOWrapper(sys.stdout.buffer, encoding='utf-8', errors='replace')
+        sys.stderr = io.TextIOWrapper(sys.stderr.buffer, encoding='utf-8', errors='replace')
+    except:
+        pass
+
+DEFAULT_PORT = 8000
+STATIC_ROOT = '..'
+LEVEL_CONFIG_FILE = '../level_config.json'
+ALL_STROKES_FILE = '../data/all_strokes.json'
+
+LRU_CAPACITY = 2048       # encoded characters kept in memory
+MAX_BATCH_SIZE = 500      # characters per batch request
+STORE_CHECK_INTERVAL = 1.0  # seconds between store freshness checks
+
+
+class StrokeDataService:
+    """Looks up and encodes stroke data, keeping hot characters in an LRU"""
+
+    def __init__(self, store, level_config_file=LEVEL_CONFIG_FILE, lru_capacity=LRU_CAPACITY):
+        self.store = store
+        self.lru_capacity = lru_capacity
+        self._lru = OrderedDict()
+        self._level_responses = {}
+        self.hits = 0
+        self.misses = 0
+
+        self.levels = {}
+        if os.path.exists(level_config_file):
+            with open(level_config_file, 'r', encoding='utf-8') as f:
+                for level in json.load(f).get('levels', []):
+                    self.levels[level.get('id')] = level.get('characters', '')
+
+    def replace_store(self, store):
+        """Serve from a new store, dropping everything encoded from the old one (returned)"""
+        old, self.store = self.store, store
+        self._lru.clear()
+        self._level_responses.clear()
+        return old
+
+    def _cached(self, codepoint):
+        """(entry, encoded Response) for a codepoint, or None if not in the store"""
+        cached = self._lru.get(codepoint)
+        if cached is not None:
+            self._lru.move_to_end(codepoint)
+            self.hits += 1
+            return cached
+
+        self.misses += 1
+        record = self.store.get(codepoint)
+        if record is None:
+            return None
+        entry = record.to_dict()
+        cached = (entry, json_response(entry))
+        self._lru[codepoint] = cached
+        if len(self._lru) > self.lru_capacity:
+            self._lru.popitem(last=False)
+        return cached
+
+    def character_entry(self, codepoint):
+        """all_strokes.json entry for a codepoint, or None if not in the store"""
+        cached = self._cached(codepoint)
+        return cached[0] if cached else None
+
+    def character(self, codepoint):
+        cached = self._cached(codepoint)
+        return cached[1] if cached else None
+
+    def batch(self, codepoints):
+        """{"characters": {...}, "missing": [...]} for a list of codepoints"""
+        characters = {}
+        missing = []
+        for codepoint in dict.fromkeys(codepoints):
+            entry = self.character_entry(codepoint)
+            if entry is None:
+                missing.append(chr(codepoint))
+            else:
+                characters[chr(codepoint)] = entry
+        result = {'characters': characters}
+        if missing:
+            result['missing'] = missing
+        return json_response(result)
+
+    def level(self, level_id):
+        """Batch response for every CJK character of a level (cached per level)"""
+        if level_id not in self.levels:
+            return None
+        response = self._level_responses.get(level_id)
+        if response is None:
+            codepoints = [ord(c) for c in self.levels[level_id] if '一' <= c <= '鿿']
+            response = self.batch(codepoints)
+            self._level_responses[level_id] = response
+        return response
+
+
+def _parse_codepoints(query):
+    """Codepoints from ?chars=... and/or ?codepoints=hex,hex"""
+    codepoints = [ord(c) for c in ''.join(query.get('chars', []))]
+    for value in query.get('codepoints', []):
+        for part in value.split(','):
+            part = part.strip().upper().replace('U+', '')
+            if part:
+                codepoints.append(int(part, 16))
+    return codepoints
+
+
+def _path_codepoint(segment):
+    """/strokes/中, /strokes/4E2D and /strokes/U+4E2D all name the same character"""
+    if len(segment) == 1:
+        return ord(segment)
+    return int(segment.upper().replace('U+', ''), 16)
+
+
+def _static_response(path):
+    """Serve a file below STATIC_ROOT, refusing paths that escape it"""
+    root = os.path.abspath(STATIC_ROOT)
+    relative = path.lstrip('/') or 'index.html'
+    full_path = os.path.abspath(os.path.join(root, relative))
+    if not full_path.startswith(root + os.sep) or not os.path.isfile(full_path):
+        return None
+    with open(full_path, 'rb') as f:
+        body = f.read()
+    content_type = mimetypes.guess_type(full_path)[0] or 'application/octet-stream'
+    return Response(body, content_type)
+
+
+def route(service, request):
+    """Return (status, Response or None) for a request"""
+    if request.method not in ('GET', 'HEAD'):
+        return 405, None
+
+    parts = request.parts
+    query = request.query
+
+    try:
+        if parts == ['strokes']:
+            codepoints = _parse_codepoints(query)
+            if not codepoints or len(codepoints) > MAX_BATCH_SIZE:
+                return 400, json_response({'error': f'expected 1-{MAX_BATCH_SIZE} characters'})
+            return 200, service.batch(codepoints)
+
+        if len(parts) == 2 and parts[0] == 'strokes':
+            response = service.character(_path_codepoint(parts[1]))
+            return (200, response) if response else (404, None)
+
+        if len(parts) == 3 and parts[0] == 'levels' and parts[2] == 'strokes':
+            response = service.level(parts[1])
+            return (200, response) if response else (404, None)
+    except ValueError:
+        return 400, json_response({'error': 'invalid character or codepoint'})
+
+    response = _static_response(request.path)
+    return (200, response) if response else (404, None)
+
+
+def refresh_store(store_file=DEFAULT_STORE_FILE, all_strokes_file=ALL_STROKES_FILE):
+    """Rebuild store_file when all_strokes.json is newer, returns whether it did
+
+    Raises ValueError for a store built from another source, which is not ours to replace.
+    """
+    if not os.path.exists(all_strokes_file) or is_current_store(store_file, all_strokes_file):
+        return False
+    if os.path.exists(store_file) and store_source(store_file) != SOURCE_ALL_STROKES:
+        raise ValueError(f"'{store_file}' was not built from all_strokes.json")
+    build_store(all_strokes_file, store_file)
+    return True
+
+
+async def watch_store(service, store_file, interval=STORE_CHECK_INTERVAL):
+    """Keep service on the current store, rebuilding it after all_strokes.json changes"""
+    mtime = os.path.getmtime(store_file)
+    loop = asyncio.get_running_loop()
+    while True:
+        await asyncio.sleep(interval)
+        try:
+            if await loop.run_in_executor(None, refresh_store, store_file):
+                print(f"Rebuilt {store_file} from {ALL_STROKES_FILE}")
+            current = os.path.getmtime(store_file)
+            if current == mtime:
+                continue
+            store = CharacterStore(store_file)
+        except (OSError, ValueError) as e:
+            # e.g. all_strokes.json caught mid-write; retried on the next check
+            print(f"  [ERROR] Refreshing {store_file}: {e}")
+            continue
+        mtime = current
+        service.replace_store(store).close()
+        print(f"Reloaded {store_file} ({len(store)} characters)")
+
+
+async def serve(port=DEFAULT_PORT, store_file=DEFAULT_STORE_FILE, host='127.0.0.1'):
+    """Run the server until cancelled"""
+    service = StrokeDataService(CharacterStore(store_file))
+    watcher = asyncio.create_task(watch_store(service, store_file))
+    try:
+        server = await start_server(lambda request: route(service, request), host, port)
+        print(f"Serving {len(service.store)} characters from {store_file}")
+        print(f"  Levels: {len(service.levels)}")
+        print(f"  Game: http://localhost:{port}/index.html")
+        print(f"  Strokes: http://localhost:{port}/strokes/中")
+        print("Press Ctrl+C to stop the server")
+        async with server:
+            await server.serve_forever()
+    finally:
+        watcher.cancel()
+        service.store.close()
+
+
+def main():
+    """Main function"""
+    port = int(sys.argv[1]) if len(sys.argv) > 1 else DEFAULT_PORT
+
+    try:
+        if refresh_store(DEFAULT_STORE_FILE):
+            print(f"Rebuilt {DEFAULT_STORE_FILE} from {ALL_STROKES_FILE} (it was older)")
+    except ValueError as e:
+        print(f"Error: {e}")
+        print("Run 'python character_store.py build' to replace it")
+        return
+
+    if not os.path.exists(DEFAULT_STORE_FILE):
+        print(f"Error: File '{DEFAULT_STORE_FILE}' not found")
+        print("Run 'python character_store.py build' first")
+        return
+
+    try:
+        asyncio.run(serve(port))
+    except KeyboardInterrupt:
+        print("\nServer stopped")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,155 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+Load test for stroke_server.py
+Simulates thousands of concurrent clients on one machine. Each client keeps one
+keep-alive connection open and requests random characters, small batches and
+whole levels, replaying ETags the way a browser cache would.
+
+Usage:
+    python stroke_server.py 8000          (in another terminal)
+    python stroke_server_loadtest.py [clients] [requests_per_client] [port]
+
+Note: thousands of sockets may need a higher open-file limit (ulimit -n).
+"""
+
+import asyncio
+import json
+import random
+import sys
+import io
+import time
+import urllib.parse
+
+# Fix Windows console encoding
+if sys.stdout.encoding != 'utf-8':
+    try:
+        sys.stdout = io.TextIOWrapper(sys.stdout.buffer, encoding='utf-8', errors='replace')
+        sys.stderr = io.TextIOWrapper(sys.stderr.buffer, encoding='utf-8', errors='replace')
+    except:
+        pass
+
+DEFAULT_CLIENTS = 2000
+DEFAULT_REQUESTS_PER_CLIENT = 20
+
+
+def load_levels(filename='../level_config.json'):
+    """(level id, CJK characters) pairs used to build realistic requests"""
+    with open(filename, 'r', encoding='utf-8') as f:
+        config = json.load(f)
+    return [(level['id'], [c for c in level.get('characters', '') if '一' <= c <= '鿿'])
+            for level in config.get('levels', [])]
+
+
+def pick_target(levels, rng):
+    """Mostly single characters, some batches and level loads"""
+    level_id, chars = rng.choice(levels)
+    roll = rng.random()
+    if roll < 0.1 or not chars:
+        return f'/levels/{urllib.parse.quote(level_id)}/strokes'
+    if roll < 0.3:
+        batch = ''.join(rng.sample(chars, min(len(chars), 8)))
+        return '/strokes?chars=' + urllib.parse.quote(batch)
+    return '/strokes/' + urllib.parse.quote(rng.choice(chars))
+
+
+async def read_response(reader):
+    """Read one response, returns (status, etag)"""
+    status_line = await reader.readline()
+    if not status_line:
+        raise ConnectionError('connection closed')
+    status = int(status_line.split()[1])
+    length = 0
+    etag = None
+    while True:
+        line = await reader.readline()
+        if line in (b'\r\n', b''):
+            break
+        name, _, value = line.decode('latin-1').partition(':')
+        name = name.strip().lower()
+        if name == 'content-length':
+            length = int(value)
+        elif name == 'etag':
+            etag = value.strip()
+    if length:
+        await reader.readexactly(length)
+    return status, etag
+
+
+async def run_client(client_id, port, levels, requests, latencies, stats):
+    """One simulated player with its own connection and ETag cache"""
+    rng = random.Random(client_id)
+    etags = {}
+    try:
+        reader, writer = await asyncio.open_connection('127.0.0.1', port)
+    except OSError:
+        stats['connect_errors'] += 1
+        return
+
+    try:
+        for _ in range(requests):
+            target = pick_target(levels, rng)
+            request = f'GET {target} HTTP/1.1\r\nHost: localhost\r\nAccept-Encoding: gzip\r\n'
+            if target in etags:
+                request += f'If-None-Match: {etags[target]}\r\n'
+            writer.write((request + '\r\n').encode('latin-1'))
+
+            start = time.perf_counter()
+            await writer.drain()
+            status, etag = await read_response(reader)
+            latencies.append(time.perf_counter() - start)
+
+            stats[status] = stats.get(status, 0) + 1
+            if etag:
+                etags[target] = etag
+    except (OSError, ConnectionError, asyncio.IncompleteReadError):
+        stats['errors'] += 1
+    finally:
+        writer.close()
+
+
+def percentile(sorted_values, fraction):
+    if not sorted_values:
+        return 0.0
+    index = min(len(sorted_values) - 1, int(fraction * len(sorted_values)))
+    return sorted_values[index]
+
+
+async def run_load_test(clients, requests, port):
+    levels = load_levels()
+    latencies = []
+    stats = {'errors': 0, 'connect_errors': 0}
+
+    start = time.perf_counter()
+    await asyncio.gather(*(run_client(i, port, levels, requests, latencies, stats)
+                           for i in range(clients)))
+    elapsed = time.perf_counter() - start
+
+    latencies.sort()
+    print()
+    print("=" * 70)
+    print("LOAD TEST RESULTS:")
+    print("=" * 70)
+    print(f"  Clients: {clients}")
+    print(f"  Requests: {len(latencies)} in {elapsed:.2f}s")
+    print(f"  Throughput: {len(latencies) / elapsed:.0f} req/s")
+    print(f"  Latency p50: {percentile(latencies, 0.50) * 1000:.2f} ms")
+    print(f"  Latency p95: {percentile(latencies, 0.95) * 1000:.2f} ms")
+    print(f"  Latency p99: {percentile(latencies, 0.99) * 1000:.2f} ms")
+    for key, count in sorted(stats.items(), key=lambda item: str(item[0])):
+        print(f"  {key}: {count}")
+    print("=" * 70)
+
+
+def main():
+    """Main function"""
+    clients = int(sys.argv[1]) if len(sys.argv) > 1 else DEFAULT_CLIENTS
+    requests = int(sys.argv[2]) if len(sys.argv) > 2 else DEFAULT_REQUESTS_PER_CLIENT
+    port = int(sys.argv[3]) if len(sys.argv) > 3 else 8000
+
+    print(f"Simulating {clients} clients x {requests} requests against port {port}...")
+    asyncio.run(run_load_test(clients, requests, port))
+
+
+if __name__ == "__main__":
+    main()
@@ -7,8 +7,13 @@ Script to verify that all characters in level_config.json exist in data/all_stro
 import json
 import sys
 import io
+import os
 from collections import defaultdict
 
+from character_store import CharacterStore, DEFAULT_STORE_FILE, is_current_store
+
+ALL_STROKES_FILE = '../data/all_strokes.json'
+
 # Fix Windows console encoding
 if sys.stdout.encoding != 'utf-8':
     try:
@@ -31,23 +36,33 @@ def verify_all_characters():
         print(f"❌ Error parsing level_config.json: {e}")
         return False
     
-    # Load all_strokes.json
-    try:
-        with open('../data/all_strokes.json', 'r', encoding='utf-8') as f:
-            strokes_data = json.load(f)
-    except FileNotFoundError:
-        print("❌ Error: data/all_strokes.json not found")
-        return False
-    except json.JSONDecodeError as e:
-        print(f"❌ Error parsing all_strokes.json: {e}")
-        return False
-    
-    # Get all characters from all_strokes.json
-    if 'characters' in strokes_data:
-        available_chars = set(strokes_data['characters'].keys())
+    # Only the character set is needed, so prefer the store index when it mirrors
+    # the current all_strokes.json (a graphics.txt build or a stale store would not)
+    if os.path.exists(ALL_STROKES_FILE) and is_current_store(DEFAULT_STORE_FILE, ALL_STROKES_FILE):
+        try:
+            with CharacterStore(DEFAULT_STORE_FILE) as store:
+                available_chars = store.characters()
+        except ValueError as e:
+            print(f"❌ Error reading {DEFAULT_STORE_FILE}: {e}")
+            return False
     else:
-        print("❌ Error: all_strokes.json doesn't have 'characters' key")
-        return False
+        # Load all_strokes.json
+        try:
+            with open(ALL_STROKES_FILE, 'r', encoding='utf-8') as f:
+                strokes_data = json.load(f)
+        except FileNotFoundError:
+            print("❌ Error: data/all_strokes.json not found")
+            return False
+        except json.JSONDecodeError as e:
+            print(f"❌ Error parsing all_strokes.json: {e}")
+            return False
+        
+        # Get all characters from all_strokes.json
+        if 'characters' in strokes_data:
+            available_chars = set(strokes_data['characters'].keys())
+        else:
+            print("❌ Error: all_strokes.json doesn't have 'characters' key")
+            return False
     
     print(f"✅ Loaded {len(available_chars)} characters from all_strokes.json")
     print(f"✅ Checking {len(level_config.get('levels', []))} levels from level_config.json\n")
@@ -0,0 +1,299 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+Script to verify a packaged game build (zip) without extracting it
+Reads the zip's central directory and checks that:
+    - every backgroundImage / backgroundMusic in level_config.json (and the
+      gameSettings defaults) is in the archive, under res/ or at the root
+      (the same places buildAssetCandidates in game.js looks)
+    - every level character has stroke data in data/all_strokes.json
+    - no entry is unused by the game or larger than the size limit
+    - every entry's CRC-32 matches, checked by several workers in parallel
+
+Music is streamed from the CDN by the game, so missing music is a warning only.
+
+Usage:
+    python verify_build_zip.py <build.zip> [--max-entry-mb N] [--workers N]
+"""
+
+import json
+import os
+import re
+import sys
+import io
+import time
+import zipfile
+import zlib
+from concurrent.futures import ThreadPoolExecutor
+
+# Fix Windows console encoding
+if sys.stdout.encoding != 'utf-8':
+    try:
+        sys.stdout = io.TextIOWrapper(sys.stdout.buffer, encoding='utf-8', errors='replace')
+        sys.stderr = io.TextIOWrapper(sys.stderr.buffer, encoding='utf-8', errors='replace')
+    except:
+        pass
+
+DEFAULT_MAX_ENTRY_MB = 5
+DEFAULT_WORKERS = os.cpu_count() or 4
+READ_CHUNK = 1024 * 1024
+
+MEDIA_EXTENSIONS = ('.jpg', '.jpeg', '.png', '.gif', '.webp', '.mp3', '.ogg', '.wav', '.m4a')
+
+# src="..." / href="..." in index.html and url(...) in CSS
+REFERENCE_PATTERN = re.compile(r'''(?:src|href)\s*=\s*["']([^"'#?]+)|url\(\s*["']?([^"')#?]+)''')
+
+
+def is_cjk(char):
+    return '一' <= char <= '鿿'
+
+
+def find_root(names):
+    """Folder prefix that holds index.html ('' when it is at the top of the zip)"""
+    candidates = [name[:-len('index.html')] for name in names if name.endswith('index.html')]
+    return min(candidates, key=len) if candidates else ''
+
+
+def asset_base_name(value):
+    """Same as getAssetBaseName in game.js"""
+    return str(value or '').replace('\\', '/').strip().split('/')[-1]
+
+
+def resolve_asset(value, files):
+    """Archive path the game would load for a config value, or None"""
+    raw = str(value or '').replace('\\', '/').strip()
+    base = asset_base_name(raw)
+    for candidate in (f'res/{base}', base, raw):
+        if candidate in files:
+            return candidate
+    return None
+
+
+def read_json(zf, name):
+    with zf.open(name) as f:
+        return json.loads(f.read().decode('utf-8'))
+
+
+def stroke_characters(zf, files):
+    """(set of characters with stroke data, path read) from the archive"""
+    path = 'data/all_strokes.json'
+    if path not in files and 'data/versions/manifest.json' in files:
+        manifest = read_json(zf, files['data/versions/manifest.json'])
+        path = f"data/{manifest.get('fullFile', 'all_strokes.json')}"
+    if path not in files:
+        return None, path
+    data = read_json(zf, files[path])
+    return set(data.get('characters', {})), path
+
+
+def referenced_files(zf, files):
+    """Files pulled in by index.html and the stylesheets it links"""
+    used = set()
+    pending = ['index.html']
+    while pending:
+        name = pending.pop()
+        if name in used or name not in files:
+            continue
+        used.add(name)
+        if not name.endswith(('.html', '.css')):
+            continue
+        base_dir = os.path.dirname(name)
+        try:
+            with zf.open(files[name]) as f:
+                text = f.read().decode('utf-8', errors='replace')
+        except (zipfile.BadZipFile, zlib.error):
+            continue  # reported by the CRC check
+        for match in REFERENCE_PATTERN.finditer(text):
+            ref = (match.group(1) or match.group(2)).strip()
+            if not ref or re.match(r'^[a-z]+:', ref, re.I):
+                continue
+            pending.append(os.path.normpath(os.path.join(base_dir, ref)).replace('\\', '/'))
+    return used
+
+
+def check_crc_range(zip_path, infos):
+    """Decompress entries and let zipfile compare CRC-32s, returns [(name, error)]"""
+    failures = []
+    with zipfile.ZipFile(zip_path) as zf:
+        for info in infos:
+            try:
+                with zf.open(info) as f:
+                    while f.read(READ_CHUNK):
+                        pass
+            except (zipfile.BadZipFile, zlib.error, OSError, EOFError) as e:
+                failures.append((info.filename, str(e)))
+    return failures
+
+
+def verify_crcs(zip_path, infos, workers):
+    """Split entries into size-balanced groups and check them in parallel"""
+    groups = [[] for _ in range(max(1, workers))]
+    loads = [0] * len(groups)
+    for info in sorted(infos, key=lambda i: i.compress_size, reverse=True):
+        target = loads.index(min(loads))
+        groups[target].append(info)
+        loads[target] += info.compress_size
+    with ThreadPoolExecutor(max_workers=len(groups)) as executor:
+        results = executor.map(lambda group: check_crc_range(zip_path, group), groups)
+    return [failure for result in results for failure in result]
+
+
+def verify_build(zip_path, config_file=None, max_entry_mb=DEFAULT_MAX_ENTRY_MB, workers=DEFAULT_WORKERS):
+    """Returns (errors, warnings, info) lists of messages"""
+    errors = []
+    warnings = []
+    info = []
+
+    with zipfile.ZipFile(zip_path) as zf:
+        entries = [i for i in zf.infolist() if not i.is_dir()]
+        root = find_root([i.filename for i in entries])
+        # Paths relative to the game root -> archive names
+        files = {i.filename[len(root):]: i.filename for i in entries if i.filename.startswith(root)}
+        by_name = {i.filename: i for i in entries}
+        info.append(f"Entries: {len(entries)} ({sum(i.file_size for i in entries) / (1024*1024):.2f} MB "
+                    f"uncompressed, {sum(i.compress_size for i in entries) / (1024*1024):.2f} MB compressed)")
+        if root:
+            info.append(f"Game root in archive: {root}")
+
+        if 'index.html' not in files:
+            errors.append("index.html not found in archive")
+
+        # Level config: the shipped copy, unless one is given explicitly
+        if config_file:
+            with open(config_file, 'r', encoding='utf-8') as f:
+                config = json.load(f)
+        elif 'level_config.json' in files:
+            try:
+                config = read_json(zf, files['level_config.json'])
+            except (zipfile.BadZipFile, zlib.error, ValueError) as e:
+                errors.append(f"Could not read level_config.json: {e}")
+                config = {'levels': []}
+        else:
+            errors.append("level_config.json not found in archive")
+            config = {'levels': []}
+        levels = config.get('levels', [])
+        settings = config.get('gameSettings', {})
+        info.append(f"Levels: {len(levels)}")
+
+        used = referenced_files(zf, files)
+        used.add('level_config.json')
+
+        # Backgrounds and music
+        assets = [('backgroundImage', settings.get('defaultBackgroundImage'), 'gameSettings'),
+                  ('backgroundMusic', settings.get('defaultBackgroundMusic'), 'gameSettings')]
+        for level in levels:
+            for field in ('backgroundImage', 'backgroundMusic'):
+                if level.get(field):
+                    assets.append((field, level[field], level.get('id')))
+        for field, value, owner in assets:
+            if not value or re.match(r'^https?://', str(value), re.I):
+                continue
+            path = resolve_asset(value, files)
+            if path:
+                used.add(path)
+            elif field == 'backgroundMusic':
+                warnings.append(f"{owner}: {field} '{value}' not in archive (game streams music from CDN)")
+            else:
+                errors.append(f"{owner}: {field} '{value}' not in archive")
+
+        # Stroke data for every level character
+        try:
+            characters, strokes_path = stroke_characters(zf, files)
+        except (zipfile.BadZipFile, zlib.error, ValueError) as e:
+            errors.append(f"Could not read stroke data: {e}")
+            characters, strokes_path = None, None
+        if characters is None:
+            if strokes_path:
+                errors.append(f"{strokes_path} not found in archive")
+        else:
+            used.add(strokes_path)
+            used.update(name for name in files if name.startswith('data/versions/'))
+            missing = {}
+            for level in levels:
+                for char in level.get('characters', ''):
+                    if is_cjk(char) and char not in characters:
+                        missing.setdefault(char, []).append(level.get('id'))
+            for char, level_ids in sorted(missing.items()):
+                errors.append(f"Character {char} (U+{ord(char):04X}) has no stroke data "
+                              f"(levels: {', '.join(map(str, level_ids[:5]))}{'...' if len(level_ids) > 5 else ''})")
+            info.append(f"Stroke data: {strokes_path} ({len(characters)} characters)")
+
+        # Unused and oversized entries
+        limit = max_entry_mb * 1024 * 1024
+        for name, archive_name in sorted(files.items()):
+            entry = by_name[archive_name]
+            if name not in used:
+                kind = 'media file' if name.lower().endswith(MEDIA_EXTENSIONS) else 'file'
+                warnings.append(f"Unused {kind}: {name} ({entry.file_size / 1024:.0f} KB)")
+            if entry.file_size > limit:
+                warnings.append(f"Oversized entry: {name} ({entry.file_size / (1024*1024):.2f} MB > {max_entry_mb} MB)")
+        for entry in entries:
+            if not entry.filename.startswith(root):
+                warnings.append(f"Entry outside game root: {entry.filename}")
+
+    start = time.perf_counter()
+    for name, error in verify_crcs(zip_path, entries, workers):
+        errors.append(f"CRC check failed: {name}: {error}")
+    info.append(f"CRC-32 verified for {len(entries)} entries in {time.perf_counter() - start:.2f}s "
+                f"({workers} workers)")
+    return errors, warnings, info
+
+
+def main():
+    """Main function"""
+    args = sys.argv[1:]
+    if not args or args[0].startswith('--'):
+        print("Usage: python verify_build_zip.py <build.zip> [--max-entry-mb N] [--workers N] [--config file]")
+        sys.exit(2)
+
+    zip_path = args[0]
+    max_entry_mb = DEFAULT_MAX_ENTRY_MB
+    workers = DEFAULT_WORKERS
+    config_file = None
+    for flag, value in zip(args[1:], args[2:]):
+        if flag == '--max-entry-mb':
+            max_entry_mb = float(value)
+        elif flag == '--workers':
+            workers = int(value)
+        elif flag == '--config':
+            config_file = value
+
+    if not os.path.exists(zip_path):
+        print(f"Error: File '{zip_path}' not found")
+        sys.exit(2)
+
+    print("=" * 70)
+    print(f"VERIFYING BUILD: {zip_path}")
+    print("=" * 70)
+    start = time.perf_counter()
+    try:
+        errors, warnings, info = verify_build(zip_path, config_file, max_entry_mb, workers)
+    except zipfile.BadZipFile as e:
+        print(f"❌ Not a valid zip file: {e}")
+        sys.exit(1)
+
+    for line in info:
+        print(f"  {line}")
+    if warnings:
+        print(f"\n⚠️  Warnings ({len(warnings)}):")
+        for line in warnings:
+            print(f"  - {line}")
+    if errors:
+        print(f"\n❌ Errors ({len(errors)}):")
+        for line in errors:
+            print(f"  - {line}")
+
+    print()
+    print("=" * 70)
+    if errors:
+        print(f"❌ BUILD CHECK FAILED: {len(errors)} errors, {len(warnings)} warnings "
+              f"({time.perf_counter() - start:.2f}s)")
+    else:
+        print(f"✅ BUILD OK: {len(warnings)} warnings ({time.perf_counter() - start:.2f}s)")
+    print("=" * 70)
+
+    sys.exit(1 if errors else 0)
+
+
+if __name__ == "__main__":
+    main()
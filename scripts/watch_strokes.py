@@ -0,0 +1,323 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+Watch mode for stroke data generation
+Keeps the graphics.txt character index and every processed character in memory,
+watches level_config.json and ToWriteText.txt, and regenerates all_strokes.json
+shortly after either one is saved. This replaces rerunning
+generate_strokes_from_levels.py / get_all_strokes_from_text.py by hand.
+
+A save to level_config.json rebuilds from the level characters, a save to
+ToWriteText.txt from the text (both generators write the same output file).
+Only characters never seen before are processed. A save that leaves the
+character list unchanged (e.g. a new background image) writes nothing.
+data/all_strokes.store is refreshed too when it was built from all_strokes.json.
+
+--output-profile=game|minimal writes the same reduced entries as the generators.
+Without it the profile of the existing all_strokes.json is kept, so watching
+never silently turns a game or minimal file back into a full one.
+
+Usage:
+    python watch_strokes.py [--dedupe] [--output-profile=full|game|minimal]
+
+Press Ctrl+C to stop.
+"""
+
+import json
+import os
+import sys
+import io
+import time
+from datetime import datetime
+
+from get_one_character_strokes import (
+    SCHEMA_VERSION,
+    DEFAULT_OUTPUT_PROFILE,
+    OUTPUT_PROFILES,
+    build_character_entry,
+    output_profile_from_argv,
+    project_character_entry
+)
+from generate_strokes_from_levels import extract_characters_from_level_config
+from get_all_strokes_from_text import read_characters_from_file
+from graphics_archive import GraphicsArchive, find_graphics_file, is_archive, iter_file_lines
+from character_store import DEFAULT_STORE_FILE, SOURCE_ALL_STROKES, store_source, write_store
+from dedupe_strokes import deduplicate
+
+# Fix Windows console encoding
+if sys.stdout.encoding != 'utf-8':
+    try:
+        sys.stdout = io.TextIOWrapper(sys.stdout.buffer, encoding='utf-8', errors='replace')
+        sys.stderr = io.TextIOWrapper(sys.stderr.buffer, encoding='utf-8', errors='replace')
+    except:
+        pass
+
+GRAPHICS_FILE = '../data/graphics.txt'
+OUTPUT_FILE = '../data/all_strokes.json'
+
+# Watched source file -> function returning its unique characters
+SOURCES = {
+    '../level_config.json': extract_characters_from_level_config,
+    '../ToWriteText.txt': read_characters_from_file,
+}
+
+POLL_INTERVAL = 0.1   # seconds between mtime checks
+DEBOUNCE = 0.25       # quiet time after the last change before rebuilding
+
+
+class WarmIndex:
+    """graphics.txt records and processed strokes kept in memory between rebuilds"""
+
+    def __init__(self, graphics_file=GRAPHICS_FILE):
+        self.source = find_graphics_file(graphics_file)
+        if self.source is None:
+            raise FileNotFoundError(graphics_file)
+        self._archive = None
+        self._lines = {}
+        if is_archive(self.source):
+            # The archive already has a codepoint index; keep it open
+            self._archive = GraphicsArchive(self.source)
+        else:
+            for line in iter_file_lines(self.source):
+                if not line.strip():
+                    continue
+                try:
+                    character = json.loads(line).get('character')
+                except json.JSONDecodeError:
+                    continue
+                if character:
+                    self._lines[character] = line
+        self._entries = {}
+        self._fragments = {}
+
+    def __len__(self):
+        return len(self._archive) if self._archive else len(self._lines)
+
+    def _raw(self, character):
+        if self._archive:
+            return self._archive.get(character)
+        line = self._lines.get(character)
+        return json.loads(line) if line else None
+
+    def entry(self, character):
+        """(all_strokes.json entry or None, whether it was already cached)"""
+        if character in self._entries:
+            return self._entries[character], True
+        char_data = self._raw(character)
+        entry = None
+        if char_data:
+            try:
+                entry = build_character_entry(character, char_data)
+            except ValueError as e:
+                print(f"  [WARNING] {character}: {e}")
+        self._entries[character] = entry
+        return entry, False
+
+    def fragment(self, character, profile=DEFAULT_OUTPUT_PROFILE):
+        """Entry (in an output profile) encoded exactly as json.dump(indent=2) nests it inside 'characters'"""
+        text = self._fragments.get((character, profile))
+        if text is None:
+            entry = project_character_entry(self._entries[character], profile)
+            text = json.dumps(entry, ensure_ascii=False, indent=2).replace('\n', '\n    ')
+            self._fragments[(character, profile)] = text
+        return text
+
+
+def build_output(index, characters, source_file, output_profile=DEFAULT_OUTPUT_PROFILE):
+    """all_strokes.json content for a character list, plus (new, cached) counts"""
+    all_strokes_data = {}
+    failed_characters = []
+    new = cached = 0
+    for character in characters:
+        entry, was_cached = index.entry(character)
+        cached += was_cached
+        new += not was_cached
+        if entry is None:
+            failed_characters.append(character)
+        else:
+            all_strokes_data[character] = project_character_entry(entry, output_profile)
+
+    output_data = {
+        'schemaVersion': SCHEMA_VERSION,
+        'sourceFile': source_file,
+        'timestamp': datetime.now().isoformat(),
+        'totalCharacters': len(characters),
+        'successfulCharacters': len(all_strokes_data),
+        'failedCharacters': len(failed_characters),
+        'characters': all_strokes_data
+    }
+    if failed_characters:
+        output_data['failedCharacterList'] = failed_characters
+    if output_profile != 'full':
+        output_data['outputProfile'] = output_profile
+    return output_data, new, cached
+
+
+def existing_output_profile(filename=OUTPUT_FILE):
+    """outputProfile recorded in an all_strokes.json ('full' when it has none or is unreadable)"""
+    try:
+        with open(filename, 'r', encoding='utf-8') as f:
+            profile = json.load(f).get('outputProfile', DEFAULT_OUTPUT_PROFILE)
+    except (OSError, ValueError, AttributeError):
+        return DEFAULT_OUTPUT_PROFILE
+    return profile if profile in OUTPUT_PROFILES else DEFAULT_OUTPUT_PROFILE
+
+
+def encode_output(index, output_data):
+    """Same text as json.dump(output_data, indent=2), reusing cached per-character fragments"""
+    profile = output_data.get('outputProfile', DEFAULT_OUTPUT_PROFILE)
+    parts = []
+    for key, value in output_data.items():
+        if key == 'characters':
+            if not value:
+                parts.append('"characters": {}')
+                continue
+            entries = ',\n    '.join(f'{json.dumps(char, ensure_ascii=False)}: {index.fragment(char, profile)}'
+                                     for char in value)
+            parts.append('"characters": {\n    ' + entries + '\n  }')
+        else:
+            encoded = json.dumps(value, ensure_ascii=False, indent=2).replace('\n', '\n  ')
+            parts.append(f'{json.dumps(key)}: {encoded}')
+    return '{\n  ' + ',\n  '.join(parts) + '\n}'
+
+
+def write_text_atomic(text, filename):
+    """Write via a temp file so the game never loads a half-written file"""
+    tmp_file = filename + '.tmp'
+    with open(tmp_file, 'w', encoding='utf-8') as f:
+        f.write(text)
+    os.replace(tmp_file, filename)
+
+
+class StrokeWatcher:
+    """Polls the source files and rebuilds the affected outputs after a quiet period"""
+
+    def __init__(self, index, dedupe=False, output_profile=DEFAULT_OUTPUT_PROFILE):
+        self.index = index
+        self.dedupe = dedupe
+        self.output_profile = output_profile
+        self.mtimes = {path: self._mtime(path) for path in SOURCES}
+        self.pending = {}
+        self.last_written = None   # (source file, character list) in the output
+
+    @staticmethod
+    def _mtime(path):
+        try:
+            return os.stat(path).st_mtime
+        except OSError:
+            return None
+
+    def poll(self):
+        """Record changed files; return the ones that have been quiet for DEBOUNCE"""
+        now = time.time()
+        for path in SOURCES:
+            mtime = self._mtime(path)
+            if mtime != self.mtimes[path]:
+                self.mtimes[path] = mtime
+                self.pending[path] = now
+        ready = [path for path, seen in self.pending.items() if now - seen >= DEBOUNCE]
+        for path in ready:
+            del self.pending[path]
+        return ready
+
+    def prime(self):
+        """Process and encode every character the sources use now, so the first save is fast"""
+        primed = set()
+        for source_file, read_characters in SOURCES.items():
+            if not os.path.exists(source_file):
+                continue
+            for character in read_characters(source_file):
+                if character not in primed and self.index.entry(character)[0]:
+                    self.index.fragment(character, self.output_profile)
+                    primed.add(character)
+        return len(primed)
+
+    def rebuild(self, source_file):
+        saved_at = self.mtimes[source_file] or time.time()
+        start = time.perf_counter()
+        characters = SOURCES[source_file](source_file)
+        if not characters:
+            print(f"[{datetime.now():%H:%M:%S}] {source_file}: no Chinese characters found, skipped")
+            return
+
+        if self.last_written == (source_file, characters):
+            elapsed = time.perf_counter() - start
+            print(f"[{datetime.now():%H:%M:%S}] {source_file}: characters unchanged, "
+                  f"output up to date ({elapsed * 1000:.0f} ms)")
+            return
+
+        output_data, new, cached = build_output(self.index, characters, source_file, self.output_profile)
+        written = [OUTPUT_FILE]
+        if self.dedupe:
+            deduped, _ = deduplicate(output_data)
+            text = json.dumps(deduped, ensure_ascii=False, indent=2)
+        else:
+            text = encode_output(self.index, output_data)
+        write_text_atomic(text, OUTPUT_FILE)
+        # Only a store mirroring all_strokes.json is ours to refresh; one built from
+        # graphics.txt (all characters) belongs to other tools and is left alone
+        if store_source(DEFAULT_STORE_FILE) == SOURCE_ALL_STROKES:
+            entries = ((char, self.index.entry(char)[0]) for char in characters)
+            write_store(((char, entry) for char, entry in entries if entry), DEFAULT_STORE_FILE,
+                        SOURCE_ALL_STROKES)
+            written.append(DEFAULT_STORE_FILE)
+        self.last_written = (source_file, characters)
+
+        elapsed = time.perf_counter() - start
+        print(f"[{datetime.now():%H:%M:%S}] {source_file}: {len(characters)} characters "
+              f"({new} processed, {cached} cached, {output_data['failedCharacters']} failed)")
+        print(f"  Rebuild: {elapsed * 1000:.0f} ms, save to output: {(time.time() - saved_at) * 1000:.0f} ms")
+        print(f"  Wrote: {', '.join(written)}")
+
+    def run(self):
+        while True:
+            for source_file in self.poll():
+                try:
+                    self.rebuild(source_file)
+                except Exception as e:
+                    print(f"  [ERROR] Rebuilding from {source_file}: {e}")
+            time.sleep(POLL_INTERVAL)
+
+
+def main():
+    """Main function"""
+    try:
+        output_profile = output_profile_from_argv()
+    except ValueError as e:
+        print(f"Error: {e}")
+        return
+    if not any(arg.startswith('--output-profile=') for arg in sys.argv):
+        output_profile = existing_output_profile(OUTPUT_FILE)
+    dedupe = '--dedupe' in sys.argv
+    if output_profile != 'full' and dedupe:
+        print("Error: --dedupe shares full stroke entries, use it with --output-profile=full")
+        return
+
+    if find_graphics_file(GRAPHICS_FILE) is None:
+        print(f"Error: File '{GRAPHICS_FILE}' not found (run generate_strokes_from_levels.py once to download it)")
+        return
+
+    print("="*70)
+    print("WATCH MODE: REBUILD ALL_STROKES.JSON ON SAVE")
+    print("="*70)
+    start = time.perf_counter()
+    index = WarmIndex(GRAPHICS_FILE)
+    print(f"Loaded {len(index)} characters from {index.source} in {time.perf_counter() - start:.2f}s")
+
+    watcher = StrokeWatcher(index, dedupe=dedupe, output_profile=output_profile)
+    start = time.perf_counter()
+    primed = watcher.prime()
+    print(f"Primed {primed} characters in {time.perf_counter() - start:.2f}s")
+    for path in SOURCES:
+        print(f"  Watching: {path}")
+    print(f"  Output: {OUTPUT_FILE} ({output_profile} profile)")
+    print("Press Ctrl+C to stop")
+    print()
+    try:
+        watcher.run()
+    except KeyboardInterrupt:
+        print("\nWatch mode stopped")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,83 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+Coalesced, batched write-back for the SQLite-backed services
+progress_server.py, review_scheduler.py and leaderboard_server.py keep their
+state in memory and mark what changed. A WriteBatcher remembers those dirty keys
+and writes them back in batched transactions.
+
+A key only becomes clean once the transaction holding its row has committed,
+and only if it was not marked again while that transaction was running. A
+failed write leaves every unwritten key dirty, so the next flush retries it and
+the service keeps it pinned in memory until then.
+"""
+
+import asyncio
+import sqlite3
+from collections import Counter
+
+FLUSH_BATCH_MAX = 5000    # rows per transaction
+
+
+class WriteBatcher:
+    """Dirty keys turned into rows by make_row and written with write_batch(rows)"""
+
+    def __init__(self, write_batch, make_row, owner=None, batch_max=FLUSH_BATCH_MAX, stats=None):
+        self.write_batch = write_batch
+        self.make_row = make_row
+        self.owner = owner or (lambda key: key)
+        self.batch_max = batch_max
+        self.stats = stats if stats is not None else {}
+        self.stats.setdefault('rowsWritten', 0)
+        self.stats.setdefault('transactions', 0)
+        self._dirty = {}            # key -> generation of its latest change
+        self._owners = Counter()    # owner -> dirty keys it holds
+        self._generation = 0
+
+    def __len__(self):
+        return len(self._dirty)
+
+    def __contains__(self, key):
+        return key in self._dirty
+
+    def mark(self, key):
+        """Record that key changed; its row is built at the next flush"""
+        self._generation += 1
+        if key not in self._dirty:
+            self._owners[self.owner(key)] += 1
+        self._dirty[key] = self._generation
+
+    def is_pinned(self, owner):
+        """True while owner (e.g. a user id) has changes that are not written yet"""
+        return self._owners[owner] > 0
+
+    def _clean(self, key, generation):
+        if self._dirty.get(key) != generation:
+            return   # changed again during the write, the next flush writes it
+        del self._dirty[key]
+        owner = self.owner(key)
+        self._owners[owner] -= 1
+        if not self._owners[owner]:
+            del self._owners[owner]
+
+    async def flush(self):
+        """Write every key dirty at call time; raises (keys stay dirty) if a batch fails"""
+        # Build every row before the first await, so rows are a consistent snapshot
+        snapshot = [(key, generation, self.make_row(key)) for key, generation in list(self._dirty.items())]
+        for start in range(0, len(snapshot), self.batch_max):
+            batch = snapshot[start:start + self.batch_max]
+            await self.write_batch([row for _, _, row in batch])
+            self.stats['rowsWritten'] += len(batch)
+            self.stats['transactions'] += 1
+            for key, generation, _ in batch:
+                self._clean(key, generation)
+
+
+async def flush_periodically(flush, interval, label):
+    """Call flush() every interval seconds; failures are reported and retried next time"""
+    while True:
+        await asyncio.sleep(interval)
+        try:
+            await flush()
+        except sqlite3.Error as e:
+            print(f"  [ERROR] Flushing {label}: {e}")